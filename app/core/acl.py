@@ -0,0 +1,76 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import FrozenSet, Optional
+
+import streamlit as st
+from sqlalchemy.orm import Session
+
+from app.core.rbac import ROLE_ADMIN, ROLE_DEPT_LEAD, ROLE_LEAD, normalize_role
+from app.db import org_closure
+from app.db.repository import get_data_version, get_user_scope
+
+# Oturum başına görünürlük listesi (ACL).
+# Kullanıcının okuyabileceği departmanlar, yönettiği takım/departmanlar ve yorum kapsamı, oturumda bir kez hesaplanır
+# ve data_versions['org'] sürümüyle saklanır. Üyelik/rol/takım yazmaları (repository._sync_org) sürümü
+# artırır; bir sonraki rerun'da ACL yeniden kurulur. Her rerun'ın maliyeti tek PK okumasıdır.
+# Kümeler repository liste fonksiyonlarına visible_department_ids / visible_team_ids olarak verilir
+# ve SQL'de uygulanır.
+
+SESSION_KEY = "acl"
+_PRIVILEGED = (ROLE_ADMIN, ROLE_LEAD, ROLE_DEPT_LEAD)
+
+
+@dataclass(frozen=True)
+class Acl:
+    user_id: int
+    role: str
+    version: int
+    department_ids: Optional[FrozenSet[int]]          # None = tüm departmanlar (admin)
+    comment_department_ids: Optional[FrozenSet[int]]  # üst seviye yorum yazılabilen departmanlar
+    # Yönetilen kapsam (org_closure'da kullanıcının altı): kişi bazlı izin/müsaitlik gibi
+    # okunabilir kapsamdan daha dar gösterilmesi gereken ekranlar için
+    managed_team_ids: Optional[FrozenSet[int]]
+    managed_department_ids: Optional[FrozenSet[int]]
+
+    def can_read_department(self, department_id: int) -> bool:
+        return self.department_ids is None or department_id in self.department_ids
+
+    def can_comment(self, department_id: int) -> bool:
+        """Rapora üst seviye yorum (admin, lead, dept_lead; kendi kapsamında)."""
+        return self.comment_department_ids is None or department_id in self.comment_department_ids
+
+    def can_reply(self, report_user_id: int, comment_author_id: int) -> bool:
+        """Yoruma yanıt: yalnızca rapor sahibi, yönetici rolü yoksa ve yorum kendisinin değilse."""
+        return (
+            self.user_id == report_user_id
+            and self.role not in _PRIVILEGED
+            and comment_author_id != self.user_id
+        )
+
+
+def build_acl(db: Session, *, user_id: int, version: Optional[int] = None) -> Acl:
+    """Veritabanındaki güncel rol ve hiyerarşiden ACL (oturumdaki rol değil)."""
+    if version is None:
+        version = get_data_version(db, name=org_closure.VERSION_NAME)
+    raw_role, department_ids, managed_team_ids, managed_department_ids = get_user_scope(db, user_id=user_id)
+    role = normalize_role(raw_role)
+    if role == ROLE_ADMIN:
+        return Acl(user_id, role, version, None, None, None, None)
+    deps = frozenset(department_ids) if raw_role is not None else frozenset()
+    comment = deps if role in _PRIVILEGED else frozenset()
+    return Acl(user_id, role, version, deps, comment, frozenset(managed_team_ids), frozenset(managed_department_ids))
+
+
+def current_acl(db: Session) -> Optional[Acl]:
+    """Oturumdaki kullanıcının ACL'i; sürüm değişmediyse session_state'ten döner."""
+    auth = st.session_state.get("auth") or {}
+    user_id = auth.get("user_id")
+    if not user_id:
+        return None
+    version = get_data_version(db, name=org_closure.VERSION_NAME)
+    acl = st.session_state.get(SESSION_KEY)
+    if isinstance(acl, Acl) and acl.user_id == user_id and acl.version == version:
+        return acl
+    acl = build_acl(db, user_id=user_id, version=version)
+    st.session_state[SESSION_KEY] = acl
+    return acl
@@ -0,0 +1,154 @@
+from __future__ import annotations
+import os, pickle, sqlite3, threading, time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Protocol, TypeVar
+
+from app.core import metrics
+from app.core.config import CACHE_BACKEND, CACHE_FILE, CACHE_MAX_ENTRIES, CACHE_LOCAL_MAX_ENTRIES
+
+# Sürüm anahtarlı önbellek arka uçları.
+# Anahtarlar çağıran tarafından ilgili data_versions sayaçlarını içerecek şekilde kurulur
+# (ör. "directory:departments|org=12|..."). Yazma sayacı artırınca eski anahtar bir daha sorulmaz;
+# bu yüzden girişler değişmezdir, açık geçersizleştirme yoktur ve sayaçlar ana veritabanında
+# olduğundan her işçi süreci aynı geçersizleştirmeyi görür.
+#   memory: süreç içi LRU (tek işçi)
+#   sqlite: paylaşımlı dosya (CACHE_FILE) + önünde küçük süreç içi LRU; bir işçinin hesapladığı
+#           sonucu diğerleri yeniden hesaplamaz. Ana veritabanından ayrı dosyadır: önbellek yazması
+#           uygulama yazmalarıyla aynı kilidi beklemez. Hata durumunda sessizce "miss" sayılır.
+
+MISS = object()
+T = TypeVar("T")
+
+
+class CacheBackend(Protocol):
+    def get(self, key: str) -> Any: ...          # yoksa MISS
+    def set(self, key: str, value: Any) -> None: ...
+    def clear(self) -> None: ...
+
+
+class MemoryLRU:
+    def __init__(self, maxsize: int = CACHE_MAX_ENTRIES):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            if key not in self._data:
+                return MISS
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SqliteCache:
+    """Süreçler arası paylaşımlı önbellek; değerler pickle ile saklanır (yerel, güvenilir dosya)."""
+
+    PRUNE_EVERY = 64  # her N yazmada bir fazlalık (en eski kayıtlar) silinir
+
+    def __init__(self, path: str = CACHE_FILE, maxsize: int = CACHE_MAX_ENTRIES,
+                 local_maxsize: int = CACHE_LOCAL_MAX_ENTRIES, timeout: float = 0.5):
+        self.path, self.maxsize, self.timeout = path, maxsize, timeout
+        self.local = MemoryLRU(local_maxsize)
+        self._tls = threading.local()
+        self._writes = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._tls, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries ("
+                " key TEXT PRIMARY KEY, value BLOB NOT NULL, stored_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_entries_stored ON cache_entries (stored_at)")
+            self._tls.conn = conn
+        return conn
+
+    def get(self, key: str) -> Any:
+        value = self.local.get(key)
+        if value is not MISS:
+            return value
+        try:
+            row = self._conn().execute("SELECT value FROM cache_entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return MISS
+            value = pickle.loads(row[0])
+        except Exception:
+            return MISS
+        self.local.set(key, value)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self.local.set(key, value)
+        try:
+            conn = self._conn()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, stored_at) VALUES (?, ?, ?)",
+                (key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), time.time()),
+            )
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                conn.execute(
+                    "DELETE FROM cache_entries WHERE key IN ("
+                    " SELECT key FROM cache_entries ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                    (self.maxsize,),
+                )
+        except Exception:
+            pass  # paylaşımlı katman en iyi çaba; yerel kopya yeter
+
+    def clear(self) -> None:
+        self.local.clear()
+        try:
+            self._conn().execute("DELETE FROM cache_entries")
+        except Exception:
+            pass
+
+
+BACKENDS: Dict[str, Callable[[], CacheBackend]] = {"memory": MemoryLRU, "sqlite": SqliteCache}
+
+_backend: Optional[CacheBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_backend() -> CacheBackend:
+    """Süreç başına tek arka uç (CACHE_BACKEND: memory | sqlite)."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                try:
+                    _backend = BACKENDS[CACHE_BACKEND]()
+                except KeyError:
+                    raise ValueError(f"Bilinmeyen önbellek: {CACHE_BACKEND} (seçenekler: {', '.join(BACKENDS)})")
+    return _backend
+
+
+def get_or_load(cache: str, key: str, load: Callable[[], T], *, backend: Optional[CacheBackend] = None) -> T:
+    """Önbellekte yoksa load() ile hesaplayıp yazar; isabet/ıska dr_cache_requests_total'a sayılır."""
+    b = backend or get_backend()
+    full_key = f"{cache}:{key}"
+    value = b.get(full_key)
+    if value is not MISS:
+        metrics.cache_hit(cache)
+        return value
+    metrics.cache_miss(cache)
+    value = load()
+    b.set(full_key, value)
+    return value
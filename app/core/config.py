@@ -5,5 +5,68 @@ load_dotenv()
 
 TIMEZONE = os.getenv("TIMEZONE", "Europe/Istanbul")
 DB_URL = os.getenv("DB_URL", "sqlite:///data/app.sqlite3")
+# WAL: okuyucular (yedekleme dahil) yazarları bloklamaz
+DB_JOURNAL_MODE = os.getenv("DB_JOURNAL_MODE", "WAL")
 ADMIN_USERNAME = os.getenv("ADMIN_USERNAME", "admin")
 ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "adminpassss")
+
+# Rapor revizyon geçmişi: her N revizyonda bir tam kopya (snapshot) saklanır
+REVISION_SNAPSHOT_EVERY = max(1, int(os.getenv("REVISION_SNAPSHOT_EVERY", "10")))
+
+# Soğuk arşiv: bu yaştan eski raporlar yıllık SQLite dosyalarına taşınır
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "data/archive")
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "730"))
+
+# Çevrimiçi yedekleme (sqlite3 backup API)
+BACKUP_DIR = os.getenv("BACKUP_DIR", "data/backups")
+BACKUP_KEEP = max(1, int(os.getenv("BACKUP_KEEP", "14")))
+BACKUP_PAGES_PER_STEP = int(os.getenv("BACKUP_PAGES_PER_STEP", "256"))
+BACKUP_STEP_SLEEP_MS = int(os.getenv("BACKUP_STEP_SLEEP_MS", "50"))
+BACKUP_INTERVAL_HOURS = float(os.getenv("BACKUP_INTERVAL_HOURS", "24"))
+
+# Sayfa render zamanlaması (opt-in): PAGE_TIMING=1
+PAGE_TIMING = os.getenv("PAGE_TIMING", "0").lower() in ("1", "true", "yes")
+# Tepe bellek ölçümü (opt-in): tracemalloc tüm ayırmaları yavaşlatır; yalnızca ölçülen render süresince açık
+PAGE_TIMING_TRACEMALLOC = os.getenv("PAGE_TIMING_TRACEMALLOC", "0").lower() in ("1", "true", "yes")
+PAGE_TIMING_BUFFER = int(os.getenv("PAGE_TIMING_BUFFER", "1000"))
+PAGE_TIMING_FLUSH_SECONDS = float(os.getenv("PAGE_TIMING_FLUSH_SECONDS", "60"))
+PAGE_TIMING_FILE = os.getenv("PAGE_TIMING_FILE", "data/metrics/page_timings.jsonl")
+
+# Yavaş sorgu günlüğü: eşiği aşan sorgular + EXPLAIN QUERY PLAN (0 = kapalı)
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_LOG = os.getenv("SLOW_QUERY_LOG", "data/logs/slow_queries.log")
+SLOW_QUERY_LOG_MAX_BYTES = int(os.getenv("SLOW_QUERY_LOG_MAX_BYTES", str(5 * 1024 * 1024)))
+SLOW_QUERY_LOG_BACKUPS = int(os.getenv("SLOW_QUERY_LOG_BACKUPS", "5"))
+
+# Prometheus metin formatında /metrics (0 = kapalı); her örnek kendi portunu kullanmalı
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0") or 0)
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_ACTIVE_SESSION_SECONDS = int(os.getenv("METRICS_ACTIVE_SESSION_SECONDS", "300"))
+
+# Veritabanı bakımı (PRAGMA optimize / ANALYZE / incremental_vacuum / WAL checkpoint)
+MAINT_QUIET_START = os.getenv("MAINT_QUIET_START", "01:00")  # sessiz saat penceresi (TR saati)
+MAINT_QUIET_END = os.getenv("MAINT_QUIET_END", "05:00")
+MAINT_TIME_BUDGET_S = float(os.getenv("MAINT_TIME_BUDGET_S", "30"))
+MAINT_ANALYZE_EVERY_HOURS = float(os.getenv("MAINT_ANALYZE_EVERY_HOURS", "168"))
+MAINT_VACUUM_PAGES_PER_STEP = int(os.getenv("MAINT_VACUUM_PAGES_PER_STEP", "512"))
+MAINT_BUSY_TIMEOUT_MS = int(os.getenv("MAINT_BUSY_TIMEOUT_MS", "2000"))
+
+# İş günü takvimi: numpy weekmask (Pzt..Paz, "1" = çalışma günü); tatiller holidays tablosunda
+WORKWEEK = os.getenv("WORKWEEK", "1111100")
+
+# Gün sonu eksik rapor özeti (app.services.digest_service) ve bildirim gönderimi
+DIGEST_TIME = os.getenv("DIGEST_TIME", "18:00")  # TR saati; bu saatten sonra o günün özeti hesaplanır
+DIGEST_LOOKBACK_DAYS = int(os.getenv("DIGEST_LOOKBACK_DAYS", "3"))  # geç gelen raporlar için geriye bakış
+NOTIFY_SENDER = os.getenv("NOTIFY_SENDER", "file")  # file | smtp | log
+NOTIFY_FILE = os.getenv("NOTIFY_FILE", "data/outbox/notifications.jsonl")
+NOTIFY_MAX_ATTEMPTS = int(os.getenv("NOTIFY_MAX_ATTEMPTS", "5"))
+SMTP_HOST = os.getenv("SMTP_HOST", "localhost")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "25"))
+SMTP_FROM = os.getenv("SMTP_FROM", "dailyreporter@localhost")
+NOTIFY_EMAIL_DOMAIN = os.getenv("NOTIFY_EMAIL_DOMAIN", "")  # kullanıcı adı e-posta değilse eklenir
+
+# Sürüm anahtarlı önbellek (app.core.cache): memory = süreç içi LRU, sqlite = işçiler arası paylaşımlı dosya
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_FILE = os.getenv("CACHE_FILE", "data/cache/cache.sqlite3")
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "512"))
+CACHE_LOCAL_MAX_ENTRIES = int(os.getenv("CACHE_LOCAL_MAX_ENTRIES", "128"))  # sqlite önündeki süreç içi katman
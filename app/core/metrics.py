@@ -0,0 +1,257 @@
+from __future__ import annotations
+import bisect, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import METRICS_HOST, METRICS_PORT, METRICS_ACTIVE_SESSION_SECONDS
+
+# Süreç içi, yalnızca stdlib ile Prometheus metin formatı (text/plain; version=0.0.4).
+# Her Streamlit örneği kendi portunda yayınlar; toplama Prometheus tarafında yapılır.
+
+_DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _fmt_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _escape(v: str) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _num(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *a, **kw):
+        super().__init__(*a, **kw)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        k = self._key(labels)
+        with self._lock:
+            self._values[k] = self._values.get(k, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_fmt_labels(self.labelnames, k)} {_num(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, *a, fn=None, **kw):
+        super().__init__(*a, **kw)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._fn = fn  # etiketsiz, okuma anında hesaplanan değer
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        k = self._key(labels)
+        with self._lock:
+            self._values[k] = self._values.get(k, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def render(self) -> List[str]:
+        if self._fn is not None:
+            return self.header() + [f"{self.name} {_num(self._fn())}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_fmt_labels(self.labelnames, k)} {_num(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, *a, buckets: Sequence[float] = _DEFAULT_BUCKETS, **kw):
+        super().__init__(*a, **kw)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[Tuple[str, ...], list] = {}  # anahtar -> [kova sayıları..., toplam, adet]
+
+    def observe(self, value: float, **labels) -> None:
+        k = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            acc = self._values.get(k)
+            if acc is None:
+                acc = self._values[k] = [0] * len(self.buckets) + [0.0, 0]
+            if i < len(self.buckets):
+                acc[i] += 1
+            acc[-2] += value
+            acc[-1] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        out = self.header()
+        for k, acc in items:
+            cum = 0
+            for b, c in zip(self.buckets, acc):
+                cum += c
+                le = 'le="%s"' % _num(b)
+                out.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, k, le)} {cum}")
+            le = 'le="+Inf"'
+            out.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, k, le)} {acc[-1]}")
+            out.append(f"{self.name}_sum{_fmt_labels(self.labelnames, k)} {_num(acc[-2])}")
+            out.append(f"{self.name}_count{_fmt_labels(self.labelnames, k)} {acc[-1]}")
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, m: _Metric) -> _Metric:
+        self._metrics.append(m)
+        return m
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for m in self._metrics:
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# ---- Aktif oturumlar (son görülme zamanı; okuma anında pencere içindekiler sayılır) ----
+_sessions: Dict[str, float] = {}
+_sessions_lock = threading.Lock()
+
+def touch_session(session_id: str) -> None:
+    with _sessions_lock:
+        _sessions[session_id] = time.monotonic()
+
+def active_sessions() -> int:
+    cutoff = time.monotonic() - METRICS_ACTIVE_SESSION_SECONDS
+    with _sessions_lock:
+        for sid in [s for s, t in _sessions.items() if t < cutoff]:
+            del _sessions[sid]
+        return len(_sessions)
+
+
+LOGINS = REGISTRY.register(Counter("dr_logins_total", "Giriş denemeleri", ["result"]))
+REPORT_SAVES = REGISTRY.register(Counter("dr_report_saves_total", "Rapor kayıtları", ["kind"]))
+COMMENT_ADDS = REGISTRY.register(Counter("dr_comment_adds_total", "Eklenen yorumlar"))
+QUERY_SECONDS = REGISTRY.register(Histogram("dr_query_duration_seconds", "SQL ifade süreleri", ["kind"]))
+WRITE_SECONDS = REGISTRY.register(Histogram(
+    "dr_write_lock_wait_seconds", "DML ifade süreleri (SQLite yazma kilidi beklemesi dahil)"))
+LOCK_ERRORS = REGISTRY.register(Counter("dr_db_locked_errors_total", "'database is locked' hataları"))
+POOL_CHECKOUTS = REGISTRY.register(Counter("dr_pool_checkouts_total", "Havuzdan alınan bağlantılar"))
+POOL_IN_USE = REGISTRY.register(Gauge("dr_pool_connections_in_use", "Şu an kullanımdaki havuz bağlantıları"))
+CACHE_REQUESTS = REGISTRY.register(Counter("dr_cache_requests_total", "Önbellek istekleri", ["cache", "result"]))
+ACTIVE_SESSIONS = REGISTRY.register(Gauge(
+    "dr_active_sessions", "Son pencere içinde etkileşimde bulunan tarayıcı oturumları", fn=active_sessions))
+
+
+def cache_hit(cache: str) -> None:
+    CACHE_REQUESTS.inc(cache=cache, result="hit")
+
+def cache_miss(cache: str) -> None:
+    CACHE_REQUESTS.inc(cache=cache, result="miss")
+
+
+# SQLite ertelenmiş işlemde yazma kilidi ilk DML ifadesinde alınır; busy_timeout beklemesi
+# bu ifadelerin süresine yansır.
+_WRITE_PREFIXES = ("INSERT", "UPDATE", "DELETE", "REPLACE")
+
+def _on_query(statement, parameters, duration, conn) -> None:
+    head = statement.lstrip()[:7].upper()
+    is_write = head.startswith(_WRITE_PREFIXES)
+    QUERY_SECONDS.observe(duration, kind="write" if is_write else "read")
+    if is_write:
+        WRITE_SECONDS.observe(duration)
+
+
+def install(engine) -> None:
+    """Sorgu kancası + havuz olayları (database.py'den bir kez çağrılır)."""
+    from sqlalchemy import event
+    from app.db import profiler
+
+    profiler.add_query_hook(_on_query)
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_conn, record, proxy):
+        POOL_CHECKOUTS.inc()
+        POOL_IN_USE.inc()
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_conn, record):
+        POOL_IN_USE.dec()
+
+    @event.listens_for(engine, "handle_error")
+    def _error(ctx):
+        if "database is locked" in str(ctx.original_exception):
+            LOCK_ERRORS.inc()
+
+
+# ---- HTTP sunucusu ----
+_server: Optional[ThreadingHTTPServer] = None
+_server_lock = threading.Lock()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def ensure_metrics_server(port: Optional[int] = None, host: Optional[str] = None) -> Optional[int]:
+    """
+    METRICS_PORT > 0 ise süreç başına bir kez arka plan iş parçacığında /metrics yayınlar.
+    Port doluysa (ör. başka örnek) sessizce vazgeçer. Dinlenen portu döner.
+    """
+    global _server
+    port = METRICS_PORT if port is None else port
+    if not port:
+        return None
+    with _server_lock:
+        if _server is not None:
+            return _server.server_address[1]
+        try:
+            srv = ThreadingHTTPServer((host or METRICS_HOST, port), _Handler)
+        except OSError as e:
+            print(f"[metrics] {host or METRICS_HOST}:{port} dinlenemedi: {e}")
+            return None
+        srv.daemon_threads = True
+        threading.Thread(target=srv.serve_forever, name="metrics-http", daemon=True).start()
+        _server = srv
+        return srv.server_address[1]
@@ -0,0 +1,213 @@
+from __future__ import annotations
+import asyncio, socket, subprocess, time
+from contextlib import closing
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+# Yapışkan oturumlu (sticky) yerel ters vekil.
+# Streamlit oturumu (session_state, yüklenen/üretilen medya dosyaları) onu açan süreçte yaşar; bu yüzden
+# bir tarayıcının tüm istekleri (HTML, statik dosyalar, /_stcore/stream WebSocket'i) aynı işçiye gitmelidir.
+# İlk yanıtta dr_worker çerezi yazılır, sonraki bağlantılar çerezdeki işçiye yönlenir. Çerez yoksa
+# (veya işçi sağlıksızsa) en az bağlantılı sağlıklı işçi seçilir.
+# HTTP yalnızca ilk istek/yanıt başlığı kadar çözümlenir; geri kalanı (gövde, keep-alive istekleri,
+# WebSocket çerçeveleri) iki yönlü ham bayt aktarımıdır. Bağlantı ilk istekte seçilen işçiye sabitlenir.
+
+COOKIE = "dr_worker"
+HEAD_LIMIT = 64 * 1024
+CHUNK = 64 * 1024
+
+
+def wait_port(host: str, port: int, timeout: float = 30.0) -> bool:
+    t0 = time.time()
+    while time.time() - t0 < timeout:
+        with closing(socket.socket(socket.AF_INET, socket.SOCK_STREAM)) as s:
+            s.settimeout(1.0)
+            try:
+                if s.connect_ex((host, port)) == 0:
+                    return True
+            except Exception:
+                pass
+        time.sleep(0.5)
+    return False
+
+
+@dataclass
+class Backend:
+    index: int
+    host: str
+    port: int
+    start: Optional[Callable[[], subprocess.Popen]] = None  # yeniden başlatma için süreç fabrikası
+    proc: Optional[subprocess.Popen] = None
+    healthy: bool = False
+    conns: int = 0
+    restarts: List[float] = field(default_factory=list)
+
+    @property
+    def label(self) -> str:
+        return f"işçi {self.index} ({self.host}:{self.port})"
+
+
+def _cookie_worker(head: bytes) -> Optional[int]:
+    for line in head.split(b"\r\n")[1:]:
+        name, _, value = line.partition(b":")
+        if name.strip().lower() != b"cookie":
+            continue
+        for part in value.split(b";"):
+            k, _, v = part.strip().partition(b"=")
+            if k == COOKIE.encode() and v.isdigit():
+                return int(v)
+    return None
+
+
+def _add_header(head: bytes, line: str) -> bytes:
+    """Başlık bloğunun (\\r\\n\\r\\n ile biten) sonuna bir satır ekler."""
+    return head[:-2] + line.encode("latin-1") + b"\r\n\r\n"
+
+
+class StickyProxy:
+    def __init__(
+        self,
+        backends: List[Backend],
+        *,
+        health_interval: float = 5.0,
+        max_restarts: int = 5,
+        restart_window: float = 600.0,
+        start_timeout: float = 45.0,
+    ):
+        self.backends = backends
+        self.health_interval = health_interval
+        self.max_restarts = max_restarts
+        self.restart_window = restart_window
+        self.start_timeout = start_timeout
+        # Kapanışta işçiler sonlandırılmadan önce True yapılır: sağlık kontrolü onları yeniden başlatmaz
+        self.stopping = False
+
+    # ----------------- yönlendirme -----------------
+
+    def pick(self, wanted: Optional[int]) -> Optional[Backend]:
+        if wanted is not None and 0 <= wanted < len(self.backends) and self.backends[wanted].healthy:
+            return self.backends[wanted]
+        alive = [b for b in self.backends if b.healthy]
+        return min(alive, key=lambda b: (b.conns, b.index)) if alive else None
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            writer.close()
+            return
+        wanted = _cookie_worker(head)
+        # Sağlık döngüsü çökmeyi henüz görmediyse bağlantı hatası işçiyi düşürür, sıradaki denenir
+        while True:
+            backend = self.pick(wanted)
+            if backend is None:
+                await self._error(writer, b"503 Service Unavailable", "Uygun işçi yok.")
+                return
+            try:
+                up_reader, up_writer = await asyncio.open_connection(backend.host, backend.port, limit=HEAD_LIMIT)
+                break
+            except OSError:
+                print(f"[proxy] {backend.label} bağlantıyı reddetti")
+                backend.healthy = False
+
+        peer = writer.get_extra_info("peername")
+        if peer:
+            head = _add_header(head, f"X-Forwarded-For: {peer[0]}")
+        backend.conns += 1
+        try:
+            up_writer.write(head)
+            await up_writer.drain()
+            upstream = asyncio.create_task(self._pipe(reader, up_writer))
+            try:
+                resp = await up_reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                upstream.cancel()
+                return
+            if wanted != backend.index:
+                resp = _add_header(resp, f"Set-Cookie: {COOKIE}={backend.index}; Path=/; HttpOnly; SameSite=Lax")
+            writer.write(resp)
+            await writer.drain()
+            downstream = asyncio.create_task(self._pipe(up_reader, writer))
+            # Bir yön kapanınca diğeri de kapatılır (WebSocket ve keep-alive için)
+            await asyncio.wait({upstream, downstream}, return_when=asyncio.FIRST_COMPLETED)
+            for t in (upstream, downstream):
+                t.cancel()
+        finally:
+            backend.conns -= 1
+            for w in (up_writer, writer):
+                try:
+                    w.close()
+                except Exception:
+                    pass
+
+    @staticmethod
+    async def _pipe(src: asyncio.StreamReader, dst: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                data = await src.read(CHUNK)
+                if not data:
+                    break
+                dst.write(data)
+                await dst.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            try:
+                if dst.can_write_eof():
+                    dst.write_eof()
+            except Exception:
+                pass
+
+    @staticmethod
+    async def _error(writer: asyncio.StreamWriter, status: bytes, msg: str) -> None:
+        body = msg.encode("utf-8")
+        writer.write(
+            b"HTTP/1.1 " + status + b"\r\nContent-Type: text/plain; charset=utf-8\r\n"
+            + f"Content-Length: {len(body)}\r\nConnection: close\r\nRetry-After: 5\r\n\r\n".encode() + body
+        )
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    # ----------------- sağlık / yeniden başlatma -----------------
+
+    def stop(self) -> None:
+        """Kapanışı işaretler; çağıran işçileri bundan sonra sonlandırır (başka iş parçacığından çağrılabilir)."""
+        self.stopping = True
+
+    async def _check(self, b: Backend) -> None:
+        loop = asyncio.get_running_loop()
+        if self.stopping:
+            return
+        if b.proc is not None and b.proc.poll() is not None:
+            b.healthy = False
+            now = time.time()
+            b.restarts = [t for t in b.restarts if now - t < self.restart_window]
+            if b.start is None or len(b.restarts) >= self.max_restarts:
+                return  # pencere dolana kadar yeniden denenmez
+            print(f"[proxy] {b.label} kapanmış (kod {b.proc.returncode}); yeniden başlatılıyor")
+            b.restarts.append(now)
+            b.proc = b.start()
+            if self.stopping:
+                # Kapanış başlatma sırasında geldi: çağıran eski süreci sonlandırmış olabilir
+                b.proc.terminate()
+                return
+            b.healthy = await loop.run_in_executor(None, wait_port, b.host, b.port, self.start_timeout)
+            print(f"[proxy] {b.label} {'hazır' if b.healthy else 'başlatılamadı'}")
+            return
+        up = await loop.run_in_executor(None, wait_port, b.host, b.port, 1.0)
+        if up != b.healthy:
+            print(f"[proxy] {b.label} {'sağlıklı' if up else 'yanıt vermiyor'}")
+        b.healthy = up
+
+    async def health_loop(self) -> None:
+        while not self.stopping:
+            await asyncio.gather(*(self._check(b) for b in self.backends))
+            await asyncio.sleep(self.health_interval)
+
+    async def serve(self, host: str, port: int) -> None:
+        await asyncio.gather(*(self._check(b) for b in self.backends))
+        server = await asyncio.start_server(self.handle, host, port, limit=HEAD_LIMIT)
+        async with server:
+            await asyncio.gather(server.serve_forever(), self.health_loop())
@@ -1,7 +1,9 @@
 from __future__ import annotations
-import functools
+import functools, os
 import streamlit as st
 
+from app.core.config import PAGE_TIMING
+
 # Kanonik roller
 ROLE_ANON = "anon"
 ROLE_USER = "user"
@@ -65,10 +67,20 @@ def require_min_role(required: str):
     def deco(func):
         @functools.wraps(func)
         def wrapper(*a, **kw):
-            if not has_min_role(required):
-                st.error("Bu sayfayı görüntülemek için giriş yapmanız ve yeterli yetkiye sahip olmanız gerekir.")
-                st.stop()
-            return func(*a, **kw)
+            try:
+                if not has_min_role(required):
+                    st.error("Bu sayfayı görüntülemek için giriş yapmanız ve yeterli yetkiye sahip olmanız gerekir.")
+                    st.stop()
+                if PAGE_TIMING:
+                    from app.core import timing
+                    page = os.path.splitext(os.path.basename(func.__code__.co_filename))[0]
+                    with timing.measure(page):
+                        return func(*a, **kw)
+                return func(*a, **kw)
+            finally:
+                # Sorgu profili sayfanın sonunda kapanır (st.stop/st.rerun dahil), bir sonraki rerun'da değil
+                from app.ui.nav import finish_query_profile
+                finish_query_profile()
         return wrapper
     return deco
 
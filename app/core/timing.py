@@ -0,0 +1,157 @@
+from __future__ import annotations
+import argparse, atexit, json, os, threading, time, tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List
+
+from app.core.config import (
+    PAGE_TIMING_TRACEMALLOC, PAGE_TIMING_BUFFER, PAGE_TIMING_FLUSH_SECONDS, PAGE_TIMING_FILE,
+)
+from app.db import profiler
+
+# Süreç içi halka tampon (son N ölçüm) + dosyaya henüz yazılmamış kayıtlar
+_ring: deque = deque(maxlen=PAGE_TIMING_BUFFER)
+_pending: List[dict] = []
+_lock = threading.Lock()
+_last_flush = time.monotonic()
+# tracemalloc'u bu modül açtıysa ölçümü süren render sayısı; sonuncusu bitince izleme kapatılır
+_tm_users = 0
+_tm_owned = False
+
+
+def _tm_begin() -> int:
+    global _tm_users, _tm_owned
+    with _lock:
+        if _tm_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tm_owned = True
+        _tm_users += 1
+        tracemalloc.reset_peak()
+        return tracemalloc.get_traced_memory()[0]
+
+
+def _tm_end(mem0: int) -> int:
+    """Başlangıca göre tepe bellek; izlemeyi bu modül açtıysa son render bitince kapatır."""
+    global _tm_users, _tm_owned
+    with _lock:
+        peak = tracemalloc.get_traced_memory()[1] - mem0
+        _tm_users -= 1
+        if _tm_users == 0 and _tm_owned:
+            tracemalloc.stop()
+            _tm_owned = False
+        return peak
+
+
+@contextmanager
+def measure(page: str) -> Iterator[None]:
+    """
+    Bir sayfa çağrısını ölçer: duvar süresi, DB süresi (profiler), Python süresi
+    (duvar - DB) ve tracemalloc tepe bellek. st.stop()/st.rerun() istisnaları da ölçülür.
+    Not: tracemalloc tepe değeri süreç geneli olduğu için eşzamanlı sayfalarda yaklaşıktır;
+    izleme yalnızca ölçülen render'lar sürerken açıktır.
+    """
+    prof = profiler.current()
+    db0 = prof.total_s if prof else 0.0
+    q0 = prof.count if prof else 0
+    use_tm = PAGE_TIMING_TRACEMALLOC
+    mem0 = _tm_begin() if use_tm else 0
+    t0 = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except BaseException as e:
+        # Streamlit akış kontrolü (StopException/RerunException) hata sayılmaz
+        outcome = type(e).__name__
+        raise
+    finally:
+        wall = time.perf_counter() - t0
+        peak = _tm_end(mem0) if use_tm else None
+        # Profil genelde sayfa içinde (build_sidebar) başlatılır; başlangıçtakiyle aynı değilse
+        # sonradan açılan profilin tamamı bu çağrıya aittir.
+        end = profiler.current()
+        if end is not None and end is prof:
+            db, queries = end.total_s - db0, end.count - q0
+        elif end is not None:
+            db, queries = end.total_s, end.count
+        else:
+            db, queries = 0.0, None
+        record({
+            "ts": datetime.now().isoformat(timespec="milliseconds"),
+            "page": page,
+            "wall_ms": round(wall * 1000, 3),
+            "db_ms": round(db * 1000, 3),
+            "py_ms": round(max(0.0, wall - db) * 1000, 3),
+            "queries": queries,
+            "peak_kib": round(peak / 1024, 1) if peak is not None else None,
+            "outcome": outcome,
+        })
+
+
+def record(entry: dict) -> None:
+    global _last_flush
+    with _lock:
+        _ring.append(entry)
+        _pending.append(entry)
+        due = time.monotonic() - _last_flush >= PAGE_TIMING_FLUSH_SECONDS
+    if due:
+        flush()
+
+
+def flush(path: str = PAGE_TIMING_FILE) -> int:
+    """Bekleyen kayıtları JSON Lines olarak dosyaya ekler. Yazılan kayıt sayısını döner."""
+    global _last_flush
+    with _lock:
+        batch = list(_pending)
+        _pending.clear()
+        _last_flush = time.monotonic()
+    if not batch:
+        return 0
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        for e in batch:
+            f.write(json.dumps(e, ensure_ascii=False) + "\n")
+    return len(batch)
+
+
+atexit.register(flush)
+
+
+def recent() -> List[dict]:
+    with _lock:
+        return list(_ring)
+
+
+def summarize(entries: List[dict]) -> Dict[str, dict]:
+    """Sayfa başına p50/p95 duvar süresi, ortalama DB süresi ve tepe bellek."""
+    by_page: Dict[str, List[dict]] = {}
+    for e in entries:
+        by_page.setdefault(e["page"], []).append(e)
+    out = {}
+    for page, rows in sorted(by_page.items()):
+        walls = sorted(r["wall_ms"] for r in rows)
+        out[page] = {
+            "n": len(rows),
+            "p50_ms": walls[len(walls) // 2],
+            "p95_ms": walls[min(len(walls) - 1, int(0.95 * (len(walls) - 1) + 0.5))],
+            "db_avg_ms": round(sum(r["db_ms"] for r in rows) / len(rows), 3),
+            "peak_kib_max": max((r["peak_kib"] or 0) for r in rows),
+        }
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Sayfa render zamanlaması özeti.")
+    ap.add_argument("path", nargs="?", default=PAGE_TIMING_FILE)
+    ap.add_argument("--since", default=None, help="ISO zaman damgası; yalnızca bundan sonrası")
+    args = ap.parse_args()
+    with open(args.path, encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+    if args.since:
+        entries = [e for e in entries if e["ts"] >= args.since]
+    print(f"{'sayfa':32s} {'n':>6s} {'p50':>9s} {'p95':>9s} {'db ort':>9s} {'tepe KiB':>9s}")
+    for page, s in summarize(entries).items():
+        print(f"{page:32s} {s['n']:6d} {s['p50_ms']:9.1f} {s['p95_ms']:9.1f} {s['db_avg_ms']:9.1f} {s['peak_kib_max']:9.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import os
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Iterator, List, Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import ARCHIVE_DIR
+from app.db.models import ArchiveSegment, Report, ReportRevision
+from app.db.read_models import CommentRow
+
+# Arşiv dosyalarında içerik kolonları zlib ile sıkıştırılmış BLOB olarak tutulur.
+_ARCHIVE_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS {a}.reports (
+        id INTEGER PRIMARY KEY,
+        user_id INTEGER NOT NULL,
+        department_id INTEGER NOT NULL,
+        date DATE NOT NULL,
+        content BLOB NOT NULL,
+        project VARCHAR(120),
+        tags_json TEXT,
+        created_at DATETIME NOT NULL,
+        updated_at DATETIME NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS {a}.ix_arch_reports_user_date ON reports (user_id, date)",
+    "CREATE INDEX IF NOT EXISTS {a}.ix_arch_reports_dept_date ON reports (department_id, date)",
+    """
+    CREATE TABLE IF NOT EXISTS {a}.comments (
+        id INTEGER PRIMARY KEY,
+        report_id INTEGER NOT NULL,
+        author_user_id INTEGER NOT NULL,
+        parent_comment_id INTEGER,
+        content BLOB NOT NULL,
+        created_at DATETIME NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS {a}.ix_arch_comments_report ON comments (report_id)",
+    """
+    CREATE TABLE IF NOT EXISTS {a}.report_revisions (
+        id INTEGER PRIMARY KEY,
+        report_id INTEGER NOT NULL,
+        rev_no INTEGER NOT NULL,
+        is_snapshot BOOLEAN NOT NULL,
+        payload BLOB NOT NULL,
+        project VARCHAR(120),
+        raw_size INTEGER NOT NULL,
+        stored_size INTEGER NOT NULL,
+        created_at DATETIME NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS {a}.ix_arch_revisions_report ON report_revisions (report_id, rev_no)",
+)
+
+
+def archive_path(year: int) -> str:
+    return os.path.join(ARCHIVE_DIR, f"reports_{int(year)}.sqlite3")
+
+def _alias(year: int) -> str:
+    return f"arch_{int(year)}"
+
+def ensure_archive_schema(conn: Connection, alias: str) -> None:
+    for sql in _ARCHIVE_SCHEMA:
+        conn.exec_driver_sql(sql.format(a=alias))
+
+@contextmanager
+def attached(conn: Connection, years: Sequence[int], *, create: bool = False) -> Iterator[List[str]]:
+    """
+    Yıllık arşiv dosyalarını ATTACH eder, çıkışta DETACH eder.
+    create=False iken diskte olmayan dosyalar atlanır (boş veritabanı oluşturulmaz).
+    """
+    aliases: List[str] = []
+    try:
+        for y in years:
+            path = archive_path(y)
+            if not create and not os.path.exists(path):
+                continue
+            alias = _alias(y)
+            conn.exec_driver_sql(f"ATTACH DATABASE ? AS {alias}", (path,))
+            aliases.append(alias)
+        yield aliases
+    finally:
+        for alias in aliases:
+            try:
+                conn.exec_driver_sql(f"DETACH DATABASE {alias}")
+            except Exception:
+                pass
+
+
+def archived_years_for_range(db: Session, *, start: date, end: date) -> List[int]:
+    """Aralık arşive uzanıyorsa ilgili yıllar; aksi halde boş liste (sıcak yol)."""
+    stmt = (
+        select(ArchiveSegment.year)
+        .where(ArchiveSegment.max_date >= start, ArchiveSegment.min_date <= end)
+        .order_by(ArchiveSegment.year)
+    )
+    return list(db.execute(stmt).scalars().all())
+
+
+def _as_date(v) -> date:
+    return v if isinstance(v, date) else date.fromisoformat(str(v)[:10])
+
+def _as_dt(v) -> datetime:
+    return v if isinstance(v, datetime) else datetime.fromisoformat(str(v))
+
+
+def select_archived_reports(
+    bind: Engine,
+    *,
+    years: Sequence[int],
+    start: date,
+    end: date,
+    user_ids: Optional[Sequence[int]] = None,
+    department_id: Optional[int] = None,
+    q: Optional[str] = None,
+) -> List[Report]:
+    """
+    Arşivdeki raporları tek bir UNION ALL sorgusuyla okur ve oturuma bağlı olmayan
+    (transient) Report nesneleri olarak döndürür. Sıralama: date desc, id desc.
+    """
+    if not years:
+        return []
+    with bind.connect() as conn:
+        with attached(conn, years) as aliases:
+            if not aliases:
+                return []
+            parts: List[str] = []
+            params: list = []
+            for a in aliases:
+                where = ["date >= ?", "date <= ?"]
+                p: list = [start.isoformat(), end.isoformat()]
+                if user_ids is not None:
+                    if not user_ids:
+                        return []
+                    where.append(f"user_id IN ({','.join('?' * len(user_ids))})")
+                    p.extend(int(x) for x in user_ids)
+                if department_id:
+                    where.append("department_id = ?")
+                    p.append(int(department_id))
+                if q:
+                    like = f"%{q.strip()}%"
+                    where.append("(lower(zlib_decompress(content)) LIKE lower(?) OR lower(project) LIKE lower(?))")
+                    p.extend([like, like])
+                parts.append(
+                    "SELECT id, user_id, department_id, date, zlib_decompress(content), project, tags_json, "
+                    f"created_at, updated_at FROM {a}.reports WHERE {' AND '.join(where)}"
+                )
+                params.extend(p)
+            sql = " UNION ALL ".join(parts) + " ORDER BY date DESC, id DESC"
+            rows = conn.exec_driver_sql(sql, tuple(params)).fetchall()
+
+    return [
+        Report(
+            id=row[0], user_id=row[1], department_id=row[2], date=_as_date(row[3]),
+            content=row[4], project=row[5], tags_json=row[6],
+            created_at=_as_dt(row[7]), updated_at=_as_dt(row[8]),
+        )
+        for row in rows
+    ]
+
+
+def select_archived_comments(bind: Engine, *, years: Sequence[int], report_ids: Sequence[int]) -> List[CommentRow]:
+    """Arşivlenmiş raporların yorumları (içerik açılmış); sıralama: created_at, id."""
+    if not years or not report_ids:
+        return []
+    marks = ",".join("?" * len(report_ids))
+    with bind.connect() as conn:
+        with attached(conn, years) as aliases:
+            if not aliases:
+                return []
+            parts = [
+                "SELECT id, report_id, author_user_id, parent_comment_id, zlib_decompress(content), created_at "
+                f"FROM {a}.comments WHERE report_id IN ({marks})"
+                for a in aliases
+            ]
+            params = tuple(int(x) for x in report_ids) * len(aliases)
+            rows = conn.exec_driver_sql(" UNION ALL ".join(parts) + " ORDER BY 6, 1", params).fetchall()
+    return [CommentRow(row[0], row[1], row[2], row[3], row[4], _as_dt(row[5])) for row in rows]
+
+
+def select_archived_revisions(bind: Engine, *, years: Sequence[int], report_id: int) -> List[ReportRevision]:
+    """
+    Arşivlenmiş bir raporun sürümleri, payload dahil transient ReportRevision nesneleri olarak.
+    Sıralama: rev_no desc.
+    """
+    if not years:
+        return []
+    with bind.connect() as conn:
+        with attached(conn, years) as aliases:
+            if not aliases:
+                return []
+            parts = [
+                "SELECT id, report_id, rev_no, is_snapshot, payload, project, raw_size, stored_size, created_at "
+                f"FROM {a}.report_revisions WHERE report_id = ?"
+                for a in aliases
+            ]
+            rows = conn.exec_driver_sql(
+                " UNION ALL ".join(parts) + " ORDER BY 3 DESC", (int(report_id),) * len(aliases)
+            ).fetchall()
+    return [
+        ReportRevision(
+            id=row[0], report_id=row[1], rev_no=row[2], is_snapshot=bool(row[3]), payload=row[4],
+            project=row[5], raw_size=row[6], stored_size=row[7], created_at=_as_dt(row[8]),
+        )
+        for row in rows
+    ]
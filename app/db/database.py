@@ -1,10 +1,57 @@
 from __future__ import annotations
-import os
-from sqlalchemy import create_engine
+import os, sqlite3, zlib
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, declarative_base
-from app.core.config import DB_URL
+from app.core.config import DB_URL, DB_JOURNAL_MODE
+from app.core import metrics
+from app.db import profiler, slowlog
 
 os.makedirs("data", exist_ok=True); os.makedirs("data/uploads", exist_ok=True)
 engine = create_engine(DB_URL, connect_args={"check_same_thread": False} if DB_URL.startswith("sqlite") else {}, future=True)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 Base = declarative_base()
+profiler.install(engine)  # rerun başına sorgu sayısı/süresi (yönetici panelinde gösterilir)
+slowlog.install()  # SLOW_QUERY_MS üstü sorgular -> data/logs/slow_queries.log
+metrics.install(engine)  # sorgu gecikmesi, havuz, yazma kilidi (METRICS_PORT ile yayınlanır)
+
+
+# ---- SQLite bağlantı ayarları ve yardımcı fonksiyonlar (arşiv sıkıştırma) ----
+
+def _zlib_compress(value):
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.encode("utf-8")
+    return zlib.compress(value, 6)
+
+def _zlib_decompress(value):
+    if value is None:
+        return None
+    return zlib.decompress(value).decode("utf-8")
+
+def _add_functions(dbapi_conn) -> None:
+    dbapi_conn.create_function("zlib_compress", 1, _zlib_compress, deterministic=True)
+    dbapi_conn.create_function("zlib_decompress", 1, _zlib_decompress, deterministic=True)
+
+def install_sqlite_functions(target: Engine) -> None:
+    """Arşiv SQL'inin kullandığı zlib_compress/zlib_decompress'i motorun SQLite bağlantılarına ekler (araçlar için)."""
+    @event.listens_for(target, "connect")
+    def _on_connect(dbapi_conn, _record):
+        if isinstance(dbapi_conn, sqlite3.Connection):
+            _add_functions(dbapi_conn)
+
+@event.listens_for(engine, "connect")
+def _on_sqlite_connect(dbapi_conn, _record):
+    # Yalnızca uygulama motoru: araç/test motorları günlük modunu kendileri seçer
+    if isinstance(dbapi_conn, sqlite3.Connection):
+        _add_functions(dbapi_conn)
+        if DB_JOURNAL_MODE:
+            dbapi_conn.execute(f"PRAGMA journal_mode={DB_JOURNAL_MODE}")
+
+
+def sqlite_db_path() -> str:
+    """Ana SQLite dosyasının yolu (yedekleme/bakım araçları için)."""
+    if engine.url.get_backend_name() != "sqlite" or not engine.url.database:
+        raise RuntimeError("Bu işlem yalnızca dosya tabanlı SQLite veritabanında desteklenir.")
+    return engine.url.database
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import bisect
+import threading
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.db.models import DataVersion, Leave
+from app.db.read_models import LeaveRow
+
+# Süreç içi izin aralık indeksi.
+# SQL'deki "end_date >= a AND start_date <= b" koşulunu SQLite tek indeksle karşılar; yıllar
+# biriktikçe taranan satır sayısı büyür. Burada kısa izinler (<= SHORT_MAX_DAYS gün) başlangıç
+# tarihine göre sıralı dizide tutulur: [a, b] ile çakışanlar yalnızca başlangıcı
+# [a - SHORT_MAX_DAYS + 1, b] aralığında olabilir, bu da iki ikili arama + sonuç boyu kadar iştir.
+# Uzun izinler (nadir) ayrı bir listede doğrusal taranır.
+# Tazelik: data_versions['leaves'] sayacı. create_leave/delete_leave indeksi artımlı günceller;
+# başka bir süreç yazdıysa sürüm tutmaz ve indeks bir sonraki erişimde yeniden kurulur.
+
+SHORT_MAX_DAYS = 31
+VERSION_NAME = "leaves"
+
+
+class LeaveIntervalIndex:
+    def __init__(self, rows: Iterable[LeaveRow] = (), version: int = 0):
+        self.version = version
+        self._by_id: Dict[int, LeaveRow] = {}
+        self._long: Dict[int, LeaveRow] = {}
+        short: List[LeaveRow] = []
+        for r in rows:
+            self._by_id[r.id] = r
+            if r.days <= SHORT_MAX_DAYS:
+                short.append(r)
+            else:
+                self._long[r.id] = r
+        short.sort(key=lambda r: (r.start_date, r.id))
+        self._keys: List[Tuple[date, int]] = [(r.start_date, r.id) for r in short]
+        self._short: List[LeaveRow] = short
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def add(self, r: LeaveRow) -> None:
+        if r.id in self._by_id:
+            self.remove(r.id)
+        self._by_id[r.id] = r
+        if r.days > SHORT_MAX_DAYS:
+            self._long[r.id] = r
+            return
+        i = bisect.bisect_left(self._keys, (r.start_date, r.id))
+        self._keys.insert(i, (r.start_date, r.id))
+        self._short.insert(i, r)
+
+    def remove(self, leave_id: int) -> None:
+        r = self._by_id.pop(leave_id, None)
+        if r is None:
+            return
+        if self._long.pop(leave_id, None) is not None:
+            return
+        i = bisect.bisect_left(self._keys, (r.start_date, r.id))
+        if i < len(self._keys) and self._keys[i] == (r.start_date, r.id):
+            del self._keys[i]
+            del self._short[i]
+
+    def overlaps(self, start: date, end: date, user_ids: Optional[Set[int]] = None) -> List[LeaveRow]:
+        """[start, end] ile kesişen izinler; sıralama list_leaves_admin ile aynı (start desc, id desc)."""
+        lo = bisect.bisect_left(self._keys, (start - timedelta(days=SHORT_MAX_DAYS - 1), 0))
+        hi = bisect.bisect_left(self._keys, (end + timedelta(days=1), 0))
+        out = [r for r in self._short[lo:hi] if r.end_date >= start]
+        out.extend(r for r in self._long.values() if r.start_date <= end and r.end_date >= start)
+        if user_ids is not None:
+            out = [r for r in out if r.user_id in user_ids]
+        out.sort(key=lambda r: (r.start_date, r.id), reverse=True)
+        return out
+
+    def who_is_off(self, d: date, user_ids: Optional[Set[int]] = None) -> Set[int]:
+        return {r.user_id for r in self.overlaps(d, d, user_ids)}
+
+
+# Veritabanı URL'si -> indeks (araçlar aynı süreçte birden çok veritabanı açabilir)
+_indexes: Dict[str, LeaveIntervalIndex] = {}
+_lock = threading.Lock()
+
+
+def _key(db: Session) -> str:
+    return str(db.get_bind().url)
+
+
+def current_version(db: Session, name: str = VERSION_NAME) -> int:
+    return db.execute(select(DataVersion.version).where(DataVersion.name == name)).scalar() or 0
+
+
+def get_index(db: Session) -> LeaveIntervalIndex:
+    """Güncel indeks; sürüm değişmişse (başka süreç yazmış) yeniden kurulur. Maliyet: tek PK okuması."""
+    key = _key(db)
+    version = current_version(db)
+    with _lock:
+        idx = _indexes.get(key)
+        if idx is not None and idx.version == version:
+            return idx
+    # Sürüm ve satırlar aynı okuma işleminde: SQLite anlık görüntüsü ikisini tutarlı verir
+    rows = [LeaveRow(*t) for t in db.execute(
+        select(Leave.id, Leave.user_id, Leave.start_date, Leave.end_date)
+    ).tuples()]
+    idx = LeaveIntervalIndex(rows, version=version)
+    with _lock:
+        cur = _indexes.get(key)
+        if cur is None or cur.version <= version:
+            _indexes[key] = cur = idx
+        return cur
+
+
+def apply_change(db: Session, version: int, *, added: Optional[LeaveRow] = None,
+                 removed_id: Optional[int] = None) -> None:
+    """
+    Yazma commit edildikten sonra çağrılır. İndeks bir önceki sürümdeyse değişiklik artımlı
+    uygulanır; değilse (arada başka yazma var) dokunulmaz, bir sonraki get_index yeniden kurar.
+    """
+    with _lock:
+        idx = _indexes.get(_key(db))
+        if idx is None or idx.version != version - 1:
+            return
+        if removed_id is not None:
+            idx.remove(removed_id)
+        if added is not None:
+            idx.add(added)
+        idx.version = version
+
+
+def reset() -> None:
+    with _lock:
+        _indexes.clear()
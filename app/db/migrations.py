@@ -1,13 +1,44 @@
 from __future__ import annotations
 
+import secrets
 from datetime import datetime
 from typing import Any, Optional
 
-from sqlalchemy.engine import Connection
+from sqlalchemy.engine import Connection, Engine
 from app.db.database import engine
 
 MIGRATION_KEY_MULTI_DEPT = "2025-09-02_multi_department_reports"
 MIGRATION_KEY_BACKFILL_USER_DEPTS = "2025-09-02_backfill_user_departments"
+MIGRATION_KEY_COMPOSITE_INDEXES = "2026-10-19_composite_indexes"
+MIGRATION_KEY_INCREMENTAL_VACUUM = "2026-10-19_auto_vacuum_incremental"
+MIGRATION_KEY_ORG_CLOSURE = "2026-10-19_org_closure_backfill"
+MIGRATION_KEY_NOTIFICATION_COUNTERS = "2026-10-19_notification_counters_backfill"
+MIGRATION_KEY_NOTIFICATION_ORPHANS = "2026-10-20_notification_orphans_cleanup"
+MIGRATION_KEY_DB_EPOCH = "2026-10-20_db_epoch"
+
+# data_versions'ta veritabanı başına bir kez yazılan rastgele dönem (repository.cached_read anahtarı)
+DB_EPOCH = "db_epoch"
+
+# models.py'deki Index tanımlarıyla aynı (yeni kurulumlarda create_all oluşturur)
+COMPOSITE_INDEXES = {
+    "ix_reports_dept_date": "CREATE INDEX IF NOT EXISTS ix_reports_dept_date ON reports (department_id, date)",
+    "ix_reports_user_date_id": "CREATE INDEX IF NOT EXISTS ix_reports_user_date_id ON reports (user_id, date, id)",
+    "ix_comments_report_created":
+        "CREATE INDEX IF NOT EXISTS ix_comments_report_created ON comments (report_id, created_at, id)",
+    "ix_todos_user_done_due": "CREATE INDEX IF NOT EXISTS ix_todos_user_done_due ON todos (user_id, is_done, due_date)",
+    "ix_leaves_user_range": "CREATE INDEX IF NOT EXISTS ix_leaves_user_range ON leaves (user_id, start_date, end_date)",
+}
+# Bileşik indekslerin öneki oldukları (veya yanlış plana yol açtıkları) için kaldırılan tek kolonlu indeksler
+LEGACY_INDEXES = {
+    "ix_reports_user_id": "CREATE INDEX IF NOT EXISTS ix_reports_user_id ON reports (user_id)",
+    "ix_reports_department_id": "CREATE INDEX IF NOT EXISTS ix_reports_department_id ON reports (department_id)",
+    "ix_comments_report_id": "CREATE INDEX IF NOT EXISTS ix_comments_report_id ON comments (report_id)",
+    "ix_todos_user_id": "CREATE INDEX IF NOT EXISTS ix_todos_user_id ON todos (user_id)",
+    "ix_leaves_user_id": "CREATE INDEX IF NOT EXISTS ix_leaves_user_id ON leaves (user_id)",
+    "ix_leaves_end_date": "CREATE INDEX IF NOT EXISTS ix_leaves_end_date ON leaves (end_date)",
+    # Aralık sorgusunda planlayıcı bunu seçip neredeyse tüm tabloyu geziyordu
+    "ix_leaves_start_date": "CREATE INDEX IF NOT EXISTS ix_leaves_start_date ON leaves (start_date)",
+}
 
 
 # ----------------- yardımcılar -----------------
@@ -156,13 +187,82 @@ def _backfill_user_departments(conn: Connection):
     )
 
 
+def _apply_composite_indexes(conn: Connection):
+    """
+    Sıcak sorgular için bileşik indeksleri kurar, önek olarak kapsanan tek kolonlu
+    indeksleri kaldırır ve planlayıcı istatistiklerini tazeler (tools.index_advisor).
+    """
+    for sql in COMPOSITE_INDEXES.values():
+        _exec(conn, sql)
+    for name in LEGACY_INDEXES:
+        _exec(conn, f"DROP INDEX IF EXISTS {name}")
+    _exec(conn, "ANALYZE")
+
+
+def _backfill_org_closure(conn: Connection):
+    """Mevcut kurulumlarda org_closure tablosunu (create_all ile boş kurulur) hiyerarşiden doldurur."""
+    if not _table_exists(conn, "org_closure"):
+        return
+    from app.db import org_closure  # modeller ve rbac'a bağımlı; yalnızca gerektiğinde yüklenir
+    org_closure.sync(conn)
+
+
+def _backfill_notification_counters(conn: Connection):
+    """Sayaç tablosundan önce yazılmış bildirimler için okunmamış sayaçlarını kurar."""
+    if not (_table_exists(conn, "notifications") and _table_exists(conn, "notification_counters")):
+        return
+    _exec(
+        conn,
+        """
+        INSERT OR REPLACE INTO notification_counters (user_id, unread, updated_at)
+        SELECT user_id, COUNT(*), CURRENT_TIMESTAMP
+        FROM notifications
+        WHERE read_at IS NULL AND status != 'cancelled'
+        GROUP BY user_id
+        """
+    )
+
+
+def _delete_notification_orphans(conn: Connection):
+    """Silinmiş kullanıcılardan kalan bildirim/sayaç satırları (id yeniden kullanılınca devralınıyordu)."""
+    for table in ("notifications", "notification_counters"):
+        if _table_exists(conn, table):
+            _exec(conn, f"DELETE FROM {table} WHERE user_id NOT IN (SELECT id FROM users)")
+
+
+def _write_db_epoch(conn: Connection):
+    """Bu veritabanı dosyasına özgü rastgele dönem; yeniden oluşturulan DB farklı bir dönem alır."""
+    if not _table_exists(conn, "data_versions"):
+        return
+    _exec(
+        conn,
+        "INSERT OR IGNORE INTO data_versions (name, version, updated_at) VALUES (:n, :v, :at)",
+        {"n": DB_EPOCH, "v": secrets.randbits(62) or 1, "at": str(datetime.utcnow())},
+    )
+
+
+def _apply_incremental_auto_vacuum(conn: Connection):
+    """
+    auto_vacuum=INCREMENTAL ister: boş sayfalar maintenance_service'in incremental_vacuum adımıyla
+    parça parça geri verilebilsin. Tablosu olan dosyada ayar ancak VACUUM ile etkinleşir; tam VACUUM
+    dosyayı kilitleyip baştan yazdığı için burada (her script çalışmasında, tüm işçilerde) yapılmaz.
+    Dönüşüm açıkça istenir: `python -m app.services.maintenance_service --convert-auto-vacuum`
+    (yalnızca sessiz saatlerde çalışır).
+    """
+    if conn.engine.url.get_backend_name() != "sqlite":
+        return
+    _exec(conn, "PRAGMA auto_vacuum=INCREMENTAL")
+
+
 # ----------------- dışa açık -----------------
 
-def safe_run_migrations():
+def safe_run_migrations(bind: Optional[Engine] = None):
     """
     Uygulama başlangıcında çağrılır. Adımlar idempotent çalışır.
+    bind: farklı bir veritabanı (ör. benchmark/üretilmiş veri) için motor.
     """
-    with engine.begin() as conn:
+    bind = bind or engine
+    with bind.begin() as conn:
         _ensure_schema_migrations_table(conn)
 
         if not _is_applied(conn, MIGRATION_KEY_MULTI_DEPT):
@@ -172,3 +272,27 @@ def safe_run_migrations():
         if not _is_applied(conn, MIGRATION_KEY_BACKFILL_USER_DEPTS):
             _backfill_user_departments(conn)
             _mark_applied(conn, MIGRATION_KEY_BACKFILL_USER_DEPTS)
+
+        if not _is_applied(conn, MIGRATION_KEY_COMPOSITE_INDEXES):
+            _apply_composite_indexes(conn)
+            _mark_applied(conn, MIGRATION_KEY_COMPOSITE_INDEXES)
+
+        if not _is_applied(conn, MIGRATION_KEY_ORG_CLOSURE):
+            _backfill_org_closure(conn)
+            _mark_applied(conn, MIGRATION_KEY_ORG_CLOSURE)
+
+        if not _is_applied(conn, MIGRATION_KEY_NOTIFICATION_COUNTERS):
+            _backfill_notification_counters(conn)
+            _mark_applied(conn, MIGRATION_KEY_NOTIFICATION_COUNTERS)
+
+        if not _is_applied(conn, MIGRATION_KEY_NOTIFICATION_ORPHANS):
+            _delete_notification_orphans(conn)
+            _mark_applied(conn, MIGRATION_KEY_NOTIFICATION_ORPHANS)
+
+        if not _is_applied(conn, MIGRATION_KEY_DB_EPOCH):
+            _write_db_epoch(conn)
+            _mark_applied(conn, MIGRATION_KEY_DB_EPOCH)
+
+        if not _is_applied(conn, MIGRATION_KEY_INCREMENTAL_VACUUM):
+            _apply_incremental_auto_vacuum(conn)
+            _mark_applied(conn, MIGRATION_KEY_INCREMENTAL_VACUUM)
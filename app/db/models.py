@@ -4,8 +4,8 @@ from datetime import datetime, date
 from typing import Optional, List
 
 from sqlalchemy import (
-    Integer, String, Text, DateTime, Date, Boolean,
-    ForeignKey, UniqueConstraint
+    Integer, String, Text, DateTime, Date, Boolean, LargeBinary, Float,
+    ForeignKey, UniqueConstraint, Index, text
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -132,11 +132,14 @@ class Report(Base):
     __tablename__ = "reports"
     __table_args__ = (
         UniqueConstraint("user_id", "department_id", "date", name="uq_report_user_dept_date"),
+        # Sıcak yollar: departman+gün listesi ve kullanıcı geçmişi (date desc, id desc)
+        Index("ix_reports_dept_date", "department_id", "date"),
+        Index("ix_reports_user_date_id", "user_id", "date", "id"),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), index=True, nullable=False)
-    department_id: Mapped[int] = mapped_column(ForeignKey("departments.id", ondelete="CASCADE"), index=True, nullable=False)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    department_id: Mapped[int] = mapped_column(ForeignKey("departments.id", ondelete="CASCADE"), nullable=False)
     date: Mapped[date] = mapped_column(Date, index=True, nullable=False)
 
     content: Mapped[str] = mapped_column(Text, nullable=False)
@@ -151,13 +154,44 @@ class Report(Base):
     comments: Mapped[List["Comment"]] = relationship(
         "Comment", back_populates="report", cascade="all, delete-orphan"
     )
+    revisions: Mapped[List["ReportRevision"]] = relationship(
+        "ReportRevision", back_populates="report", cascade="all, delete-orphan",
+        order_by="ReportRevision.rev_no",
+    )
+
+
+class ReportRevision(Base):
+    """
+    Append-only rapor sürüm geçmişi.
+    payload: is_snapshot ise zlib(tam metin), değilse zlib(json(önceki sürüme göre fark)).
+    """
+    __tablename__ = "report_revisions"
+    __table_args__ = (
+        UniqueConstraint("report_id", "rev_no", name="uq_report_revision_no"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    report_id: Mapped[int] = mapped_column(ForeignKey("reports.id", ondelete="CASCADE"), index=True, nullable=False)
+    rev_no: Mapped[int] = mapped_column(Integer, nullable=False)
+    is_snapshot: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    # Liste görünümünde blob'ları yüklememek için ertelenmiş kolon
+    payload: Mapped[bytes] = mapped_column(LargeBinary, nullable=False, deferred=True)
+    project: Mapped[Optional[str]] = mapped_column(String(120), nullable=True)
+    raw_size: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    stored_size: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+    report: Mapped["Report"] = relationship("Report", back_populates="revisions")
 
 
 class Comment(Base):
     __tablename__ = "comments"
+    __table_args__ = (
+        Index("ix_comments_report_created", "report_id", "created_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    report_id: Mapped[int] = mapped_column(ForeignKey("reports.id", ondelete="CASCADE"), index=True, nullable=False)
+    report_id: Mapped[int] = mapped_column(ForeignKey("reports.id", ondelete="CASCADE"), nullable=False)
     author_user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="SET NULL"), nullable=False)
     parent_comment_id: Mapped[Optional[int]] = mapped_column(
         ForeignKey("comments.id", ondelete="CASCADE"), nullable=True, index=True
@@ -177,15 +211,134 @@ class Comment(Base):
     )
 
 
+class ArchiveSegment(Base):
+    """
+    Soğuk arşive taşınmış yıllık rapor dosyaları (ATTACH ile okunur).
+    Okuma yolları yalnızca istenen aralık bu segmentlere uzanıyorsa arşive bakar.
+    """
+    __tablename__ = "archive_segments"
+
+    year: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    path: Mapped[str] = mapped_column(String(255), nullable=False)
+    min_date: Mapped[date] = mapped_column(Date, nullable=False)
+    max_date: Mapped[date] = mapped_column(Date, nullable=False)
+    report_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    comment_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+class MaintenanceRun(Base):
+    """Bakım çalıştırmaları (optimize/ANALYZE/incremental_vacuum/checkpoint) günlüğü."""
+    __tablename__ = "maintenance_runs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    started_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    seconds: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)
+    analyzed: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    reclaimed_bytes: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    steps_json: Mapped[str] = mapped_column(Text, nullable=False)  # [{"step","seconds",...}]
+    ok: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+
+
+class DataVersion(Base):
+    """
+    Tablo/alan başına sürüm sayacı. Yazmalar aynı işlemde sayacı artırır; süreç içi
+    önbellekler (ör. izin aralık indeksi) sürümü karşılaştırarak bayatlığı anlar.
+    """
+    __tablename__ = "data_versions"
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class Holiday(Base):
+    """Resmi/kurumsal tatil günü. half_day: yarım gün (ör. arife), iş günü hesabında 0.5 sayılır."""
+    __tablename__ = "holidays"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    day: Mapped[date] = mapped_column(Date, unique=True, nullable=False)
+    name: Mapped[str] = mapped_column(String(120), nullable=False)
+    half_day: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class OrgClosure(Base):
+    """
+    Organizasyon hiyerarşisinin kapanış (closure) tablosu: departman → takım → kullanıcı.
+    Her (ata, torun) çifti için en kısa yol uzunluğu tutulur; her düğüm kendisinin depth=0 atasıdır.
+    Kullanıcılar da ata olabilir: takım lideri liderlik ettiği takımın, dept_lead üyesi olduğu
+    departmanın atasıdır. Bakımı app.db.org_closure yapar (yönetici yazma fonksiyonları çağırır).
+    """
+    __tablename__ = "org_closure"
+    __table_args__ = (
+        Index("ix_org_closure_descendant", "descendant_type", "descendant_id", "ancestor_type", "ancestor_id"),
+    )
+
+    ancestor_type: Mapped[str] = mapped_column(String(10), primary_key=True)
+    ancestor_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    descendant_type: Mapped[str] = mapped_column(String(10), primary_key=True)
+    descendant_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    depth: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class Notification(Base):
+    """
+    Bildirim kutusu (outbox). Gönderici (app.services.digest_service) status='pending' satırları
+    iletir; status='inapp' yalnızca uygulama içi gelen kutusunda görünür (ör. yorum bildirimi).
+    dedupe_key aynı olayın ikinci kez yazılmasını engeller (yeniden hesaplama idempotenttir).
+    ref_date: bildirimin ait olduğu gün (ör. gün sonu özeti). read_at: uygulama içinde okunma zamanı.
+    """
+    __tablename__ = "notifications"
+    __table_args__ = (
+        Index("ix_notifications_kind_ref", "kind", "ref_date"),
+        Index("ix_notifications_pending", "id", sqlite_where=text("status = 'pending'")),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), index=True, nullable=False)
+    kind: Mapped[str] = mapped_column(String(40), nullable=False)
+    dedupe_key: Mapped[Optional[str]] = mapped_column(String(160), unique=True, nullable=True)
+    ref_date: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
+    title: Mapped[str] = mapped_column(String(200), nullable=False)
+    body: Mapped[str] = mapped_column(Text, nullable=False)
+    payload_json: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    status: Mapped[str] = mapped_column(String(16), default="pending", nullable=False)  # pending|sent|failed|cancelled|inapp
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    read_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+
+class NotificationCounter(Base):
+    """
+    Kullanıcı başına okunmamış bildirim sayacı (iptal edilmemiş ve read_at boş olanlar).
+    Bildirim yazan/okundu işaretleyen fonksiyonlar aynı işlemde günceller; kenar çubuğu rozeti
+    her rerun'da COUNT(*) yerine bu satırı PK ile okur.
+    """
+    __tablename__ = "notification_counters"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    unread: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+
 # ---------------------------
 # Todo
 # ---------------------------
 
 class Todo(Base):
     __tablename__ = "todos"
+    __table_args__ = (
+        Index("ix_todos_user_done_due", "user_id", "is_done", "due_date"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), index=True, nullable=False)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     title: Mapped[str] = mapped_column(String(200), nullable=False)
     description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     due_date: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
@@ -204,11 +357,14 @@ class Todo(Base):
 
 class Leave(Base):
     __tablename__ = "leaves"
+    __table_args__ = (
+        Index("ix_leaves_user_range", "user_id", "start_date", "end_date"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), index=True, nullable=False)
-    start_date: Mapped[date] = mapped_column(Date, index=True, nullable=False)
-    end_date: Mapped[date] = mapped_column(Date, index=True, nullable=False)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    start_date: Mapped[date] = mapped_column(Date, nullable=False)
+    end_date: Mapped[date] = mapped_column(Date, nullable=False)
     reason: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
 
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import Dict, Iterable, List, Set, Tuple
+
+from sqlalchemy import delete, insert, select, tuple_
+from sqlalchemy.engine import Connection
+
+from app.core.rbac import ROLE_DEPT_LEAD, ROLE_LEAD, normalize_role
+from app.db.models import Department, OrgClosure, Team, User, UserDepartment
+
+# Organizasyon kapanış tablosu (org_closure) bakımı.
+# Kenarlar (ata → çocuk):
+#   departman → takım          (teams.department_id)
+#   departman → kullanıcı      (user_departments)
+#   takım → kullanıcı          (users.team_id)
+#   kullanıcı → takım          (teams.lead_user_id veya takımındaki "lead" rolü)
+#   kullanıcı → departman      ("dept_lead" rolündeki kullanıcının departmanları)
+# Her düğümden genişlik öncelikli arama ile erişilen tüm düğümler en kısa derinlikleriyle yazılır.
+# Kullanıcı düğümleri yalnızca kök olduklarında genişletilir: bir liderin ekibindeki dept_lead'in
+# departmanı lidere miras kalmaz (yetki yukarı doğru taşınmaz).
+# Organizasyon küçük (birkaç bin düğüm) ve yönetici yazmaları seyrek olduğundan, yazmadan sonra
+# kapanış baştan hesaplanır ve tabloya yalnızca fark (eklenen/silinen/derinliği değişen) uygulanır.
+
+DEPT = "dept"
+TEAM = "team"
+USER = "user"
+VERSION_NAME = "org"
+
+Node = Tuple[str, int]
+Row = Tuple[str, int, str, int, int]  # ata tipi, ata id, torun tipi, torun id, derinlik
+
+
+def _edges(conn: Connection) -> Tuple[Set[Node], Dict[Node, List[Node]]]:
+    nodes: Set[Node] = set()
+    adj: Dict[Node, List[Node]] = {}
+
+    def add(a: Node, b: Node) -> None:
+        adj.setdefault(a, []).append(b)
+
+    nodes.update((DEPT, did) for (did,) in conn.execute(select(Department.id)))
+    teams = conn.execute(select(Team.id, Team.department_id, Team.lead_user_id)).all()
+    users = conn.execute(select(User.id, User.role, User.team_id)).all()
+    nodes.update((TEAM, t[0]) for t in teams)
+    nodes.update((USER, u[0]) for u in users)
+    for tid, dep_id, lead_id in teams:
+        if dep_id is not None:
+            add((DEPT, dep_id), (TEAM, tid))
+        if lead_id is not None:
+            add((USER, lead_id), (TEAM, tid))
+    roles: Dict[int, str] = {}
+    for uid, role, team_id in users:
+        roles[uid] = normalize_role(role)
+        if team_id is not None:
+            add((TEAM, team_id), (USER, uid))
+            if roles[uid] == ROLE_LEAD:
+                add((USER, uid), (TEAM, team_id))
+    for uid, did in conn.execute(select(UserDepartment.user_id, UserDepartment.department_id)):
+        add((DEPT, did), (USER, uid))
+        if roles.get(uid) == ROLE_DEPT_LEAD:
+            add((USER, uid), (DEPT, did))
+    return nodes, adj
+
+
+def compute(conn: Connection) -> Set[Row]:
+    """Güncel hiyerarşiden beklenen kapanış satırları."""
+    nodes, adj = _edges(conn)
+    out: Set[Row] = set()
+    for root in nodes:
+        seen = {root: 0}
+        queue = deque([root])
+        while queue:
+            node = queue.popleft()
+            if node[0] == USER and node != root:
+                continue
+            for child in adj.get(node, ()):
+                if child not in seen and child in nodes:  # silinmiş düğüme işaret eden kenar atlanır
+                    seen[child] = seen[node] + 1
+                    queue.append(child)
+        out.update((root[0], root[1], n[0], n[1], d) for n, d in seen.items())
+    return out
+
+
+def sync(conn: Connection) -> Tuple[int, int]:
+    """
+    Tabloyu hiyerarşiyle eşitler (çağıranın işlemi içinde; commit çağırana aittir).
+    Dönüş: (eklenen, silinen) satır sayısı. Derinliği değişen satır hem silinir hem eklenir.
+    """
+    want = compute(conn)
+    have = set(map(tuple, conn.execute(select(
+        OrgClosure.ancestor_type, OrgClosure.ancestor_id,
+        OrgClosure.descendant_type, OrgClosure.descendant_id, OrgClosure.depth,
+    ))))
+    removed = have - want
+    added = want - have
+    if removed:
+        key = tuple_(OrgClosure.ancestor_type, OrgClosure.ancestor_id,
+                     OrgClosure.descendant_type, OrgClosure.descendant_id)
+        for chunk in _chunks([r[:4] for r in removed]):
+            conn.execute(delete(OrgClosure).where(key.in_(chunk)))
+    if added:
+        conn.execute(insert(OrgClosure), [
+            {"ancestor_type": a, "ancestor_id": ai, "descendant_type": d, "descendant_id": di, "depth": dep}
+            for a, ai, d, di, dep in added
+        ])
+    return len(added), len(removed)
+
+
+def _chunks(items: List, n: int = 200) -> Iterable[List]:
+    for i in range(0, len(items), n):
+        yield items[i:i + n]
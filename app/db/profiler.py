@@ -0,0 +1,123 @@
+from __future__ import annotations
+import re, threading, time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Aynı "şekle" sahip ifade bir çalıştırmada bu kadar tekrarlanırsa N+1 şüphesi
+N_PLUS_ONE_THRESHOLD = 3
+
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_STR_LIT = re.compile(r"'(?:[^']|'')*'")
+_NUM_LIT = re.compile(r"\b\d+(?:\.\d+)?\b")
+_WS = re.compile(r"\s+")
+
+
+def statement_shape(sql: str) -> str:
+    """Parametre/literal farklarını atarak ifadenin şeklini çıkarır (IN (?, ?, ?) -> IN (?…))."""
+    s = _WS.sub(" ", sql).strip()
+    s = _STR_LIT.sub("?", s)
+    s = _NUM_LIT.sub("?", s)
+    return _IN_LIST.sub("(?…)", s)
+
+
+class QueryProfile:
+    """Tek bir Streamlit yeniden çalıştırmasının (rerun) sorgu özeti."""
+
+    __slots__ = ("page", "started_at", "count", "total_s", "slowest_s", "slowest_sql", "shapes", "_t0", "wall_s")
+
+    def __init__(self, page: str):
+        self.page = page
+        self.started_at = datetime.now()
+        self.count = 0
+        self.total_s = 0.0
+        self.slowest_s = 0.0
+        self.slowest_sql = ""
+        self.shapes: Dict[str, List[float]] = {}  # shape -> [adet, toplam_sn]
+        self._t0 = time.perf_counter()
+        self.wall_s: Optional[float] = None
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.total_s += duration
+        if duration > self.slowest_s:
+            self.slowest_s = duration
+            self.slowest_sql = statement
+        acc = self.shapes.setdefault(statement_shape(statement), [0, 0.0])
+        acc[0] += 1
+        acc[1] += duration
+
+    def finish(self) -> "QueryProfile":
+        if self.wall_s is None:
+            self.wall_s = time.perf_counter() - self._t0
+        return self
+
+    def n_plus_one(self) -> List[dict]:
+        return [
+            {"shape": k, "count": int(v[0]), "total_ms": round(v[1] * 1000, 3)}
+            for k, v in sorted(self.shapes.items(), key=lambda kv: -kv[1][0])
+            if v[0] >= N_PLUS_ONE_THRESHOLD
+        ]
+
+    def to_dict(self) -> dict:
+        return {
+            "page": self.page,
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "wall_ms": round(self.wall_s * 1000, 3) if self.wall_s is not None else None,
+            "query_count": self.count,
+            "total_ms": round(self.total_s * 1000, 3),
+            "slowest_ms": round(self.slowest_s * 1000, 3),
+            "slowest_sql": self.slowest_sql,
+            "statements": [
+                {"shape": k, "count": int(v[0]), "total_ms": round(v[1] * 1000, 3)}
+                for k, v in sorted(self.shapes.items(), key=lambda kv: -kv[1][1])
+            ],
+            "n_plus_one": self.n_plus_one(),
+        }
+
+
+# Streamlit her rerun'ı kendi script iş parçacığında çalıştırır; sorgular o iş
+# parçacığının aktif profiline yazılır. Diğer iş parçacıkları (arka plan işleri) sayılmaz.
+_local = threading.local()
+_hooks: List[Callable[[str, object, float, object], None]] = []
+
+
+def activate(profile: Optional[QueryProfile]) -> None:
+    _local.profile = profile
+
+def current() -> Optional[QueryProfile]:
+    return getattr(_local, "profile", None)
+
+def add_query_hook(fn: Callable[[str, object, float, object], None]) -> None:
+    """Her sorgudan sonra fn(statement, parameters, duration_s, connection) çağrılır."""
+    if fn not in _hooks:
+        _hooks.append(fn)
+
+
+def install(engine: Engine) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("qprof_t0", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        stack = conn.info.get("qprof_t0")
+        if not stack:
+            return
+        duration = time.perf_counter() - stack.pop()
+        prof = current()
+        if prof is not None:
+            prof.record(statement, duration)
+        for fn in _hooks:
+            try:
+                fn(statement, parameters, duration, conn)
+            except Exception:
+                pass
+
+    @event.listens_for(engine, "handle_error")
+    def _error(ctx):
+        conn = ctx.connection
+        if conn is not None and conn.info.get("qprof_t0"):
+            conn.info["qprof_t0"].pop()
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Optional
+
+# Listeleme sayfaları için salt-okunur satır tipleri.
+# ORM nesnelerinin aksine kimlik haritasına girmez, instrumentation/lazy-load taşımaz;
+# __slots__ sayesinde satır başına bellek de küçüktür. repository.*_rows fonksiyonları döndürür.
+
+
+@dataclass(frozen=True, slots=True)
+class DepartmentRow:
+    id: int
+    name: str
+
+
+@dataclass(frozen=True, slots=True)
+class TeamRow:
+    id: int
+    name: str
+    department_id: Optional[int]
+    lead_user_id: Optional[int]
+
+
+@dataclass(frozen=True, slots=True)
+class UserRow:
+    id: int
+    username: str
+    full_name: Optional[str]
+    role: str
+    team_id: Optional[int]
+
+    @property
+    def display_name(self) -> str:
+        return self.full_name or self.username
+
+
+@dataclass(frozen=True, slots=True)
+class ReportRow:
+    id: int
+    user_id: int
+    department_id: int
+    date: date
+    project: Optional[str]
+    content: str
+    tags_json: Optional[str]
+    created_at: datetime
+    updated_at: datetime
+
+
+@dataclass(frozen=True, slots=True)
+class CommentRow:
+    id: int
+    report_id: int
+    author_user_id: int
+    parent_comment_id: Optional[int]
+    content: str
+    created_at: datetime
+
+
+@dataclass(frozen=True, slots=True)
+class LeaveRow:
+    id: int
+    user_id: int
+    start_date: date
+    end_date: date
+
+    @property
+    def days(self) -> int:
+        return (self.end_date - self.start_date).days + 1
+
+
+@dataclass(frozen=True, slots=True)
+class LeaveAdminRow:
+    id: int
+    user_id: int
+    owner: str
+    department_names: Optional[str]
+    start_date: date
+    end_date: date
+    reason: Optional[str]
+
+    @property
+    def days(self) -> int:
+        return (self.end_date - self.start_date).days + 1
+
+
+@dataclass(frozen=True, slots=True)
+class NotificationRow:
+    id: int
+    kind: str
+    title: str
+    body: str
+    payload_json: Optional[str]
+    ref_date: Optional[date]
+    created_at: datetime
+    read_at: Optional[datetime]
@@ -2,20 +2,105 @@ from __future__ import annotations
 
 import json
 from datetime import date, datetime
-from typing import Optional, List, Dict, Tuple
+from typing import Callable, Collection, Optional, List, Dict, Sequence, Tuple, TypeVar
 
-from sqlalchemy import select, or_, and_, func
+from sqlalchemy import select, update, delete, or_, and_, func, true, false, union, literal
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm import Session, aliased, selectinload
 
 from app.db.models import (
     User, Department, Team,
     UserDepartment,
-    Report, Comment,
-    Todo, Leave,
+    Report, Comment, ReportRevision,
+    Todo, Leave, DataVersion, Holiday, OrgClosure, Notification, NotificationCounter,
+)
+from app.db import leave_index, org_closure
+from app.db.migrations import DB_EPOCH
+from app.db.read_models import (
+    CommentRow, DepartmentRow, LeaveAdminRow, LeaveRow, NotificationRow, ReportRow, TeamRow, UserRow,
+)
+from app.core.config import REVISION_SNAPSHOT_EVERY
+from app.core import cache, metrics
+from app.db.archive import (
+    archived_years_for_range, select_archived_comments, select_archived_reports, select_archived_revisions,
 )
 from app.core.security import hash_password, verify_password
 from app.core.rbac import ROLE_LEAD
+from app.utils.delta import encode_snapshot, decode_snapshot, encode_delta, decode_delta
+
+
+# --------------------------------
+# DATA VERSIONS
+# --------------------------------
+
+def bump_data_version(db: Session, *, name: str) -> int:
+    """Sürüm sayacını çağıranın işleminde artırır (commit çağırana aittir); yeni sürümü döner."""
+    stmt = (
+        sqlite_insert(DataVersion)
+        .values(name=name, version=1, updated_at=datetime.utcnow())
+        .on_conflict_do_update(
+            index_elements=[DataVersion.name],
+            set_={"version": DataVersion.version + 1, "updated_at": datetime.utcnow()},
+        )
+        .returning(DataVersion.version)
+    )
+    db.info.get(_VERSIONS_INFO, {}).pop(name, None)
+    return db.execute(stmt).scalar_one()
+
+
+# Okunan sürümler oturum ömrü boyunca db.info'da tutulur (sayfa/geri çağrı başına kısa oturumlar);
+# aynı oturumdaki bump_data_version ilgili girdiyi düşürür. Değer: (sürüm, son artırma zamanı).
+_VERSIONS_INFO = "data_versions"
+T = TypeVar("T")
+
+
+def _version_stamps(db: Session, names: Sequence[str]) -> Dict[str, Tuple[int, Optional[datetime]]]:
+    memo = db.info.setdefault(_VERSIONS_INFO, {})
+    missing = [n for n in names if n not in memo]
+    if missing and DB_EPOCH not in memo:
+        missing.append(DB_EPOCH)  # cached_read'in ayrı bir sorgu yapmaması için aynı okumada
+    if missing:
+        got = {name: (v, at) for name, v, at in db.execute(
+            select(DataVersion.name, DataVersion.version, DataVersion.updated_at)
+            .where(DataVersion.name.in_(missing))
+        )}
+        for n in missing:
+            memo[n] = got.get(n, (0, None))
+    return {n: memo[n] for n in names}
+
+
+def get_data_versions(db: Session, *, names: Sequence[str]) -> Dict[str, int]:
+    return {n: v for n, (v, _at) in _version_stamps(db, names).items()}
+
+
+def get_data_version(db: Session, *, name: str) -> int:
+    return get_data_versions(db, names=[name])[name]
+
+
+def cached_read(db: Session, *, cache_name: str, versions: Sequence[str], key: tuple, load: Callable[[], T]) -> T:
+    """
+    Sürüm anahtarlı önbellekten okur (app.core.cache). Anahtar; veritabanı dönemi (DB_EPOCH, kurulumda
+    bir kez rastgele yazılır) + ilgili sayaçların değeri ve son artırma zamanıdır: herhangi bir işçideki
+    yazma sayacı artırdığında tüm işçiler yeni anahtara geçer. Dönem, aynı yolda yeniden oluşturulan
+    veritabanının sıfırdan başlayan sayaçlarını ayırır; zaman damgası, yedekten dönülüp aynı sürüm
+    numarasına yeniden ulaşıldığında eski girdiyle çakışmayı önler. Dönemi olmayan (migration
+    çalışmamış) veritabanında önbellek kullanılmaz.
+    """
+    stamps = _version_stamps(db, [DB_EPOCH, *versions])
+    epoch = stamps.pop(DB_EPOCH)[0]
+    if not epoch:
+        return load()
+    parts = ",".join(f"{n}={v}@{at.isoformat() if at else '-'}" for n, (v, at) in stamps.items())
+    full = "|".join([str(db.get_bind().url), f"epoch={epoch}", parts, repr(key)])
+    return cache.get_or_load(cache_name, full, load)
+
+
+def _sync_org(db: Session) -> None:
+    """Hiyerarşiyi değiştiren yazmalardan sonra, commit'ten önce: kapanış tablosu aynı işlemde eşitlenir."""
+    db.flush()
+    org_closure.sync(db.connection())
+    bump_data_version(db, name=org_closure.VERSION_NAME)
 
 
 # --------------------------------
@@ -61,6 +146,7 @@ def create_user(
     if department_ids:
         for did in set(department_ids):
             db.add(UserDepartment(user_id=u.id, department_id=did))
+    _sync_org(db)
     db.commit()
     db.refresh(u)
     return u
@@ -97,6 +183,7 @@ def update_user_role_team(
         raise ValueError("User not found")
     u.role = role
     u.team_id = team_id
+    _sync_org(db)
     db.commit()
 
 
@@ -124,6 +211,7 @@ def set_user_departments(db: Session, *, user_id: int, department_ids: List[int]
                 UserDepartment.department_id == did
             ).delete(synchronize_session=False)
 
+    _sync_org(db)
     db.commit()
 
 
@@ -143,10 +231,14 @@ def list_departments_for_user(db: Session, *, user_id: int) -> List[Department]:
     return list(db.execute(stmt).scalars().all())
 
 
-def list_user_ids_in_department(db: Session, *, department_id: int) -> List[int]:
-    return list(db.execute(
-        select(UserDepartment.user_id).where(UserDepartment.department_id == department_id)
-    ).scalars().all())
+def list_user_ids_in_department(
+    db: Session, *, department_id: int, visible_department_ids: Optional[Collection[int]] = None
+) -> List[int]:
+    stmt = select(UserDepartment.user_id).where(
+        UserDepartment.department_id == department_id,
+        _visible(UserDepartment.department_id, visible_department_ids),
+    )
+    return list(db.execute(stmt).scalars().all())
 
 
 def delete_user(db: Session, *, user_id: int) -> None:
@@ -157,14 +249,21 @@ def delete_user(db: Session, *, user_id: int) -> None:
     if not u:
         raise ValueError("User not found")
     db.delete(u)
+    # SQLite'ta foreign_keys kapalı ve User'da ilişki yok: ondelete=CASCADE çalışmaz. Aynı id yeniden
+    # verildiğinde yeni kullanıcı eski bildirimleri/rozeti devralmasın diye açıkça silinir.
+    db.execute(delete(Notification).where(Notification.user_id == user_id))
+    db.execute(delete(NotificationCounter).where(NotificationCounter.user_id == user_id))
+    # Kullanıcının izinleri de silinir (CASCADE): aralık indeksi yeniden kurulsun
+    bump_data_version(db, name=leave_index.VERSION_NAME)
+    _sync_org(db)
     db.commit()
 
 
 def authenticate_user(db: Session, *, username: str, password: str) -> Optional[User]:
     u = get_user_by_username(db, username)
-    if not u:
-        return None
-    return u if verify_password(password, u.password_hash) else None
+    ok = u is not None and verify_password(password, u.password_hash)
+    metrics.LOGINS.inc(result="ok" if ok else "fail")
+    return u if ok else None
 
 
 def list_users_simple(db: Session) -> List[User]:
@@ -206,6 +305,7 @@ def list_departments(db: Session) -> List[Department]:
 def create_department(db: Session, *, name: str) -> Department:
     d = Department(name=name)
     db.add(d)
+    _sync_org(db)
     db.commit()
     db.refresh(d)
     return d
@@ -221,11 +321,101 @@ def create_team(
 ) -> Team:
     t = Team(name=name, department_id=department_id, lead_user_id=lead_user_id)
     db.add(t)
+    _sync_org(db)
     db.commit()
     db.refresh(t)
     return t
 
 
+# --------------------------------
+# ORG HIERARCHY (org_closure)
+# --------------------------------
+# "Altımdaki herkes" sorguları kapanış tablosuna tek JOIN'dir: ata = kullanıcı, torun = kullanıcı.
+# Lider → takım → üyeler, dept_lead → departman → (takımlar →) üyeler yolları tabloda hazırdır.
+
+def _under_user(user_id: int, descendant_type: str):
+    return and_(
+        OrgClosure.ancestor_type == org_closure.USER,
+        OrgClosure.ancestor_id == user_id,
+        OrgClosure.descendant_type == descendant_type,
+    )
+
+
+def list_teams_for_lead(db: Session, *, lead_user_id: int) -> List[Team]:
+    """Kullanıcının liderlik ettiği takımlar (teams.lead_user_id veya takımındaki lead rolü)."""
+    stmt = (
+        select(Team)
+        .join(OrgClosure, OrgClosure.descendant_id == Team.id)
+        .where(_under_user(lead_user_id, org_closure.TEAM), OrgClosure.depth == 1)
+        .order_by(Team.name)
+    )
+    return list(db.execute(stmt).scalars().all())
+
+
+def list_user_ids_under(db: Session, *, user_id: int, include_self: bool = False) -> List[int]:
+    """Kullanıcının hiyerarşide altındaki kullanıcı id'leri."""
+    stmt = select(OrgClosure.descendant_id).where(_under_user(user_id, org_closure.USER))
+    if not include_self:
+        stmt = stmt.where(OrgClosure.descendant_id != user_id)
+    return list(db.execute(stmt.order_by(OrgClosure.descendant_id)).scalars().all())
+
+
+def get_user_scope(db: Session, *, user_id: int) -> Tuple[Optional[str], List[int], List[int], List[int]]:
+    """
+    ACL girdisi: (güncel rol, okunabilir departmanlar, yönetilen takımlar, yönetilen departmanlar).
+    Okunabilir departmanlar: üyelikler, yönetilen departmanlar, yönetilen takımların ve kendi takımının
+    departmanı. Yönetilenler org_closure'da kullanıcının altındaki takım/departmanlardır.
+    Rol yoksa kullanıcı silinmiştir. İki sorgu: kullanıcı satırı + etiketli UNION.
+    """
+    me = db.execute(select(User.role, User.team_id).where(User.id == user_id)).one_or_none()
+    if me is None:
+        return None, [], [], []
+    role, own_team = me
+    managed = select(OrgClosure.descendant_id).where(_under_user(user_id, org_closure.TEAM))
+    team_filter = or_(Team.id.in_(managed), Team.id == own_team) if own_team else Team.id.in_(managed)
+    stmt = union(
+        select(literal("mteam").label("kind"), Team.id.label("id")).where(Team.id.in_(managed)),
+        select(literal("dept"), Team.department_id).where(team_filter, Team.department_id.is_not(None)),
+        select(literal("dept"), UserDepartment.department_id).where(UserDepartment.user_id == user_id),
+        select(literal("mdept"), OrgClosure.descendant_id).where(_under_user(user_id, org_closure.DEPT)),
+    )
+    department_ids: set = set()
+    managed_team_ids: List[int] = []
+    managed_department_ids: List[int] = []
+    for kind, id_ in db.execute(stmt):
+        if kind == "mteam":
+            managed_team_ids.append(id_)
+            continue
+        department_ids.add(id_)
+        if kind == "mdept":
+            managed_department_ids.append(id_)
+    return role, sorted(department_ids), sorted(managed_team_ids), sorted(managed_department_ids)
+
+
+def list_reports_under_user(
+    db: Session, *, user_id: int, start: date, end: date, include_self: bool = False
+) -> List[ReportRow]:
+    """
+    Kullanıcının altındaki herkesin [start, end] raporları: org_closure (PK öneki) → reports
+    (ix_reports_user_date_id) tek JOIN. Arşive uzanan aralıklarda arşiv segmentleri de okunur.
+    """
+    stmt = (
+        select(*_REPORT_ROW_COLS)
+        .join(OrgClosure, OrgClosure.descendant_id == Report.user_id)
+        .where(_under_user(user_id, org_closure.USER), Report.date >= start, Report.date <= end)
+        .order_by(Report.date.desc(), Report.id.desc())
+    )
+    if not include_self:
+        stmt = stmt.where(OrgClosure.descendant_id != user_id)
+    out = _rows(db, stmt, ReportRow)
+    years = archived_years_for_range(db, start=start, end=end)
+    if years:
+        user_ids = list_user_ids_under(db, user_id=user_id, include_self=include_self)
+        archived = select_archived_reports(db.get_bind(), years=years, start=start, end=end, user_ids=user_ids)
+        out = _merge_archived(out, [_report_row(r) for r in archived])
+    return out
+
+
 # --------------------------------
 # REPORTS
 # --------------------------------
@@ -254,11 +444,13 @@ def upsert_report(
     """
     r = get_report_by_user_dept_date(db, user_id=user_id, department_id=department_id, d=d)
     if r:
+        _record_revision(db, r, content=content, project=project)
         r.content = content
         r.project = project
         r.tags_json = tags_json
         r.updated_at = datetime.utcnow()
         db.commit()
+        metrics.REPORT_SAVES.inc(kind="update")
         db.refresh(r)
         return r
 
@@ -272,6 +464,7 @@ def upsert_report(
     )
     db.add(r)
     db.commit()
+    metrics.REPORT_SAVES.inc(kind="new")
     db.refresh(r)
     return r
 
@@ -301,6 +494,7 @@ def create_report_revision(
     db.add(r)
     try:
         db.commit()
+        metrics.REPORT_SAVES.inc(kind="new")
         db.refresh(r)
         return r
     except IntegrityError as e:
@@ -315,16 +509,138 @@ def create_report_revision(
                 t = {}
             t["edited"] = True
             t["edited_at"] = edited_at_iso
+            _record_revision(db, existing, content=content, project=project)
             existing.content = content
             existing.project = project
             existing.tags_json = json.dumps(t, ensure_ascii=False)
             existing.updated_at = datetime.utcnow()
             db.commit()
+            metrics.REPORT_SAVES.inc(kind="update")
             db.refresh(existing)
             return existing
         raise
 
 
+# --------------------------------
+# REPORT REVISIONS (append-only geçmiş)
+# --------------------------------
+
+def _add_revision(db: Session, *, report_id: int, rev_no: int, prev: Optional[str], content: str,
+                  project: Optional[str]) -> None:
+    is_snapshot = prev is None or (rev_no - 1) % REVISION_SNAPSHOT_EVERY == 0
+    payload = encode_snapshot(content) if is_snapshot else encode_delta(prev, content)
+    db.add(ReportRevision(
+        report_id=report_id,
+        rev_no=rev_no,
+        is_snapshot=is_snapshot,
+        payload=payload,
+        project=project,
+        raw_size=len(content.encode("utf-8")),
+        stored_size=len(payload),
+    ))
+
+
+def _record_revision(db: Session, r: Report, *, content: str, project: Optional[str]) -> None:
+    """
+    Rapor üzerine yazılmadan önce çağrılır. r.content her zaman son sürümdür; bu yüzden
+    yazma sırasında geçmişi yeniden kurmaya gerek yoktur. İlk düzenlemede özgün metin
+    rev 1 (snapshot) olarak saklanır. Commit çağıranda.
+    """
+    if r.content == content and r.project == project:
+        return
+    last_no = db.execute(
+        select(func.max(ReportRevision.rev_no)).where(ReportRevision.report_id == r.id)
+    ).scalar()
+    if last_no is None:
+        _add_revision(db, report_id=r.id, rev_no=1, prev=None, content=r.content, project=r.project)
+        last_no = 1
+    _add_revision(db, report_id=r.id, rev_no=last_no + 1, prev=r.content, content=content, project=project)
+
+
+def _archived_revisions(db: Session, *, report_id: int, d: Optional[date]) -> List[ReportRevision]:
+    """Rapor tarihi (d) arşive düşüyorsa arşivdeki sürümler (rev_no desc); aksi halde boş liste."""
+    if d is None:
+        return []
+    years = archived_years_for_range(db, start=d, end=d)
+    return select_archived_revisions(db.get_bind(), years=years, report_id=report_id) if years else []
+
+
+def list_report_revisions(db: Session, *, report_id: int, d: Optional[date] = None) -> List[ReportRevision]:
+    """
+    Sürüm listesi (payload ertelenmiş; içerik yüklenmez). d rapor tarihidir; verilirse
+    arşivlenmiş raporun sürümleri arşiv dosyasından okunur.
+    """
+    stmt = (
+        select(ReportRevision)
+        .where(ReportRevision.report_id == report_id)
+        .order_by(ReportRevision.rev_no.desc())
+    )
+    live = list(db.execute(stmt).scalars().all())
+    archived = _archived_revisions(db, report_id=report_id, d=d)
+    if not archived:
+        return live
+    nos = {x.rev_no for x in live}
+    return sorted(live + [x for x in archived if x.rev_no not in nos], key=lambda x: x.rev_no, reverse=True)
+
+
+def get_report_revision_content(
+    db: Session, *, report_id: int, rev_no: int, d: Optional[date] = None
+) -> Optional[str]:
+    """
+    İstenen sürümü talep anında kurar: en yakın önceki snapshot'tan başlayıp
+    farkları sırayla uygular (en fazla REVISION_SNAPSHOT_EVERY adım).
+    d verilirse ve rapor arşivlenmişse sürümler arşiv dosyasından kurulur.
+    """
+    archived = _archived_revisions(db, report_id=report_id, d=d)
+    if archived:
+        chain: list = []
+        for row in archived:  # rev_no desc: istenen sürümden geriye, ilk snapshot'a kadar
+            if row.rev_no > rev_no:
+                continue
+            chain.append(row)
+            if row.is_snapshot:
+                break
+        if not chain or chain[0].rev_no != rev_no or not chain[-1].is_snapshot:
+            return None
+        return _apply_revisions(reversed(chain))
+
+    snap_no = db.execute(
+        select(func.max(ReportRevision.rev_no)).where(
+            ReportRevision.report_id == report_id,
+            ReportRevision.is_snapshot.is_(True),
+            ReportRevision.rev_no <= rev_no,
+        )
+    ).scalar()
+    if snap_no is None:
+        return None
+    rows = db.execute(
+        select(ReportRevision.rev_no, ReportRevision.is_snapshot, ReportRevision.payload)
+        .where(
+            ReportRevision.report_id == report_id,
+            ReportRevision.rev_no >= snap_no,
+            ReportRevision.rev_no <= rev_no,
+        )
+        .order_by(ReportRevision.rev_no.asc())
+    ).all()
+    if not rows or rows[-1].rev_no != rev_no:
+        return None
+    return _apply_revisions(rows)
+
+
+def _apply_revisions(rows) -> Optional[str]:
+    """Snapshot ile başlayan, rev_no artan sıralı sürümleri uygular."""
+    text: Optional[str] = None
+    for row in rows:
+        text = decode_snapshot(row.payload) if row.is_snapshot else decode_delta(text or "", row.payload)
+    return text
+
+
+def _merge_archived(live: list, archived: list) -> list:
+    if not archived:
+        return live
+    return sorted(live + archived, key=lambda r: (r.date, r.id), reverse=True)
+
+
 def list_user_reports(
     db: Session, *, user_id: int, start: date, end: date, q: Optional[str] = None, department_id: Optional[int] = None
 ) -> List[Report]:
@@ -338,7 +654,15 @@ def list_user_reports(
     if q:
         like = f"%{q.strip()}%"
         stmt = stmt.where(or_(Report.content.ilike(like), Report.project.ilike(like)))
-    return list(db.execute(stmt).scalars().all())
+    out = list(db.execute(stmt).scalars().all())
+    # Soğuk arşiv: yalnızca aralık arşivlenmiş yıllara uzanıyorsa
+    years = archived_years_for_range(db, start=start, end=end)
+    if years:
+        out = _merge_archived(out, select_archived_reports(
+            db.get_bind(), years=years, start=start, end=end,
+            user_ids=[user_id], department_id=department_id, q=q,
+        ))
+    return out
 
 
 def list_reports_for_department(
@@ -369,7 +693,13 @@ def list_reports_for_users(
     if q:
         like = f"%{q.strip()}%"
         stmt = stmt.where(or_(Report.content.ilike(like), Report.project.ilike(like)))
-    return list(db.execute(stmt).scalars().all())
+    out = list(db.execute(stmt).scalars().all())
+    years = archived_years_for_range(db, start=start, end=end)
+    if years:
+        out = _merge_archived(out, select_archived_reports(
+            db.get_bind(), years=years, start=start, end=end, user_ids=user_ids, q=q,
+        ))
+    return out
 
 
 def missing_reports_for_department_and_date(
@@ -415,11 +745,38 @@ def add_comment(
         parent_comment_id=parent_comment_id,
     )
     db.add(c)
+    db.flush()
+    _notify_comment(db, c)
     db.commit()
+    metrics.COMMENT_ADDS.inc()
     db.refresh(c)
     return c
 
 
+def _notify_comment(db: Session, c: Comment) -> None:
+    """Üst seviye yorum → rapor sahibine, yanıt → yanıtlanan yorumun yazarına uygulama içi bildirim."""
+    r = db.get(Report, c.report_id)
+    if r is None:
+        return
+    if c.parent_comment_id:
+        parent = db.get(Comment, c.parent_comment_id)
+        recipient = parent.author_user_id if parent else None
+        what = "yorumunuza yanıt verdi"
+    else:
+        recipient = r.user_id
+        what = "raporunuza yorum yaptı"
+    if recipient is None or recipient == c.author_user_id:
+        return
+    author = db.get(User, c.author_user_id)
+    who = (author.full_name or author.username) if author else f"#{c.author_user_id}"
+    text = c.content if len(c.content) <= 280 else c.content[:277] + "…"
+    notify(
+        db, user_id=recipient, kind="comment", title=f"{who} {what} ({r.date})", body=text,
+        payload={"report_id": r.id, "comment_id": c.id, "department_id": r.department_id},
+        ref_date=r.date,
+    )
+
+
 def list_comments_tree_by_report_ids(
     db: Session, *, report_ids: List[int]
 ) -> Dict[int, List[Tuple[Comment, int]]]:
@@ -432,21 +789,25 @@ def list_comments_tree_by_report_ids(
         .order_by(Comment.created_at.asc(), Comment.id.asc())
     )
     all_comments = list(db.execute(stmt).scalars().all())
+    return _thread_comments(all_comments)
 
-    per_report: Dict[int, List[Comment]] = {}
-    for c in all_comments:
+
+def _thread_comments(items) -> Dict[int, List[Tuple[object, int]]]:
+    """Yorumları rapor başına (yorum, derinlik) sırasına dizer; Comment ve CommentRow ile çalışır."""
+    per_report: Dict[int, list] = {}
+    for c in items:
         per_report.setdefault(c.report_id, []).append(c)
 
-    out: Dict[int, List[Tuple[Comment, int]]] = {}
+    out: Dict[int, List[Tuple[object, int]]] = {}
 
     for rid, arr in per_report.items():
-        children: Dict[Optional[int], List[Comment]] = {}
+        children: Dict[Optional[int], list] = {}
         for c in arr:
             children.setdefault(c.parent_comment_id, []).append(c)
         for k in children:
             children[k].sort(key=lambda x: (x.created_at, x.id))
 
-        ordered: List[Tuple[Comment, int]] = []
+        ordered: List[Tuple[object, int]] = []
 
         def walk(parent_id: Optional[int], depth: int):
             for c in children.get(parent_id, []):
@@ -459,6 +820,187 @@ def list_comments_tree_by_report_ids(
     return out
 
 
+# --------------------------------
+# READ MODELS (listeleme sayfaları)
+# --------------------------------
+# ORM nesnesi yerine yalnızca gereken kolonlar Core sorgusuyla okunur ve __slots__'lu satır
+# tiplerine (app.db.read_models) dönüştürülür: kimlik haritası, instrumentation ve ilişki
+# yükleme maliyeti yoktur. Dönen satırlar salt-okunurdur; yazma için ORM fonksiyonları kullanılır.
+
+_REPORT_ROW_COLS = (
+    Report.id, Report.user_id, Report.department_id, Report.date, Report.project,
+    Report.content, Report.tags_json, Report.created_at, Report.updated_at,
+)
+_USER_ROW_COLS = (User.id, User.username, User.full_name, User.role, User.team_id)
+_COMMENT_ROW_COLS = (
+    Comment.id, Comment.report_id, Comment.author_user_id, Comment.parent_comment_id,
+    Comment.content, Comment.created_at,
+)
+
+
+def _visible(column, ids: Optional[Collection[int]]):
+    """
+    ACL kapsamı SQL koşulu olarak (app.core.acl): None = kısıtsız, aksi halde column IN (...).
+    Boş kapsam hiçbir satır döndürmez.
+    """
+    if ids is None:
+        return true()
+    return column.in_(sorted(ids)) if ids else false()
+
+
+def _rows(db: Session, stmt, row_type) -> list:
+    return [row_type(*t) for t in db.connection().execute(stmt).tuples()]
+
+
+def _report_row(r: Report) -> ReportRow:
+    return ReportRow(r.id, r.user_id, r.department_id, r.date, r.project, r.content, r.tags_json,
+                     r.created_at, r.updated_at)
+
+
+# Dizin listeleri (departman/takım/kullanıcı) "directory" önbelleğinden okunur. Bu tablolara yapılan
+# tüm yazmalar _sync_org üzerinden data_versions['org'] sayacını artırır.
+_DIRECTORY_CACHE = "directory"
+_DIRECTORY_VERSIONS = (org_closure.VERSION_NAME,)
+
+
+def _directory(db: Session, key: tuple, stmt, row_type) -> list:
+    return cached_read(
+        db, cache_name=_DIRECTORY_CACHE, versions=_DIRECTORY_VERSIONS, key=key,
+        load=lambda: _rows(db, stmt, row_type),
+    )
+
+
+def list_departments_rows(
+    db: Session, *, visible_department_ids: Optional[Collection[int]] = None
+) -> List[DepartmentRow]:
+    stmt = (
+        select(Department.id, Department.name)
+        .where(_visible(Department.id, visible_department_ids))
+        .order_by(Department.name)
+    )
+    scope = None if visible_department_ids is None else tuple(sorted(visible_department_ids))
+    return _directory(db, ("departments", scope), stmt, DepartmentRow)
+
+
+def list_teams_rows(db: Session, *, visible_team_ids: Optional[Collection[int]] = None) -> List[TeamRow]:
+    stmt = (
+        select(Team.id, Team.name, Team.department_id, Team.lead_user_id)
+        .where(_visible(Team.id, visible_team_ids))
+        .order_by(Team.name)
+    )
+    scope = None if visible_team_ids is None else tuple(sorted(visible_team_ids))
+    return _directory(db, ("teams", scope), stmt, TeamRow)
+
+
+def list_users_rows(db: Session) -> List[UserRow]:
+    """İsim haritaları için tüm kullanıcılar (departman/takım ilişkileri yüklenmez)."""
+    return _directory(db, ("users",), select(*_USER_ROW_COLS).order_by(User.id), UserRow)
+
+
+def list_users_by_team_rows(db: Session, *, team_id: int) -> List[UserRow]:
+    stmt = select(*_USER_ROW_COLS).where(User.team_id == team_id).order_by(User.full_name, User.username)
+    return _directory(db, ("users_by_team", team_id), stmt, UserRow)
+
+
+def list_reports_for_department_rows(
+    db: Session, *, department_id: int, d: date, visible_department_ids: Optional[Collection[int]] = None
+) -> List[ReportRow]:
+    stmt = (
+        select(*_REPORT_ROW_COLS)
+        .where(
+            Report.department_id == department_id, Report.date == d,
+            _visible(Report.department_id, visible_department_ids),
+        )
+        .order_by(Report.created_at.asc(), Report.id.asc())
+    )
+    return _rows(db, stmt, ReportRow)
+
+
+def _reports_range_rows(
+    db: Session, *, user_ids: List[int], start: date, end: date, q: Optional[str],
+    department_id: Optional[int] = None,
+) -> List[ReportRow]:
+    stmt = (
+        select(*_REPORT_ROW_COLS)
+        .where(Report.user_id.in_(user_ids), Report.date >= start, Report.date <= end)
+        .order_by(Report.date.desc(), Report.id.desc())
+    )
+    if department_id:
+        stmt = stmt.where(Report.department_id == department_id)
+    if q:
+        like = f"%{q.strip()}%"
+        stmt = stmt.where(or_(Report.content.ilike(like), Report.project.ilike(like)))
+    out = _rows(db, stmt, ReportRow)
+    years = archived_years_for_range(db, start=start, end=end)
+    if years:
+        archived = select_archived_reports(
+            db.get_bind(), years=years, start=start, end=end,
+            user_ids=user_ids, department_id=department_id, q=q,
+        )
+        out = _merge_archived(out, [_report_row(r) for r in archived])
+    return out
+
+
+def list_user_reports_rows(
+    db: Session, *, user_id: int, start: date, end: date, q: Optional[str] = None, department_id: Optional[int] = None
+) -> List[ReportRow]:
+    return _reports_range_rows(db, user_ids=[user_id], start=start, end=end, q=q, department_id=department_id)
+
+
+def list_reports_for_users_rows(
+    db: Session, *, user_ids: List[int], start: date, end: date, q: Optional[str]
+) -> List[ReportRow]:
+    if not user_ids:
+        return []
+    return _reports_range_rows(db, user_ids=user_ids, start=start, end=end, q=q)
+
+
+def missing_reports_for_department_and_date_rows(
+    db: Session, *, department_id: int, d: date, visible_department_ids: Optional[Collection[int]] = None
+) -> List[UserRow]:
+    """missing_reports_for_department_and_date ile aynı sonuç; tek sorgu (NOT EXISTS)."""
+    reported = (
+        select(Report.id)
+        .where(Report.user_id == User.id, Report.department_id == department_id, Report.date == d)
+        .exists()
+    )
+    stmt = (
+        select(*_USER_ROW_COLS)
+        .join(UserDepartment, UserDepartment.user_id == User.id)
+        .where(
+            UserDepartment.department_id == department_id, ~reported,
+            _visible(UserDepartment.department_id, visible_department_ids),
+        )
+        .order_by(User.full_name, User.username)
+    )
+    return _rows(db, stmt, UserRow)
+
+
+def list_comments_tree_rows(
+    db: Session, *, report_ids: List[int], start: Optional[date] = None, end: Optional[date] = None,
+) -> Dict[int, List[Tuple[CommentRow, int]]]:
+    """
+    list_comments_tree_by_report_ids'in satır tipli karşılığı (yazar ilişkisi yüklenmez).
+    start/end raporların tarih aralığıdır; verilirse ve aralık arşive uzanıyorsa arşivlenmiş
+    raporların yorumları da okunur (arşivlemeden sonra eklenen yorumlar ana tablodadır).
+    """
+    if not report_ids:
+        return {}
+    stmt = (
+        select(*_COMMENT_ROW_COLS)
+        .where(Comment.report_id.in_(report_ids))
+        .order_by(Comment.created_at.asc(), Comment.id.asc())
+    )
+    items = _rows(db, stmt, CommentRow)
+    if start is not None:
+        years = archived_years_for_range(db, start=start, end=end or start)
+        if years:
+            live = {c.id for c in items}
+            items += [c for c in select_archived_comments(db.get_bind(), years=years, report_ids=report_ids)
+                      if c.id not in live]
+    return _thread_comments(items)
+
+
 # --------------------------------
 # TODOS
 # --------------------------------
@@ -495,7 +1037,7 @@ def list_todos_for_user(
 ) -> List[Todo]:
     stmt = select(Todo).where(Todo.user_id == user_id)
     if show_done is not None:
-        stmt = stmt.where(Todo.is_done.is_(show_done))
+        stmt = stmt.where(Todo.is_done == show_done)
     if search:
         like = f"%{search.strip()}%"
         stmt = stmt.where(or_(Todo.title.ilike(like), Todo.description.ilike(like)))
@@ -558,6 +1100,49 @@ def delete_todo(db: Session, *, todo_id: int, user_id: int) -> bool:
     return True
 
 
+# ---- Toplu işlemler: her biri sahibiyle sınırlı tek UPDATE/DELETE ifadesi, tek commit.
+# Başkasına ait veya olmayan id'ler sessizce atlanır; dönen değer etkilenen satır sayısıdır.
+
+def _todo_ids_stmt(stmt, *, user_id: int, todo_ids: List[int]):
+    return stmt.where(Todo.user_id == user_id, Todo.id.in_(sorted(set(todo_ids))))
+
+
+def _bulk_update_todos(db: Session, *, user_id: int, todo_ids: List[int], **values) -> int:
+    if not todo_ids:
+        return 0
+    values["updated_at"] = datetime.utcnow()
+    stmt = _todo_ids_stmt(update(Todo), user_id=user_id, todo_ids=todo_ids).values(**values)
+    n = db.execute(stmt.execution_options(synchronize_session=False)).rowcount
+    db.commit()
+    return n
+
+
+def complete_todos(db: Session, *, user_id: int, todo_ids: List[int]) -> int:
+    return _bulk_update_todos(db, user_id=user_id, todo_ids=todo_ids, is_done=True, completed_at=datetime.utcnow())
+
+
+def reopen_todos(db: Session, *, user_id: int, todo_ids: List[int]) -> int:
+    return _bulk_update_todos(db, user_id=user_id, todo_ids=todo_ids, is_done=False, completed_at=None)
+
+
+def set_todos_priority(db: Session, *, user_id: int, todo_ids: List[int], priority: int) -> int:
+    return _bulk_update_todos(db, user_id=user_id, todo_ids=todo_ids, priority=priority)
+
+
+def reschedule_todos(db: Session, *, user_id: int, todo_ids: List[int], due_date: Optional[date]) -> int:
+    """due_date=None bitiş tarihini kaldırır."""
+    return _bulk_update_todos(db, user_id=user_id, todo_ids=todo_ids, due_date=due_date)
+
+
+def delete_todos(db: Session, *, user_id: int, todo_ids: List[int]) -> int:
+    if not todo_ids:
+        return 0
+    stmt = _todo_ids_stmt(delete(Todo), user_id=user_id, todo_ids=todo_ids)
+    n = db.execute(stmt.execution_options(synchronize_session=False)).rowcount
+    db.commit()
+    return n
+
+
 # --------------------------------
 # LEAVES (İzin)
 # --------------------------------
@@ -574,8 +1159,11 @@ def create_leave(
         raise ValueError("Başlangıç tarihi bitişten büyük olamaz")
     lv = Leave(user_id=user_id, start_date=start_date, end_date=end_date, reason=(reason or None))
     db.add(lv)
+    db.flush()
+    version = bump_data_version(db, name=leave_index.VERSION_NAME)
     db.commit()
     db.refresh(lv)
+    leave_index.apply_change(db, version, added=LeaveRow(lv.id, lv.user_id, lv.start_date, lv.end_date))
     return lv
 
 
@@ -605,20 +1193,99 @@ def list_leaves_admin(
 ) -> List[Leave]:
     from app.db.models import User  # circular import guard
     stmt = select(Leave).options(selectinload(Leave.user).selectinload(User.departments))
-    if start:
+    if start and end:
+        # İki uçlu aralık: adaylar aralık indeksinden, tabloya yalnızca PK ile gidilir
+        ids = [r.id for r in list_leave_overlaps(db, start=start, end=end, user_ids=[user_id] if user_id else None)]
+        if not ids:
+            return []
+        stmt = stmt.where(Leave.id.in_(ids))
+    elif start:
         stmt = stmt.where(Leave.end_date >= start)
-    if end:
+    elif end:
         stmt = stmt.where(Leave.start_date <= end)
     if user_id:
         stmt = stmt.where(Leave.user_id == user_id)
     if department_id:
-        stmt = stmt.join(UserDepartment, UserDepartment.user_id == Leave.user_id).where(
-            UserDepartment.department_id == department_id
+        # JOIN yerine EXISTS: kullanıcı-departman satırı ne olursa olsun izin bir kez döner
+        stmt = stmt.where(
+            select(UserDepartment.id)
+            .where(UserDepartment.user_id == Leave.user_id, UserDepartment.department_id == department_id)
+            .exists()
         )
     stmt = stmt.order_by(Leave.start_date.desc(), Leave.id.desc())
     return list(db.execute(stmt).scalars().all())
 
 
+def list_leave_user_options(db: Session, *, department_id: Optional[int] = None) -> List[UserRow]:
+    """İzin filtresindeki kullanıcı seçenekleri; departman verilirse user_departments üzerinden süzülür."""
+    stmt = select(*_USER_ROW_COLS)
+    if department_id:
+        stmt = stmt.where(
+            select(UserDepartment.id)
+            .where(UserDepartment.user_id == User.id, UserDepartment.department_id == department_id)
+            .exists()
+        )
+    return _rows(db, stmt.order_by(User.full_name, User.username), UserRow)
+
+
+def list_leaves_admin_rows(
+    db: Session,
+    *,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    department_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    limit: int = 50,
+    offset: int = 0,
+) -> Tuple[List[LeaveAdminRow], int]:
+    """
+    Yönetici izin listesinin bir sayfası ve toplam kayıt sayısı, tek sorguda.
+    İzin sahibi adı ve departman adları JOIN ile gelir; kullanıcının birden çok departmanı olsa
+    da GROUP BY leave.id ile her izin bir kez döner (adlar group_concat ile birleşir).
+    Toplam, sayfalama öncesi grup sayısı üzerinden pencere fonksiyonuyla hesaplanır; sayfa sonun
+    ötesindeyse (satır yok) ayrı bir COUNT ile. İki uçlu aralıkta adaylar list_leaves_admin'deki
+    gibi aralık indeksinden gelir ve tabloya yalnızca PK ile gidilir.
+    """
+    owner = func.coalesce(User.full_name, User.username)
+    dept_names = func.group_concat(Department.name, ", ")
+    stmt = (
+        select(
+            Leave.id, Leave.user_id, owner, dept_names, Leave.start_date, Leave.end_date, Leave.reason,
+            func.count().over().label("total"),
+        )
+        .join(User, User.id == Leave.user_id)
+        .outerjoin(UserDepartment, UserDepartment.user_id == Leave.user_id)
+        .outerjoin(Department, Department.id == UserDepartment.department_id)
+    )
+    if start and end:
+        ids = [r.id for r in list_leave_overlaps(db, start=start, end=end, user_ids=[user_id] if user_id else None)]
+        if not ids:
+            return [], 0
+        stmt = stmt.where(Leave.id.in_(ids))
+    elif start:
+        stmt = stmt.where(Leave.end_date >= start)
+    elif end:
+        stmt = stmt.where(Leave.start_date <= end)
+    if user_id:
+        stmt = stmt.where(Leave.user_id == user_id)
+    if department_id:
+        # Departman adlarının tamamı görünsün diye filtre JOIN'e değil EXISTS'e konur
+        member = aliased(UserDepartment)
+        stmt = stmt.where(
+            select(member.id)
+            .where(member.user_id == Leave.user_id, member.department_id == department_id)
+            .exists()
+        )
+    stmt = stmt.group_by(Leave.id)
+    page = stmt.order_by(Leave.start_date.desc(), Leave.id.desc()).limit(limit).offset(offset)
+    rows = db.connection().execute(page).tuples().all()
+    if not rows:
+        if not offset:
+            return [], 0
+        return [], db.execute(select(func.count()).select_from(stmt.subquery())).scalar_one()
+    return [LeaveAdminRow(*t[:-1]) for t in rows], rows[0][-1]
+
+
 def delete_leave(db: Session, *, leave_id: int, user_id: Optional[int] = None, as_admin: bool = False) -> bool:
     lv = db.get(Leave, leave_id)
     if not lv:
@@ -626,5 +1293,216 @@ def delete_leave(db: Session, *, leave_id: int, user_id: Optional[int] = None, a
     if not as_admin and (user_id is None or lv.user_id != user_id):
         return False
     db.delete(lv)
+    version = bump_data_version(db, name=leave_index.VERSION_NAME)
+    db.commit()
+    leave_index.apply_change(db, version, removed_id=leave_id)
+    return True
+
+
+def who_is_off(db: Session, *, d: date, user_ids: Optional[List[int]] = None) -> List[int]:
+    """d günü izinde olan kullanıcı id'leri (aralık indeksinden)."""
+    idx = leave_index.get_index(db)
+    return sorted(idx.who_is_off(d, set(user_ids) if user_ids is not None else None))
+
+
+def list_leave_overlaps(
+    db: Session, *, start: date, end: date, user_ids: Optional[List[int]] = None
+) -> List[LeaveRow]:
+    """[start, end] ile çakışan izinler (id, user_id, start_date, end_date); start desc sıralı."""
+    idx = leave_index.get_index(db)
+    return idx.overlaps(start, end, set(user_ids) if user_ids is not None else None)
+
+
+def list_member_ids(
+    db: Session, *, team_id: Optional[int] = None, department_id: Optional[int] = None
+) -> List[int]:
+    """Takım ve/veya departman üyelerinin id'leri (sıralı)."""
+    stmt = select(User.id)
+    if team_id is not None:
+        stmt = stmt.where(User.team_id == team_id)
+    if department_id is not None:
+        stmt = stmt.join(UserDepartment, UserDepartment.user_id == User.id).where(
+            UserDepartment.department_id == department_id
+        )
+    return list(db.execute(stmt.distinct().order_by(User.id)).scalars().all())
+
+
+# --------------------------------
+# HOLIDAYS (İş günü takvimi)
+# --------------------------------
+
+HOLIDAYS_VERSION = "holidays"
+
+
+def list_holidays(db: Session, *, year: Optional[int] = None) -> List[Holiday]:
+    stmt = select(Holiday).order_by(Holiday.day)
+    if year:
+        stmt = stmt.where(Holiday.day >= date(year, 1, 1), Holiday.day <= date(year, 12, 31))
+    return list(db.execute(stmt).scalars().all())
+
+
+def upsert_holiday(db: Session, *, day: date, name: str, half_day: bool = False) -> None:
+    """Aynı güne ikinci kayıt açılmaz; ad/yarım gün bilgisi güncellenir."""
+    stmt = (
+        sqlite_insert(Holiday)
+        .values(day=day, name=(name or "").strip() or "Tatil", half_day=bool(half_day), created_at=datetime.utcnow())
+        .on_conflict_do_update(
+            index_elements=[Holiday.day],
+            set_={"name": (name or "").strip() or "Tatil", "half_day": bool(half_day)},
+        )
+    )
+    db.execute(stmt)
+    bump_data_version(db, name=HOLIDAYS_VERSION)
+    db.commit()
+
+
+def delete_holiday(db: Session, *, holiday_id: int) -> bool:
+    h = db.get(Holiday, holiday_id)
+    if not h:
+        return False
+    db.delete(h)
+    bump_data_version(db, name=HOLIDAYS_VERSION)
     db.commit()
     return True
+
+
+# --------------------------------
+# NOTIFICATIONS (outbox)
+# --------------------------------
+
+def missing_report_pairs(db: Session, *, d: date) -> List[Tuple[int, int]]:
+    """
+    Tüm departmanlar için d günü raporu eksik (kullanıcı, departman) çiftleri, tek sorguda
+    (user_departments üzerinde NOT EXISTS; ix_reports_user_date_id ile).
+    """
+    reported = (
+        select(Report.id)
+        .where(
+            Report.user_id == UserDepartment.user_id,
+            Report.department_id == UserDepartment.department_id,
+            Report.date == d,
+        )
+        .exists()
+    )
+    stmt = (
+        select(UserDepartment.user_id, UserDepartment.department_id)
+        .where(~reported)
+        .order_by(UserDepartment.user_id, UserDepartment.department_id)
+    )
+    return [tuple(r) for r in db.execute(stmt)]
+
+
+def list_managers_for_users(db: Session, *, user_ids: List[int]) -> List[Tuple[int, int]]:
+    """(yönetici id, kullanıcı id) çiftleri: org_closure'da kullanıcının atası olan kullanıcılar (kendisi hariç)."""
+    if not user_ids:
+        return []
+    stmt = (
+        select(OrgClosure.ancestor_id, OrgClosure.descendant_id)
+        .where(
+            OrgClosure.descendant_type == org_closure.USER,
+            OrgClosure.descendant_id.in_(user_ids),
+            OrgClosure.ancestor_type == org_closure.USER,
+            OrgClosure.depth > 0,
+        )
+        .order_by(OrgClosure.ancestor_id, OrgClosure.descendant_id)
+    )
+    return [tuple(r) for r in db.execute(stmt)]
+
+
+def list_notifications_by_ref(db: Session, *, kind: str, ref_date: date) -> List[Notification]:
+    stmt = select(Notification).where(Notification.kind == kind, Notification.ref_date == ref_date)
+    return list(db.execute(stmt).scalars().all())
+
+
+def list_pending_notifications(db: Session, *, limit: int = 100) -> List[Notification]:
+    """Gönderilecekler, eskiden yeniye (ix_notifications_pending kısmi indeksi)."""
+    stmt = select(Notification).where(Notification.status == "pending").order_by(Notification.id).limit(limit)
+    return list(db.execute(stmt).scalars().all())
+
+
+# --------------------------------
+# NOTIFICATIONS (uygulama içi gelen kutusu)
+# --------------------------------
+
+_NOTIFICATION_ROW_COLS = (
+    Notification.id, Notification.kind, Notification.title, Notification.body, Notification.payload_json,
+    Notification.ref_date, Notification.created_at, Notification.read_at,
+)
+
+
+def add_unread(db: Session, *, user_id: int, delta: int) -> None:
+    """Okunmamış sayacını delta kadar değiştirir (satır yoksa açılır; sıfırın altına inmez). Commit çağırana aittir."""
+    if not delta:
+        return
+    now = datetime.utcnow()
+    stmt = (
+        sqlite_insert(NotificationCounter)
+        .values(user_id=user_id, unread=max(delta, 0), updated_at=now)
+        .on_conflict_do_update(
+            index_elements=[NotificationCounter.user_id],
+            set_={"unread": func.max(NotificationCounter.unread + delta, 0), "updated_at": now},
+        )
+    )
+    db.execute(stmt)
+
+
+def notify(
+    db: Session,
+    *,
+    user_id: int,
+    kind: str,
+    title: str,
+    body: str,
+    payload: Optional[dict] = None,
+    ref_date: Optional[date] = None,
+    status: str = "inapp",
+    dedupe_key: Optional[str] = None,
+) -> Notification:
+    """Bildirim satırı + okunmamış sayacı, aynı işlemde. Commit çağırana aittir."""
+    n = Notification(
+        user_id=user_id, kind=kind, title=title[:200], body=body, ref_date=ref_date, status=status,
+        dedupe_key=dedupe_key, payload_json=json.dumps(payload, ensure_ascii=False) if payload else None,
+    )
+    db.add(n)
+    add_unread(db, user_id=user_id, delta=1)
+    return n
+
+
+def get_unread_count(db: Session, *, user_id: int) -> int:
+    """Kenar çubuğu rozeti: sayaç satırının PK okuması."""
+    return db.execute(
+        select(NotificationCounter.unread).where(NotificationCounter.user_id == user_id)
+    ).scalar() or 0
+
+
+def list_notifications_page(
+    db: Session, *, user_id: int, before_id: Optional[int] = None, limit: int = 20, unread_only: bool = False
+) -> List[NotificationRow]:
+    """
+    Gelen kutusu sayfası, yeniden eskiye. Anahtar kümesi (keyset) sayfalama: sonraki sayfa bir önceki
+    sayfanın son id'sinden devam eder (OFFSET yok; ix_notifications_user_id + rowid ile).
+    """
+    stmt = select(*_NOTIFICATION_ROW_COLS).where(Notification.user_id == user_id, Notification.status != "cancelled")
+    if before_id is not None:
+        stmt = stmt.where(Notification.id < before_id)
+    if unread_only:
+        stmt = stmt.where(Notification.read_at.is_(None))
+    return _rows(db, stmt.order_by(Notification.id.desc()).limit(limit), NotificationRow)
+
+
+def mark_notifications_read(db: Session, *, user_id: int, notification_ids: Optional[List[int]] = None) -> int:
+    """Verilen (None ise tüm) okunmamış bildirimleri okundu yapar; sayaç aynı işlemde düşer."""
+    stmt = (
+        update(Notification)
+        .where(Notification.user_id == user_id, Notification.read_at.is_(None), Notification.status != "cancelled")
+        .values(read_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    if notification_ids is not None:
+        if not notification_ids:
+            return 0
+        stmt = stmt.where(Notification.id.in_(notification_ids))
+    n = db.execute(stmt).rowcount or 0
+    add_unread(db, user_id=user_id, delta=-n)
+    db.commit()
+    return n
@@ -1,5 +1,6 @@
 from __future__ import annotations
 import os
+from sqlalchemy.exc import IntegrityError
 from app.db.database import Base, engine
 from app.db.repository import get_user_by_username, create_user
 from app.core.config import ADMIN_USERNAME, ADMIN_PASSWORD
@@ -15,4 +16,6 @@ def ensure_admin():
         if not get_user_by_username(db, ADMIN_USERNAME):
             create_user(db, username=ADMIN_USERNAME, password=ADMIN_PASSWORD, full_name="Admin", role="admin",
                         team_id=None)
+    except IntegrityError:
+        db.rollback()  # eşzamanlı ilk açılışta başka oturum oluşturmuş olabilir
     finally: db.close()
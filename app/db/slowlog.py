@@ -0,0 +1,138 @@
+from __future__ import annotations
+import json, logging, os, sys, threading
+from datetime import date, datetime
+from logging.handlers import RotatingFileHandler
+from typing import Dict, List, Optional
+
+from app.core.config import SLOW_QUERY_MS, SLOW_QUERY_LOG, SLOW_QUERY_LOG_MAX_BYTES, SLOW_QUERY_LOG_BACKUPS
+from app.db import profiler
+
+_logger = logging.getLogger("dailyreporter.slow_query")
+_plans: Dict[str, dict] = {}  # şekil -> {"plan": [...], "scans": [...]} (şekil başına tek EXPLAIN)
+_plans_lock = threading.Lock()
+_MAX_PLANS = 2000
+_EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE")
+
+
+def _redact(value):
+    """Sayı/tarih/None olduğu gibi; metin ve ikili veriler yalnızca uzunluklarıyla yazılır."""
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return f"<bytes:{len(value)}>"
+    if isinstance(value, str):
+        return f"<str:{len(value)}>"
+    return f"<{type(value).__name__}>"
+
+
+def redact_params(parameters) -> object:
+    if isinstance(parameters, dict):
+        return {k: _redact(v) for k, v in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (list, tuple, dict)):  # executemany
+            return {"executemany": len(parameters), "first": redact_params(parameters[0])}
+        return [_redact(v) for v in parameters]
+    return _redact(parameters)
+
+
+def _callers() -> tuple[Optional[str], Optional[str]]:
+    """(repository fonksiyonu, uygulamadaki en yakın çağıran sayfa/servis) ikilisi."""
+    repo_fn = origin = None
+    f = sys._getframe(2)
+    while f is not None:
+        mod = f.f_globals.get("__name__", "")
+        if repo_fn is None and mod.startswith("app.db.repository"):
+            repo_fn = f"{mod}.{f.f_code.co_name}"
+        elif repo_fn is not None and not mod.startswith(("app.db", "sqlalchemy")):
+            origin = f"{os.path.relpath(f.f_code.co_filename)}:{f.f_lineno} {f.f_code.co_name}"
+            break
+        f = f.f_back
+    return repo_fn, origin
+
+
+def _full_scans(plan: List[str]) -> List[str]:
+    # "SCAN reports" tam tablo taraması; "SCAN x USING (COVERING) INDEX" indeks üzerinde gezinmedir
+    out = []
+    for line in plan:
+        s = line.strip()
+        if s.startswith("SCAN ") and " USING " not in s:
+            out.append(s[5:].split()[0])
+    return out
+
+
+def query_plan(dbapi_conn, statement: str, parameters=None) -> dict:
+    """
+    SQLite EXPLAIN QUERY PLAN: {"plan": [satırlar], "scans": [tam taranan tablolar], "temp_btree": bool}.
+    tools.index_advisor da kullanır.
+    """
+    params = parameters
+    if isinstance(params, list) and params and isinstance(params[0], (list, tuple, dict)):
+        params = params[0]
+    cur = dbapi_conn.cursor()
+    try:
+        rows = cur.execute("EXPLAIN QUERY PLAN " + statement, params or ()).fetchall()
+    finally:
+        cur.close()
+    plan = [str(r[-1]) for r in rows]
+    return {"plan": plan, "scans": _full_scans(plan), "temp_btree": any("USE TEMP B-TREE" in l for l in plan)}
+
+
+def _explain(statement: str, parameters, conn) -> Optional[dict]:
+    shape = profiler.statement_shape(statement)
+    with _plans_lock:
+        if shape in _plans:
+            return _plans[shape]
+    if not statement.lstrip().upper().startswith(_EXPLAINABLE):
+        return None
+    # Ham DBAPI bağlantısı: SQLAlchemy olayları (ve profil) tekrar tetiklenmez
+    info = query_plan(conn.connection.dbapi_connection, statement, parameters)
+    with _plans_lock:
+        if len(_plans) >= _MAX_PLANS:
+            _plans.clear()
+        _plans[shape] = info
+    return info
+
+
+def _on_query(statement, parameters, duration, conn) -> None:
+    ms = duration * 1000
+    if ms < SLOW_QUERY_MS:
+        return
+    repo_fn, origin = _callers()
+    info = None
+    if conn.engine.url.get_backend_name() == "sqlite":
+        try:
+            info = _explain(statement, parameters, conn)
+        except Exception as e:
+            info = {"plan": [], "scans": [], "error": str(e)}
+    entry = {
+        "ts": datetime.now().isoformat(timespec="milliseconds"),
+        "ms": round(ms, 3),
+        "caller": repo_fn,
+        "origin": origin,
+        "sql": statement,
+        "params": redact_params(parameters),
+    }
+    if info is not None:
+        entry["plan"] = info["plan"]
+        entry["full_scans"] = info["scans"]
+        entry["temp_btree"] = info.get("temp_btree", False)
+        if info.get("error"):
+            entry["explain_error"] = info["error"]
+    _logger.warning(json.dumps(entry, ensure_ascii=False, default=str))
+
+
+def install() -> None:
+    """Eşik > 0 ise sorgu kancasını ve dönen dosya günlüğünü kurar (idempotent)."""
+    if SLOW_QUERY_MS <= 0:
+        return
+    if not _logger.handlers:
+        os.makedirs(os.path.dirname(SLOW_QUERY_LOG) or ".", exist_ok=True)
+        h = RotatingFileHandler(SLOW_QUERY_LOG, maxBytes=SLOW_QUERY_LOG_MAX_BYTES,
+                                backupCount=SLOW_QUERY_LOG_BACKUPS, encoding="utf-8", delay=True)
+        h.setFormatter(logging.Formatter("%(message)s"))
+        _logger.addHandler(h)
+        _logger.setLevel(logging.INFO)
+        _logger.propagate = False
+    profiler.add_query_hook(_on_query)
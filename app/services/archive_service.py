@@ -0,0 +1,100 @@
+from __future__ import annotations
+import argparse, os
+from datetime import date, timedelta
+from typing import Dict, Optional
+
+from app.core.config import ARCHIVE_DIR, ARCHIVE_AFTER_DAYS
+from app.db.archive import archive_path, attached, ensure_archive_schema
+from app.db.database import engine
+from app.utils.dates import today_tr
+
+_BATCH = 500  # tek transaction'da taşınan rapor sayısı (yazarları uzun süre bekletmemek için)
+
+
+def archive_old_reports(*, older_than_days: int = ARCHIVE_AFTER_DAYS, today: Optional[date] = None,
+                        batch_size: int = _BATCH) -> Dict[int, int]:
+    """
+    older_than_days'den eski raporları (yorum ve revizyonlarıyla birlikte) yıllık arşiv
+    dosyalarına taşır. Idempotent: INSERT OR REPLACE + ana tablodan silme.
+    Dönüş: {yıl: taşınan rapor sayısı}
+    """
+    cutoff = (today or today_tr()) - timedelta(days=older_than_days)
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    moved: Dict[int, int] = {}
+
+    with engine.connect() as conn:
+        years = [int(r[0]) for r in conn.exec_driver_sql(
+            "SELECT DISTINCT CAST(strftime('%Y', date) AS INTEGER) FROM reports WHERE date < ? ORDER BY 1",
+            (cutoff.isoformat(),),
+        ).fetchall()]
+        conn.rollback()
+
+        for y in years:
+            lo = date(y, 1, 1).isoformat()
+            hi = min(date(y, 12, 31), cutoff - timedelta(days=1)).isoformat()
+            with attached(conn, [y], create=True) as (a,):
+                ensure_archive_schema(conn, a)
+                conn.commit()
+                while True:
+                    ids = [r[0] for r in conn.exec_driver_sql(
+                        "SELECT id FROM main.reports WHERE date >= ? AND date <= ? ORDER BY id LIMIT ?",
+                        (lo, hi, batch_size),
+                    ).fetchall()]
+                    if not ids:
+                        break
+                    marks = ",".join("?" * len(ids))
+                    p = tuple(ids)
+                    conn.exec_driver_sql(
+                        f"""INSERT OR REPLACE INTO {a}.reports
+                            (id, user_id, department_id, date, content, project, tags_json, created_at, updated_at)
+                            SELECT id, user_id, department_id, date, zlib_compress(content), project, tags_json,
+                                   created_at, updated_at
+                            FROM main.reports WHERE id IN ({marks})""", p)
+                    conn.exec_driver_sql(
+                        f"""INSERT OR REPLACE INTO {a}.comments
+                            (id, report_id, author_user_id, parent_comment_id, content, created_at)
+                            SELECT id, report_id, author_user_id, parent_comment_id, zlib_compress(content), created_at
+                            FROM main.comments WHERE report_id IN ({marks})""", p)
+                    conn.exec_driver_sql(
+                        f"""INSERT OR REPLACE INTO {a}.report_revisions
+                            (id, report_id, rev_no, is_snapshot, payload, project, raw_size, stored_size, created_at)
+                            SELECT id, report_id, rev_no, is_snapshot, payload, project, raw_size, stored_size, created_at
+                            FROM main.report_revisions WHERE report_id IN ({marks})""", p)
+                    conn.exec_driver_sql(f"DELETE FROM main.report_revisions WHERE report_id IN ({marks})", p)
+                    conn.exec_driver_sql(f"DELETE FROM main.comments WHERE report_id IN ({marks})", p)
+                    conn.exec_driver_sql(f"DELETE FROM main.reports WHERE id IN ({marks})", p)
+                    _upsert_segment(conn, a, y)
+                    conn.commit()
+                    moved[y] = moved.get(y, 0) + len(ids)
+                conn.commit()
+    return moved
+
+
+def _upsert_segment(conn, alias: str, year: int) -> None:
+    mn, mx, n = conn.exec_driver_sql(f"SELECT MIN(date), MAX(date), COUNT(*) FROM {alias}.reports").fetchone()
+    (nc,) = conn.exec_driver_sql(f"SELECT COUNT(*) FROM {alias}.comments").fetchone()
+    if mn is None:
+        return
+    conn.exec_driver_sql(
+        """INSERT INTO main.archive_segments (year, path, min_date, max_date, report_count, comment_count, updated_at)
+           VALUES (?, ?, ?, ?, ?, ?, datetime('now'))
+           ON CONFLICT(year) DO UPDATE SET
+               path=excluded.path, min_date=excluded.min_date, max_date=excluded.max_date,
+               report_count=excluded.report_count, comment_count=excluded.comment_count,
+               updated_at=excluded.updated_at""",
+        (year, archive_path(year), mn, mx, n, nc),
+    )
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Eski raporları yıllık arşiv dosyalarına taşır.")
+    ap.add_argument("--older-than-days", type=int, default=ARCHIVE_AFTER_DAYS)
+    args = ap.parse_args()
+    moved = archive_old_reports(older_than_days=args.older_than_days)
+    if not moved:
+        print("[archive] Taşınacak rapor yok.")
+    for y, n in sorted(moved.items()):
+        print(f"[archive] {y}: {n} rapor -> {archive_path(y)}")
+
+if __name__ == "__main__":
+    main()
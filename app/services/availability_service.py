@@ -0,0 +1,107 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from datetime import date
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.db import leave_index
+from app.db.read_models import LeaveRow
+from app.db.repository import cached_read, list_member_ids
+
+
+@dataclass(frozen=True)
+class Availability:
+    days: np.ndarray      # datetime64[D], start..end
+    present: np.ndarray   # gün başına mevcut kişi
+    off: np.ndarray       # gün başına izinli kişi
+    total: int            # kapsamdaki kişi sayısı
+    member_ids: Tuple[int, ...]
+
+
+def disjoint_spans(users: np.ndarray, s: np.ndarray, e: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Tamsayı gün aralıklarını [s, e] kişi içinde ayrık hale getirir: kişi + başlangıca göre
+    sıralayıp, kişinin önceki aralıklarının bitiş maksimumundan sonrası bırakılır. Boşalan aralıklar
+    atılır. Kişi başına döngü yoktur (grup ofsetli kümülatif maksimum).
+    """
+    if not len(users):
+        return users, s, e
+    order = np.lexsort((s, users))
+    users, s, e = users[order], s[order], e[order]
+    lo = int(min(s.min(), e.min()))
+    s, e = s - lo, e - lo  # >= 0: grup ofsetleri çakışmasın
+    span = int(e.max()) + 2
+    _, group = np.unique(users, return_inverse=True)
+    cummax = np.maximum.accumulate(group * span + e) - group * span
+    prev = np.empty_like(cummax)
+    prev[0] = -1
+    prev[1:] = cummax[:-1]
+    new_group = np.empty(len(users), dtype=bool)
+    new_group[0] = True
+    new_group[1:] = group[1:] != group[:-1]
+    prev[new_group] = -1
+    s = np.maximum(s, prev + 1)
+    keep = s <= e
+    return users[keep], s[keep] + lo, e[keep] + lo
+
+
+def off_per_day(leaves: Sequence[LeaveRow], start: date, end: date) -> np.ndarray:
+    """
+    Süpürme (sweep) ile gün başına izinli kişi sayısı. Aynı kişinin çakışan izinleri önce
+    vektörel olarak ayrıştırılır (kişi içi kümülatif maksimum), sonra başlangıç/bitiş olayları
+    fark dizisine yazılıp cumsum alınır. Maliyet: O(izin sayısı · log + gün sayısı).
+    """
+    n = (end - start).days + 1
+    if n <= 0:
+        return np.zeros(0, dtype=np.int64)
+    if not leaves:
+        return np.zeros(n, dtype=np.int64)
+    users = np.fromiter((r.user_id for r in leaves), dtype=np.int64, count=len(leaves))
+    s = np.fromiter(((r.start_date - start).days for r in leaves), dtype=np.int64, count=len(leaves))
+    e = np.fromiter(((r.end_date - start).days for r in leaves), dtype=np.int64, count=len(leaves))
+    s = np.clip(s, 0, n - 1)
+    e = np.clip(e, 0, n - 1)
+
+    users, s, e = disjoint_spans(users, s, e)
+
+    diff = np.zeros(n + 1, dtype=np.int64)
+    np.add.at(diff, s, 1)
+    np.add.at(diff, e + 1, -1)
+    return np.cumsum(diff[:n])
+
+
+def team_calendar(
+    db: Session, *, start: date, end: date, team_id: Optional[int] = None, department_id: Optional[int] = None
+) -> Availability:
+    """
+    Takım/departman için günlük müsaitlik. Sonuç (kapsam, aralık, izin verisi sürümü, üyeler)
+    anahtarıyla "availability" önbelleğinde tutulur (repository.cached_read); izin yazıldığında sürüm
+    değişir ve yeniden hesaplanır. Üyelik değişirse anahtar da değişir.
+    """
+    members = tuple(list_member_ids(db, team_id=team_id, department_id=department_id))
+
+    def load() -> Availability:
+        leaves = leave_index.get_index(db).overlaps(start, end, set(members))
+        off = off_per_day(leaves, start, end)
+        days = np.arange(np.datetime64(start, "D"), np.datetime64(end, "D") + 1)
+        return Availability(days=days, present=len(members) - off, off=off, total=len(members), member_ids=members)
+
+    return cached_read(
+        db, cache_name="availability", versions=(leave_index.VERSION_NAME,),
+        key=(team_id, department_id, start, end, members), load=load,
+    )
+
+
+def weekly_grid(av: Availability) -> Tuple[List[date], np.ndarray]:
+    """Takvim görünümü: satır = hafta (Pazartesi), sütun = haftanın günü; aralık dışı hücreler -1."""
+    if not len(av.days):
+        return [], np.zeros((0, 7), dtype=np.int64)
+    first = av.days[0] - ((av.days[0].astype("datetime64[D]").view("int64") - 4) % 7)  # 1970-01-05 Pazartesi
+    offset = (av.days - first).astype(np.int64)
+    weeks = int(offset[-1] // 7) + 1
+    grid = np.full(weeks * 7, -1, dtype=np.int64)
+    grid[offset] = av.present
+    starts = [(first + np.timedelta64(7 * i, "D")).astype(date) for i in range(weeks)]
+    return starts, grid.reshape(weeks, 7)
@@ -0,0 +1,200 @@
+from __future__ import annotations
+import argparse, glob, os, shutil, sqlite3, time
+from datetime import datetime
+from typing import List, Optional
+
+from app.core.config import (
+    ARCHIVE_DIR, BACKUP_DIR, BACKUP_KEEP, BACKUP_PAGES_PER_STEP, BACKUP_STEP_SLEEP_MS, BACKUP_INTERVAL_HOURS,
+)
+from app.db.database import sqlite_db_path
+
+_PREFIX = "app-"
+_SUFFIX = ".sqlite3"
+
+
+class _TooManyRestarts(Exception):
+    pass
+
+
+def _integrity_ok(conn: sqlite3.Connection) -> bool:
+    rows = conn.execute("PRAGMA integrity_check").fetchall()
+    return len(rows) == 1 and rows[0][0] == "ok"
+
+
+def list_backups(backup_dir: str = BACKUP_DIR) -> List[str]:
+    """Mevcut yedekler (eskiden yeniye)."""
+    return sorted(glob.glob(os.path.join(backup_dir, f"{_PREFIX}*{_SUFFIX}")))
+
+
+def rotate_backups(backup_dir: str = BACKUP_DIR, keep: int = BACKUP_KEEP) -> List[str]:
+    """En yeni `keep` yedeği (arşiv kopyalarıyla) tutar, kalanları siler. Silinenleri döndürür."""
+    files = list_backups(backup_dir)
+    removed = files[:-keep] if keep > 0 else []
+    for f in removed:
+        _remove_quietly(f)
+        # Yedeğe ait arşiv kopyaları da onunla birlikte silinir
+        shutil.rmtree(archive_dir_for(f), ignore_errors=True)
+    return removed
+
+
+def archive_dir_for(backup_path: str) -> str:
+    """Bir yedeğin arşiv dosyası kopyalarının dizini (app-<zaman>.archive)."""
+    return backup_path[: -len(_SUFFIX)] + ".archive"
+
+
+def _copy_db(src_path: str, part: str, *, pages_per_step: int, pause: float, max_restarts: int) -> dict:
+    """
+    src_path'i part dosyasına backup API ile adım adım kopyalar ve bütünlüğünü kontrol eder.
+    Kaynak kopyalama sırasında sürekli değişirse (max_restarts aşılırsa) tek adımlık kopyaya düşülür.
+    """
+    steps = 0
+    restarts = 0
+    total_pages = 0
+    last_remaining: Optional[int] = None
+
+    def _progress(_status, remaining, total):
+        # CPython yalnızca BUSY/LOCKED durumunda uyur; yazarlara nefes aldırmak için
+        # her adımdan sonra burada bekliyoruz (kaynak kilidi adımlar arasında bırakılır).
+        nonlocal steps, restarts, total_pages, last_remaining
+        steps += 1
+        total_pages = total
+        if last_remaining is not None and remaining > last_remaining:
+            # Başka bağlantı kaynağı değiştirdi -> SQLite kopyayı baştan başlattı
+            restarts += 1
+            if restarts > max_restarts:
+                raise _TooManyRestarts()
+        last_remaining = remaining
+        if remaining and pause:
+            time.sleep(pause)
+
+    src = sqlite3.connect(src_path, timeout=30)
+    try:
+        dst = sqlite3.connect(part)
+        try:
+            src.backup(dst, pages=pages_per_step, progress=_progress, sleep=pause)
+            mode = "incremental"
+        except _TooManyRestarts:
+            # Yoğun yazma altında adım adım kopya hiç bitmeyebilir; tek adımda kopyala.
+            # WAL modunda bu yalnızca okuma anlık görüntüsüdür, yazarları bloklamaz.
+            dst.close()
+            os.remove(part)
+            dst = sqlite3.connect(part)
+            src.backup(dst, pages=-1)
+            mode = "single-step"
+        try:
+            # Kopya tek dosya olarak taşınabilsin (WAL yerine klasik journal)
+            dst.execute("PRAGMA journal_mode=DELETE")
+            ok = _integrity_ok(dst)
+        finally:
+            dst.close()
+    finally:
+        src.close()
+    return {"pages": total_pages, "steps": steps, "restarts": restarts, "mode": mode, "integrity_ok": ok}
+
+
+def run_backup(
+    *,
+    src_path: Optional[str] = None,
+    backup_dir: str = BACKUP_DIR,
+    archive_dir: str = ARCHIVE_DIR,
+    pages_per_step: int = BACKUP_PAGES_PER_STEP,
+    step_sleep_ms: int = BACKUP_STEP_SLEEP_MS,
+    keep: int = BACKUP_KEEP,
+    max_restarts: int = 3,
+) -> dict:
+    """
+    Uygulama çalışırken tutarlı yedek alır. Kopya her adımda `pages_per_step` sayfa
+    ilerler ve adımlar arasında uyur; böylece kaynak üzerindeki kilit kısa tutulur.
+    Ana veritabanıyla birlikte yıllık arşiv dosyaları (archive_dir/reports_<yıl>.sqlite3)
+    da aynı yolla app-<zaman>.archive/ dizinine kopyalanır. Kopyalar önce geçici dosyalara
+    yazılır; hepsi `PRAGMA integrity_check`'ten geçerse yerlerine taşınır, biri bile
+    geçmezse yedek alınmaz. Geri yükleme: ana dosya DB yoluna, .archive/ içeriği ARCHIVE_DIR'e.
+    """
+    src_path = src_path or sqlite_db_path()
+    os.makedirs(backup_dir, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    final = os.path.join(backup_dir, f"{_PREFIX}{stamp}{_SUFFIX}")
+    n = 1
+    while os.path.exists(final) or os.path.exists(archive_dir_for(final)):
+        final = os.path.join(backup_dir, f"{_PREFIX}{stamp}-{n}{_SUFFIX}")
+        n += 1
+    arch_final = archive_dir_for(final)
+    arch_part = arch_final + ".part"
+    archives = sorted(glob.glob(os.path.join(archive_dir, "reports_*.sqlite3")))
+    # (kaynak, geçici kopya) çiftleri; ilki ana veritabanı
+    jobs = [(src_path, final + ".part")]
+    jobs += [(a, os.path.join(arch_part, os.path.basename(a))) for a in archives]
+
+    opts = dict(pages_per_step=pages_per_step, pause=step_sleep_ms / 1000.0, max_restarts=max_restarts)
+    t0 = time.perf_counter()
+    results = []
+    try:
+        if archives:
+            os.makedirs(arch_part, exist_ok=True)
+        for src, part in jobs:
+            res = _copy_db(src, part, **opts)
+            if not res["integrity_ok"]:
+                raise RuntimeError(f"Yedek bütünlük kontrolünden geçmedi: {part}")
+            results.append(res)
+    except BaseException:
+        _remove_quietly(final + ".part")
+        shutil.rmtree(arch_part, ignore_errors=True)
+        raise
+    elapsed = time.perf_counter() - t0
+
+    os.replace(final + ".part", final)
+    if archives:
+        os.replace(arch_part, arch_final)
+    removed = rotate_backups(backup_dir, keep)
+    main_res = results[0]
+    return {
+        "path": final,
+        "bytes": os.path.getsize(final),
+        "pages": main_res["pages"],
+        "steps": sum(r["steps"] for r in results),
+        "restarts": sum(r["restarts"] for r in results),
+        "mode": main_res["mode"],
+        "archives": [os.path.join(arch_final, os.path.basename(a)) for a in archives],
+        "seconds": round(elapsed, 3),
+        "integrity": "ok",
+        "removed": removed,
+    }
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def main():
+    ap = argparse.ArgumentParser(
+        description="SQLite çevrimiçi yedekleme. Tek sefer: `python -m app.services.backup_service`; "
+                    "zamanlanmış: `--loop` (veya cron ile tek sefer çağırın)."
+    )
+    ap.add_argument("--loop", action="store_true", help="Sürekli çalış, her aralıkta bir yedek al.")
+    ap.add_argument("--interval-hours", type=float, default=BACKUP_INTERVAL_HOURS)
+    ap.add_argument("--keep", type=int, default=BACKUP_KEEP)
+    ap.add_argument("--pages", type=int, default=BACKUP_PAGES_PER_STEP)
+    ap.add_argument("--sleep-ms", type=int, default=BACKUP_STEP_SLEEP_MS)
+    args = ap.parse_args()
+
+    while True:
+        try:
+            res = run_backup(pages_per_step=args.pages, step_sleep_ms=args.sleep_ms, keep=args.keep)
+            print(f"[backup] {res['path']} ({res['bytes']} bayt, {res['steps']} adım, {res['seconds']} sn)")
+            for a in res["archives"]:
+                print(f"[backup]   arşiv: {a}")
+            for f in res["removed"]:
+                print(f"[backup] silindi: {f}")
+        except Exception as e:
+            print(f"[err] Yedekleme başarısız: {e}")
+            if not args.loop:
+                raise SystemExit(1)
+        if not args.loop:
+            break
+        time.sleep(max(60.0, args.interval_hours * 3600))
+
+if __name__ == "__main__":
+    main()
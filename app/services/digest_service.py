@@ -0,0 +1,304 @@
+from __future__ import annotations
+import argparse, json, os, smtplib, time
+from dataclasses import dataclass
+from datetime import date, datetime, time as dtime, timedelta
+from email.message import EmailMessage
+from typing import Dict, List, Optional, Protocol
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.config import (
+    DIGEST_TIME, DIGEST_LOOKBACK_DAYS, NOTIFY_SENDER, NOTIFY_FILE, NOTIFY_MAX_ATTEMPTS,
+    SMTP_HOST, SMTP_PORT, SMTP_FROM, NOTIFY_EMAIL_DOMAIN,
+)
+from app.db.database import SessionLocal
+from app.db.models import Notification, User
+from app.db.repository import (
+    add_unread, list_departments_rows, list_managers_for_users, list_notifications_by_ref,
+    list_pending_notifications, list_users_rows, missing_report_pairs, notify, who_is_off,
+)
+from app.services.workday_service import load_calendar
+from app.utils.dates import now_tr
+
+# Gün sonu eksik rapor özeti.
+# Tek geçişte tüm departmanlar için eksik (kullanıcı, departman) çiftleri bulunur, o gün izinli olanlar
+# düşülür ve her yöneticiye (org_closure'da kullanıcının atası olan lider/dept_lead) bir özet satırı
+# notifications tablosuna yazılır. Yeniden hesaplama idempotenttir: dedupe_key (gün + yönetici) ile
+# mevcut satır bulunur, yalnızca içeriği değişen satırlar güncellenir; herkes raporunu girdiyse
+# özet iptal edilir (cancelled). Gönderim ayrı adımdır: pending satırlar seçilen göndericiyle iletilir.
+
+KIND_MISSING_DIGEST = "missing_digest"
+
+
+# ----------------- göndericiler -----------------
+
+class Sender(Protocol):
+    def send(self, n: Notification, recipient: User) -> None: ...
+
+
+class FileSender:
+    """Her bildirimi JSON satırı olarak dosyaya ekler (yerel/test ortamı)."""
+
+    def __init__(self, path: str = NOTIFY_FILE):
+        self.path = path
+
+    def send(self, n: Notification, recipient: User) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        rec = {
+            "id": n.id, "to": recipient.username, "kind": n.kind, "title": n.title, "body": n.body,
+            "ref_date": n.ref_date.isoformat() if n.ref_date else None,
+            "sent_at": datetime.utcnow().isoformat(timespec="seconds"),
+        }
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+
+
+class SmtpSender:
+    """Yerel/kurum SMTP sunucusu üzerinden düz metin e-posta."""
+
+    def __init__(self, host: str = SMTP_HOST, port: int = SMTP_PORT, sender: str = SMTP_FROM,
+                 domain: str = NOTIFY_EMAIL_DOMAIN):
+        self.host, self.port, self.sender, self.domain = host, port, sender, domain
+
+    def address(self, u: User) -> str:
+        if "@" in u.username or not self.domain:
+            return u.username
+        return f"{u.username}@{self.domain}"
+
+    def send(self, n: Notification, recipient: User) -> None:
+        msg = EmailMessage()
+        msg["From"] = self.sender
+        msg["To"] = self.address(recipient)
+        msg["Subject"] = n.title
+        msg.set_content(n.body)
+        with smtplib.SMTP(self.host, self.port, timeout=10) as smtp:
+            smtp.send_message(msg)
+
+
+class LogSender:
+    def send(self, n: Notification, recipient: User) -> None:
+        print(f"[notify] -> {recipient.username}: {n.title}")
+
+
+SENDERS = {"file": FileSender, "smtp": SmtpSender, "log": LogSender}
+
+
+def get_sender(name: str = NOTIFY_SENDER) -> Sender:
+    try:
+        return SENDERS[name]()
+    except KeyError:
+        raise ValueError(f"Bilinmeyen gönderici: {name} (seçenekler: {', '.join(SENDERS)})")
+
+
+# ----------------- özet hesaplama -----------------
+
+@dataclass
+class DigestResult:
+    day: date
+    created: int = 0
+    updated: int = 0
+    cancelled: int = 0
+    unchanged: int = 0
+    skipped: Optional[str] = None
+
+
+def is_business_day(db: Session, d: date) -> bool:
+    cal = load_calendar(db)
+    return bool(np.is_busday(np.datetime64(d, "D"), weekmask=cal.weekmask, holidays=cal.holidays))
+
+
+def compute_missing_digests(db: Session, *, d: date) -> Dict[int, dict]:
+    """Yönetici id -> özet içeriği {"day", "items": [{"user_id", "name", "departments"}]}."""
+    pairs = missing_report_pairs(db, d=d)
+    if not pairs:
+        return {}
+    off = set(who_is_off(db, d=d))
+    missing: Dict[int, List[int]] = {}
+    for uid, dep_id in pairs:
+        if uid not in off:
+            missing.setdefault(uid, []).append(dep_id)
+    if not missing:
+        return {}
+    per_manager: Dict[int, List[int]] = {}
+    for manager_id, uid in list_managers_for_users(db, user_ids=sorted(missing)):
+        per_manager.setdefault(manager_id, []).append(uid)
+    if not per_manager:
+        return {}
+
+    names = {u.id: u.display_name for u in list_users_rows(db)}
+    dep_names = {dep.id: dep.name for dep in list_departments_rows(db)}
+    out: Dict[int, dict] = {}
+    for manager_id, uids in per_manager.items():
+        items = [
+            {"user_id": uid, "name": names.get(uid, f"#{uid}"),
+             "departments": sorted(dep_names.get(x, f"#{x}") for x in missing[uid])}
+            for uid in uids
+        ]
+        items.sort(key=lambda it: (it["name"], it["user_id"]))
+        out[manager_id] = {"day": d.isoformat(), "items": items}
+    return out
+
+
+def _render(payload: dict) -> tuple:
+    items = payload["items"]
+    title = f"{payload['day']}: {len(items)} kişi rapor girmedi"
+    lines = [f"{payload['day']} günü raporu eksik olanlar ({len(items)}):"]
+    lines += [f"- {it['name']} ({', '.join(it['departments'])})" for it in items]
+    return title, "\n".join(lines)
+
+
+def sync_missing_digests(db: Session, *, d: date) -> DigestResult:
+    """
+    d günü özetlerini tabloyla eşitler (idempotent). Kurallar:
+    - yeni yönetici → pending satır
+    - içerik değişti: pending/failed ise yerinde güncellenir; gönderilmişse liste yalnızca
+      kısaldıysa (geç raporlar) sessizce güncellenir, yeni kişi eklendiyse tekrar pending olur
+    - artık eksik yok → cancelled
+    - gün sonradan tatil oldu → o günün tüm özetleri cancelled
+    """
+    res = DigestResult(day=d)
+    have = {n.user_id: n for n in list_notifications_by_ref(db, kind=KIND_MISSING_DIGEST, ref_date=d)}
+    if not is_business_day(db, d):
+        # Özetler yazıldıktan sonra tatil eklenmiş olabilir: bekleyenler gönderilmesin
+        res.skipped = "iş günü değil"
+        for n in have.values():
+            res.cancelled += _cancel(db, n)
+        db.commit()
+        return res
+    want = compute_missing_digests(db, d=d)
+
+    for manager_id, payload in want.items():
+        payload_json = json.dumps(payload, ensure_ascii=False)  # notify() ile aynı biçim
+        title, body = _render(payload)
+        n = have.get(manager_id)
+        if n is None:
+            notify(
+                db, user_id=manager_id, kind=KIND_MISSING_DIGEST, title=title, body=body, payload=payload,
+                ref_date=d, status="pending", dedupe_key=f"{KIND_MISSING_DIGEST}:{d.isoformat()}:{manager_id}",
+            )
+            res.created += 1
+            continue
+        if n.payload_json == payload_json and n.status != "cancelled":
+            res.unchanged += 1
+            continue
+        old_ids = {it["user_id"] for it in json.loads(n.payload_json or "{}").get("items", [])}
+        new_ids = {it["user_id"] for it in payload["items"]}
+        was_unread = n.status != "cancelled" and n.read_at is None
+        if n.status in ("sent", "cancelled") and not new_ids <= old_ids:
+            n.status, n.attempts, n.last_error, n.read_at = "pending", 0, None, None
+        elif n.status == "cancelled":
+            n.status = "sent" if n.sent_at else "pending"
+        n.title, n.body, n.payload_json = title, body, payload_json
+        if not was_unread and n.read_at is None:
+            add_unread(db, user_id=manager_id, delta=1)
+        res.updated += 1
+
+    for manager_id, n in have.items():
+        if manager_id not in want:
+            res.cancelled += _cancel(db, n)
+    db.commit()
+    return res
+
+
+def _cancel(db: Session, n: Notification) -> int:
+    """Özeti iptal eder (okunmamışsa sayaç düşer); zaten iptalse 0 döner."""
+    if n.status == "cancelled":
+        return 0
+    if n.read_at is None:
+        add_unread(db, user_id=n.user_id, delta=-1)
+    n.status = "cancelled"
+    return 1
+
+
+def deliver_pending(db: Session, *, sender: Sender, limit: int = 100,
+                    max_attempts: int = NOTIFY_MAX_ATTEMPTS) -> tuple:
+    """Pending bildirimleri iletir. Hata alan satır tekrar denenir; max_attempts sonrası failed. (gönderilen, hatalı)"""
+    sent = failed = 0
+    for n in list_pending_notifications(db, limit=limit):
+        recipient = db.get(User, n.user_id)
+        if recipient is None:
+            # Alıcı silinmiş: tekrar denemenin anlamı yok
+            n.status, n.last_error = "cancelled", "alıcı bulunamadı"
+            db.commit()
+            continue
+        try:
+            sender.send(n, recipient)
+        except Exception as e:
+            n.attempts += 1
+            n.last_error = str(e)[:500]
+            if n.attempts >= max_attempts:
+                n.status = "failed"
+            failed += 1
+        else:
+            n.attempts += 1
+            n.status, n.sent_at, n.last_error = "sent", datetime.utcnow(), None
+            sent += 1
+        db.commit()  # satır satır: gönderilmiş bir bildirim tekrar gönderilmesin
+    return sent, failed
+
+
+# ----------------- zamanlayıcı -----------------
+
+def _parse_hm(s: str) -> dtime:
+    h, m = s.strip().split(":")
+    return dtime(int(h), int(m))
+
+
+def days_to_sync(now: datetime, *, at: str = DIGEST_TIME, lookback: int = DIGEST_LOOKBACK_DAYS) -> List[date]:
+    """Özet saati geçtiyse bugün, ayrıca geç raporlar için önceki `lookback` gün (eskiden yeniye)."""
+    today = now.date()
+    days = [today - timedelta(days=i) for i in range(lookback, 0, -1)]
+    if now.time() >= _parse_hm(at):
+        days.append(today)
+    return days
+
+
+def run_once(*, days: List[date], sender: Sender, deliver: bool = True) -> List[DigestResult]:
+    db = SessionLocal()
+    try:
+        results = [sync_missing_digests(db, d=d) for d in days]
+        if deliver:
+            sent, failed = deliver_pending(db, sender=sender)
+            print(f"[digest] gönderilen {sent}, hatalı {failed}")
+        return results
+    finally:
+        db.close()
+
+
+def _print(res: DigestResult) -> None:
+    if res.skipped:
+        print(f"[digest] {res.day}: atlandı ({res.skipped})" + (f", iptal {res.cancelled}" if res.cancelled else ""))
+    else:
+        print(f"[digest] {res.day}: yeni {res.created}, güncellenen {res.updated}, "
+              f"iptal {res.cancelled}, değişmeyen {res.unchanged}")
+
+
+def main():
+    ap = argparse.ArgumentParser(
+        description="Gün sonu eksik rapor özeti. Tek sefer: `python -m app.services.digest_service --date 2026-06-29`; "
+                    f"zamanlanmış: `--loop` (her gün {DIGEST_TIME} sonrası hesaplar, geç raporlarla tazeler)."
+    )
+    ap.add_argument("--loop", action="store_true", help="Sürekli çalış.")
+    ap.add_argument("--date", type=date.fromisoformat, help="Yalnızca bu gün (YYYY-MM-DD).")
+    ap.add_argument("--sender", default=NOTIFY_SENDER, choices=sorted(SENDERS))
+    ap.add_argument("--no-deliver", action="store_true", help="Yalnızca hesapla, gönderme.")
+    ap.add_argument("--check-minutes", type=float, default=10.0, help="--loop: kontrol aralığı")
+    args = ap.parse_args()
+
+    sender = get_sender(args.sender)
+    while True:
+        days = [args.date] if args.date else days_to_sync(now_tr())
+        try:
+            for res in run_once(days=days, sender=sender, deliver=not args.no_deliver):
+                _print(res)
+        except Exception as e:
+            print(f"[err] Özet başarısız: {e}")
+            if not args.loop:
+                raise SystemExit(1)
+        if not args.loop:
+            break
+        time.sleep(max(30.0, args.check_minutes * 60))
+
+if __name__ == "__main__":
+    main()
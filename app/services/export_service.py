@@ -2,8 +2,9 @@ from __future__ import annotations
 import uuid, pandas as pd
 from typing import Sequence
 from app.db.models import Report
+from app.db.read_models import ReportRow
 
-def export_reports_dataframe(reports: Sequence[Report]) -> str:
+def export_reports_dataframe(reports: Sequence[Report | ReportRow]) -> str:
     """Raporları CSV dosyasına yazar ve dosya yolunu döner."""
     rows = []
     for r in reports:
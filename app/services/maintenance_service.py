@@ -0,0 +1,216 @@
+from __future__ import annotations
+import argparse, json, sqlite3, time
+from datetime import date, datetime, time as dtime, timedelta
+from typing import List, Optional
+
+from app.core.config import (
+    MAINT_QUIET_START, MAINT_QUIET_END, MAINT_TIME_BUDGET_S, MAINT_ANALYZE_EVERY_HOURS,
+    MAINT_VACUUM_PAGES_PER_STEP, MAINT_BUSY_TIMEOUT_MS,
+)
+from app.db.database import sqlite_db_path
+from app.utils.dates import now_tr
+
+
+def _parse_hm(s: str) -> dtime:
+    h, m = s.strip().split(":")
+    return dtime(int(h), int(m))
+
+
+def in_quiet_hours(now: Optional[datetime] = None, start: str = MAINT_QUIET_START, end: str = MAINT_QUIET_END) -> bool:
+    """Sessiz saat penceresinde mi? Pencere gece yarısını aşabilir (ör. 23:00-05:00)."""
+    t = (now or now_tr()).time()
+    a, b = _parse_hm(start), _parse_hm(end)
+    return a <= t < b if a <= b else (t >= a or t < b)
+
+
+def _window_day(now: datetime) -> date:
+    """Pencere gece yarısını aşıyorsa (23:00-05:00) gece yarısından sonrası önceki güne sayılır."""
+    if _parse_hm(MAINT_QUIET_START) > _parse_hm(MAINT_QUIET_END) and now.time() < _parse_hm(MAINT_QUIET_END):
+        return now.date() - timedelta(days=1)
+    return now.date()
+
+
+def _last_analyze(conn: sqlite3.Connection) -> Optional[datetime]:
+    row = conn.execute("SELECT MAX(started_at) FROM maintenance_runs WHERE analyzed = 1").fetchone()
+    return datetime.fromisoformat(row[0]) if row and row[0] else None
+
+
+def run_maintenance(
+    *,
+    db_path: Optional[str] = None,
+    budget_s: float = MAINT_TIME_BUDGET_S,
+    analyze: Optional[bool] = None,
+    vacuum_pages_per_step: int = MAINT_VACUUM_PAGES_PER_STEP,
+    convert_auto_vacuum: bool = False,
+) -> dict:
+    """
+    Sırasıyla: PRAGMA optimize -> ANALYZE (süresi geldiyse) -> auto_vacuum dönüşümü (yalnızca
+    convert_auto_vacuum ile) -> incremental_vacuum (parça parça) -> wal_checkpoint(TRUNCATE).
+    Her adımdan önce kalan süre bütçesine bakılır; bütçe biterse kalan adımlar atlanır. busy_timeout
+    kısa tutulur: kullanıcı yazarken bakım bekler, kullanıcı beklemez. Sonuç maintenance_runs tablosuna yazılır.
+    analyze: None -> MAINT_ANALYZE_EVERY_HOURS'a göre, True/False -> zorla.
+    convert_auto_vacuum: dosya henüz INCREMENTAL değilse bir kez tam VACUUM. VACUUM bütçeyle
+    bölünemez ve dosyayı özel kilit altında baştan yazar; çağıran yalnızca sessiz saatlerde istemelidir.
+    """
+    db_path = db_path or sqlite_db_path()
+    t_start = time.perf_counter()
+    deadline = t_start + budget_s
+    started_at = datetime.utcnow()
+    steps: List[dict] = []
+    reclaimed = 0
+    analyzed = False
+    ok = True
+
+    conn = sqlite3.connect(db_path, timeout=MAINT_BUSY_TIMEOUT_MS / 1000.0, isolation_level=None)
+    try:
+        conn.execute(f"PRAGMA busy_timeout={MAINT_BUSY_TIMEOUT_MS}")
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+
+        def step(name: str, fn) -> None:
+            nonlocal ok
+            if time.perf_counter() >= deadline:
+                steps.append({"step": name, "skipped": "budget"})
+                return
+            t0 = time.perf_counter()
+            try:
+                info = fn() or {}
+            except sqlite3.OperationalError as e:  # ör. database is locked
+                ok = False
+                info = {"error": str(e)}
+            steps.append({"step": name, "seconds": round(time.perf_counter() - t0, 3), **info})
+
+        def _optimize():
+            # analysis_limit: optimize'ın tetiklediği ANALYZE tablo başına sınırlı satıra bakar
+            conn.execute("PRAGMA analysis_limit=1000")
+            conn.execute("PRAGMA optimize")
+
+        step("optimize", _optimize)
+
+        if analyze is None:
+            last = _last_analyze(conn)
+            analyze = last is None or datetime.utcnow() - last >= timedelta(hours=MAINT_ANALYZE_EVERY_HOURS)
+        if analyze:
+            def _analyze():
+                nonlocal analyzed
+                conn.execute("PRAGMA analysis_limit=0")
+                conn.execute("ANALYZE")
+                analyzed = True
+            step("analyze", _analyze)
+
+        def _convert_auto_vacuum():
+            # Migration yalnızca ayarı ister; mevcut dosyada etkinleşmesi tam VACUUM gerektirir.
+            # Kilitliyse hata kaydedilir, bir sonraki --convert-auto-vacuum çalıştırmasına kalır.
+            nonlocal reclaimed
+            mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+            if mode == 2:
+                return {"auto_vacuum": mode}
+            if not convert_auto_vacuum:
+                return {"auto_vacuum": mode, "skipped": "--convert-auto-vacuum verilmedi"}
+            pages0 = conn.execute("PRAGMA page_count").fetchone()[0]
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("VACUUM")
+            pages = conn.execute("PRAGMA page_count").fetchone()[0]
+            reclaimed += max(0, pages0 - pages) * page_size
+            return {"auto_vacuum_before": mode, "auto_vacuum": conn.execute("PRAGMA auto_vacuum").fetchone()[0],
+                    "pages_before": pages0, "pages_after": pages}
+
+        step("auto_vacuum_convert", _convert_auto_vacuum)
+
+        def _vacuum():
+            nonlocal reclaimed
+            mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+            free0 = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if mode != 2:
+                return {"auto_vacuum": mode, "freelist_pages": free0,
+                        "note": "auto_vacuum INCREMENTAL değil (--convert-auto-vacuum)"}
+            rounds = 0
+            free = free0
+            while free > 0 and time.perf_counter() < deadline:
+                # execute() pragmayı tek adım (tek sayfa) ilerletir; executescript sonuna kadar çalıştırır
+                conn.executescript(f"PRAGMA incremental_vacuum({vacuum_pages_per_step});")
+                rounds += 1
+                free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            freed = (free0 - free) * page_size
+            reclaimed += freed
+            return {"freelist_before": free0, "freelist_after": free, "rounds": rounds, "reclaimed_bytes": freed}
+
+        step("incremental_vacuum", _vacuum)
+
+        def _checkpoint():
+            mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+            if mode != "wal":
+                return {"journal_mode": mode}
+            busy, log, done = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+            if busy:
+                # Okuyucu varsa TRUNCATE tamamlanamaz; en azından kopyalanabileni kopyala
+                busy, log, done = conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+                return {"mode": "PASSIVE", "busy": busy, "wal_frames": log, "checkpointed": done}
+            return {"mode": "TRUNCATE", "wal_frames": log, "checkpointed": done}
+
+        step("wal_checkpoint", _checkpoint)
+
+        seconds = round(time.perf_counter() - t_start, 3)
+        try:
+            conn.execute(
+                "INSERT INTO maintenance_runs (started_at, seconds, analyzed, reclaimed_bytes, steps_json, ok) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (started_at.isoformat(sep=" "), seconds, int(analyzed), reclaimed,
+                 json.dumps(steps, ensure_ascii=False), int(ok)),
+            )
+        except sqlite3.OperationalError as e:
+            steps.append({"step": "log", "error": str(e)})
+    finally:
+        conn.close()
+
+    return {"started_at": started_at.isoformat(timespec="seconds"), "seconds": seconds, "ok": ok,
+            "analyzed": analyzed, "reclaimed_bytes": reclaimed, "steps": steps}
+
+
+def _print(res: dict) -> None:
+    print(f"[maint] {res['started_at']} toplam {res['seconds']} sn, geri kazanılan {res['reclaimed_bytes']} bayt")
+    for s in res["steps"]:
+        extra = {k: v for k, v in s.items() if k not in ("step", "seconds")}
+        dur = f"{s['seconds']:.3f} sn" if "seconds" in s else "-"
+        print(f"[maint]   {s['step']:20s} {dur:>10s}  {json.dumps(extra, ensure_ascii=False) if extra else ''}")
+
+
+def main():
+    ap = argparse.ArgumentParser(
+        description="SQLite bakım işleri. Tek sefer: `python -m app.services.maintenance_service --force`; "
+                    "zamanlanmış: `--loop` (yalnızca sessiz saatlerde çalışır)."
+    )
+    ap.add_argument("--loop", action="store_true", help="Sürekli çalış; sessiz saatlerde günde bir kez bakım yap.")
+    ap.add_argument("--force", action="store_true", help="Sessiz saat kontrolünü atla (tek sefer).")
+    ap.add_argument("--budget", type=float, default=MAINT_TIME_BUDGET_S, help="Süre bütçesi (sn)")
+    ap.add_argument("--analyze", action="store_true", help="ANALYZE'ı süresi gelmemiş olsa da çalıştır.")
+    ap.add_argument("--convert-auto-vacuum", action="store_true",
+                    help="Dosya INCREMENTAL değilse bir kez tam VACUUM (yalnızca sessiz saatlerde; --force bunu aşmaz).")
+    ap.add_argument("--check-minutes", type=float, default=10.0, help="--loop: pencere kontrol aralığı")
+    args = ap.parse_args()
+
+    last_run_day = None
+    while True:
+        now = now_tr()
+        window_day = _window_day(now)
+        if args.force or (in_quiet_hours(now) and window_day != last_run_day):
+            # Tam VACUUM bütçeyle sınırlanamaz: --force ile bile yalnızca sessiz saatlerde
+            convert = args.convert_auto_vacuum and in_quiet_hours(now)
+            if args.convert_auto_vacuum and not convert:
+                print(f"[maint] auto_vacuum dönüşümü sessiz saat dışında atlandı ({MAINT_QUIET_START}-{MAINT_QUIET_END}).")
+            try:
+                _print(run_maintenance(budget_s=args.budget, analyze=True if args.analyze else None,
+                                       convert_auto_vacuum=convert))
+            except Exception as e:
+                print(f"[err] Bakım başarısız: {e}")
+                if not args.loop:
+                    raise SystemExit(1)
+            last_run_day = window_day
+        elif not args.loop:
+            print(f"[maint] Sessiz saat dışında ({MAINT_QUIET_START}-{MAINT_QUIET_END}); --force ile zorlayın.")
+        if not args.loop:
+            break
+        args.force = False
+        time.sleep(max(30.0, args.check_minutes * 60))
+
+if __name__ == "__main__":
+    main()
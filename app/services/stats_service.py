@@ -1,6 +1,7 @@
 from __future__ import annotations
 from typing import Sequence, Tuple
 from app.db.models import User, Report
+from app.db.read_models import ReportRow, UserRow
 
-def compute_counts(users: Sequence[User], reports: Sequence[Report]) -> Tuple[int,int]:
+def compute_counts(users: Sequence[User | UserRow], reports: Sequence[Report | ReportRow]) -> Tuple[int,int]:
     return (len(users or []), len(reports or []))
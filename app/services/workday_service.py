@@ -0,0 +1,115 @@
+from __future__ import annotations
+import threading
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import WORKWEEK
+from app.db import leave_index
+from app.db.models import Holiday
+from app.db.repository import HOLIDAYS_VERSION, cached_read, get_data_version
+from app.services.availability_service import disjoint_spans
+
+# Sabit tarihli resmi tatiller (ay, gün, ad, yarım gün). Dini bayramlar her yıl değişir;
+# yönetici sayfasından tarihleriyle eklenir.
+TR_FIXED_HOLIDAYS = [
+    (1, 1, "Yılbaşı", False),
+    (4, 23, "Ulusal Egemenlik ve Çocuk Bayramı", False),
+    (5, 1, "Emek ve Dayanışma Günü", False),
+    (5, 19, "Atatürk'ü Anma, Gençlik ve Spor Bayramı", False),
+    (7, 15, "Demokrasi ve Milli Birlik Günü", False),
+    (8, 30, "Zafer Bayramı", False),
+    (10, 28, "Cumhuriyet Bayramı Arifesi", True),
+    (10, 29, "Cumhuriyet Bayramı", False),
+]
+
+
+@dataclass(frozen=True)
+class WorkCalendar:
+    weekmask: str
+    holidays: np.ndarray   # datetime64[D], tam gün tatiller
+    half_days: np.ndarray  # datetime64[D], sıralı; yalnızca iş günü olan yarım günler
+    version: int = 0
+
+    def business_days(self, starts: Sequence[date], ends: Sequence[date]) -> np.ndarray:
+        """
+        [start, end] (iki uç dahil) aralıklarının iş günü sayıları, tek vektörel çağrıyla.
+        Yarım gün tatiller 0.5 düşülür.
+        """
+        s = np.asarray(starts, dtype="datetime64[D]")
+        e = np.asarray(ends, dtype="datetime64[D]") + 1
+        full = np.busday_count(s, e, weekmask=self.weekmask, holidays=self.holidays).astype(float)
+        if len(self.half_days):
+            half = np.searchsorted(self.half_days, e, "left") - np.searchsorted(self.half_days, s, "left")
+            full -= 0.5 * half
+        return np.maximum(full, 0.0)
+
+
+_cache: Dict[str, WorkCalendar] = {}
+_lock = threading.Lock()
+
+
+def load_calendar(db: Session, *, weekmask: str = WORKWEEK) -> WorkCalendar:
+    """Takvim; holidays sürümü değişmedikçe süreç içi önbellekten döner (tek PK okuması)."""
+    version = get_data_version(db, name=HOLIDAYS_VERSION)
+    key = f"{db.get_bind().url}|{weekmask}"
+    with _lock:
+        cal = _cache.get(key)
+        if cal is not None and cal.version == version:
+            return cal
+    rows = db.execute(select(Holiday.day, Holiday.half_day).order_by(Holiday.day)).all()
+    full = np.array([d for d, half in rows if not half], dtype="datetime64[D]")
+    half = np.array([d for d, half in rows if half], dtype="datetime64[D]")
+    # Yarım gün yalnızca çalışma günüyse düşülür (hafta sonu/tam tatile denk gelen arife sayılmaz)
+    if len(half):
+        half = half[np.is_busday(half, weekmask=weekmask, holidays=full)]
+    cal = WorkCalendar(weekmask=weekmask, holidays=full, half_days=np.sort(half), version=version)
+    with _lock:
+        _cache[key] = cal
+    return cal
+
+
+def leave_business_days(db: Session, leaves) -> Dict[int, float]:
+    """İzin id -> iş günü (start_date/end_date taşıyan ORM veya satır nesneleri)."""
+    if not leaves:
+        return {}
+    cal = load_calendar(db)
+    days = cal.business_days([lv.start_date for lv in leaves], [lv.end_date for lv in leaves])
+    return {lv.id: float(x) for lv, x in zip(leaves, days)}
+
+
+def yearly_business_days(db: Session, *, year: int, user_ids: Optional[Sequence[int]] = None) -> Dict[int, float]:
+    """
+    Kişi başına yıllık izin iş günü toplamı: yılla kesişen tüm izinler yıla kırpılır, kişi içi
+    çakışmalar ayrıştırılır, iş günleri tek busday_count ile sayılır ve bincount ile toplanır.
+    Sonuç izin ve tatil sürümleriyle "rollup" önbelleğinde tutulur.
+    """
+    key = ("yearly_business_days", year, WORKWEEK, None if user_ids is None else tuple(sorted(user_ids)))
+    return cached_read(
+        db, cache_name="rollup", versions=(leave_index.VERSION_NAME, HOLIDAYS_VERSION), key=key,
+        load=lambda: _yearly_business_days(db, year=year, user_ids=user_ids),
+    )
+
+
+def _yearly_business_days(db: Session, *, year: int, user_ids: Optional[Sequence[int]]) -> Dict[int, float]:
+    start, end = date(year, 1, 1), date(year, 12, 31)
+    leaves = leave_index.get_index(db).overlaps(start, end, set(user_ids) if user_ids is not None else None)
+    if not leaves:
+        return {}
+    n = len(leaves)
+    users = np.fromiter((r.user_id for r in leaves), dtype=np.int64, count=n)
+    s = np.fromiter(((r.start_date - start).days for r in leaves), dtype=np.int64, count=n)
+    e = np.fromiter(((r.end_date - start).days for r in leaves), dtype=np.int64, count=n)
+    last = (end - start).days
+    users, s, e = disjoint_spans(users, np.clip(s, 0, last), np.clip(e, 0, last))
+
+    base = np.datetime64(start, "D")
+    cal = load_calendar(db)
+    days = cal.business_days(base + s, base + e)
+    uniq, inv = np.unique(users, return_inverse=True)
+    totals = np.bincount(inv, weights=days, minlength=len(uniq))
+    return {int(u): float(t) for u, t in zip(uniq, totals)}
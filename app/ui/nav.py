@@ -1,9 +1,18 @@
 from __future__ import annotations
+import json, os, sys
 import streamlit as st
 from app.core.rbac import (
     ROLE_ANON, ROLE_USER, ROLE_LEAD, ROLE_DEPT_LEAD, ROLE_ADMIN,
     role_weight, current_role, normalize_role
 )
+from app.core import metrics
+from app.db import profiler
+from app.db.database import SessionLocal
+from app.db.repository import get_unread_count
+
+_QPROF_CUR = "_qprof_current"
+_QPROF_HIST = "_qprof_history"
+_QPROF_KEEP = 20
 
 def _auth_info():
     auth = st.session_state.get("auth") or {}
@@ -19,7 +28,81 @@ def _safe_page_link(path: str, label: str, icon: str = ""):
     except Exception:
         st.sidebar.write(f"{icon} {label}")
 
+def _unread_badge(user_id: int) -> str:
+    """Okunmamış bildirim sayısı: notification_counters satırının PK okuması (COUNT(*) yok)."""
+    db = SessionLocal()
+    try:
+        n = get_unread_count(db, user_id=user_id)
+    finally:
+        db.close()
+    return f"Bildirimler ({n})" if n else "Bildirimler"
+
+def _touch_metrics():
+    """/metrics sunucusunu (METRICS_PORT) süreç başına bir kez başlatır; oturumu aktif sayar."""
+    metrics.ensure_metrics_server()
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+        if ctx is not None:
+            metrics.touch_session(ctx.session_id)
+    except Exception:
+        pass
+
+def _begin_query_profile(page: str):
+    """
+    Bu rerun için yeni profil başlatır. Profil normalde sayfa sonunda finish_query_profile ile
+    kapanır; guard'sız bir script'ten kalan açık profil varsa burada kapatılır.
+    (Panel build_sidebar içinde, sayfa kodundan önce çizildiği için bir önceki rerun'ı gösterir.)
+    """
+    finish_query_profile()
+    cur = profiler.QueryProfile(page)
+    st.session_state[_QPROF_CUR] = cur
+    profiler.activate(cur)
+
+
+def finish_query_profile():
+    """Aktif profili kapatıp geçmişe ekler; script çalıştırmasının sonunda çağrılır (require_min_role)."""
+    cur = st.session_state.pop(_QPROF_CUR, None)
+    profiler.activate(None)
+    if cur is None:
+        return
+    hist = st.session_state.setdefault(_QPROF_HIST, [])
+    hist.append(cur.finish().to_dict())
+    del hist[:-_QPROF_KEEP]
+
+
+def _render_query_profile_panel():
+    hist = st.session_state.get(_QPROF_HIST) or []
+    with st.sidebar.expander("🔬 Sorgu Profili", expanded=False):
+        if not hist:
+            st.caption("Henüz ölçüm yok; sayfayı bir kez yenileyin.")
+            return
+        last = hist[-1]
+        st.caption(f"Son çalıştırma: **{last['page']}** · {last['started_at']}")
+        c1, c2 = st.columns(2)
+        c1.metric("Sorgu", last["query_count"])
+        c2.metric("DB süresi", f"{last['total_ms']:.1f} ms")
+        st.caption(f"En yavaş: {last['slowest_ms']:.1f} ms")
+        if last["slowest_sql"]:
+            st.code(last["slowest_sql"][:400], language="sql")
+        if last["n_plus_one"]:
+            st.warning(f"Olası N+1: {len(last['n_plus_one'])} tekrar eden ifade")
+            for x in last["n_plus_one"][:5]:
+                st.caption(f"×{x['count']} · {x['total_ms']:.1f} ms — `{x['shape'][:160]}`")
+        st.download_button(
+            "JSON indir",
+            data=json.dumps({"profiles": hist}, ensure_ascii=False, indent=2),
+            file_name="query_profile.json",
+            mime="application/json",
+            key="qprof_download",
+        )
+
+
 def build_sidebar():
+    caller = sys._getframe(1).f_globals.get("__file__") or "?"
+    _begin_query_profile(os.path.splitext(os.path.basename(caller))[0])
+    _touch_metrics()
+
     st.sidebar.markdown("### 📝 Günlük Raporlama")
 
     # Giriş yoksa sadece "Giriş"
@@ -36,6 +119,9 @@ def build_sidebar():
     _safe_page_link("pages/01_Rapor_Yaz.py", "Rapor Yaz", "📝")
     _safe_page_link("pages/02_Gecmisim.py", "Geçmişim", "📜")
     _safe_page_link("pages/03_Departman_Raporlari.py", "Departman Raporları", "🏢")
+    _safe_page_link("pages/11_Bildirimler.py", _unread_badge(st.session_state["auth"]["user_id"]), "🔔")
+    if role in (ROLE_LEAD, ROLE_DEPT_LEAD, ROLE_ADMIN):
+        _safe_page_link("pages/10_Ekip_Musaitlik.py", "Ekip Müsaitlik", "📆")
 
     # Admin sayfaları
     if role == ROLE_ADMIN:
@@ -43,6 +129,7 @@ def build_sidebar():
         st.sidebar.markdown("**Admin Paneli**")
         _safe_page_link("pages/05_Raporlama_Istatistik.py", "Raporlama & İstatistik", "📊")
         _safe_page_link("pages/04_Yonetim.py", "Yönetim", "🛠️")
+        _render_query_profile_panel()
 
     st.sidebar.markdown("---")
     _safe_page_link("pages/99_Cikis.py", "Çıkış", "🚪")
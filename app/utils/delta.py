@@ -0,0 +1,51 @@
+from __future__ import annotations
+import json
+import zlib
+from difflib import SequenceMatcher
+from typing import List, Union
+
+# Fark formatı: satır bazlı op listesi
+#   [i1, i2]  -> önceki sürümün a[i1:i2] satırlarını kopyala
+#   "metin"   -> yeni eklenen/değişen satırlar
+DeltaOp = Union[List[int], str]
+
+_LEVEL = 9
+
+
+def _lines(s: str) -> List[str]:
+    return (s or "").splitlines(keepends=True)
+
+def make_delta(prev: str, new: str) -> List[DeltaOp]:
+    """prev -> new dönüşümü için satır bazlı kopya/ekle op listesi üretir."""
+    a, b = _lines(prev), _lines(new)
+    ops: List[DeltaOp] = []
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif tag in ("replace", "insert"):
+            ops.append("".join(b[j1:j2]))
+        # "delete": hiçbir şey yazma
+    return ops
+
+def apply_delta(prev: str, ops: List[DeltaOp]) -> str:
+    a = _lines(prev)
+    out: List[str] = []
+    for op in ops:
+        if isinstance(op, str):
+            out.append(op)
+        else:
+            out.extend(a[op[0]:op[1]])
+    return "".join(out)
+
+def encode_snapshot(text: str) -> bytes:
+    return zlib.compress((text or "").encode("utf-8"), _LEVEL)
+
+def decode_snapshot(payload: bytes) -> str:
+    return zlib.decompress(payload).decode("utf-8")
+
+def encode_delta(prev: str, new: str) -> bytes:
+    ops = make_delta(prev, new)
+    return zlib.compress(json.dumps(ops, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), _LEVEL)
+
+def decode_delta(prev: str, payload: bytes) -> str:
+    return apply_delta(prev, json.loads(zlib.decompress(payload).decode("utf-8")))
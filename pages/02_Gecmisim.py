@@ -3,7 +3,9 @@ import json
 import streamlit as st
 from app.core.rbac import require_min_role, ROLE_USER
 from app.db.database import SessionLocal
-from app.db.repository import list_user_reports, create_report_revision
+from app.db.repository import (
+    list_user_reports_rows, create_report_revision, list_report_revisions, get_report_revision_content,
+)
 from app.utils.dates import today_tr, now_tr, fmt_hm_tr, daterange_days, parse_iso_dt
 from app.ui.nav import build_sidebar  # ← ek
 
@@ -29,7 +31,7 @@ def page():
     # ---- Kayıtları getir
     db = SessionLocal()
     try:
-        reports = list_user_reports(db, user_id=uid, start=start_d, end=end_d, q=q or None)
+        reports = list_user_reports_rows(db, user_id=uid, start=start_d, end=end_d, q=q or None)
     finally:
         db.close()
 
@@ -61,6 +63,34 @@ def page():
         with st.expander(header, expanded=False):
             st.markdown(r.content)
 
+            # Sürüm geçmişi (içerik yalnızca seçilen sürüm için kurulur)
+            if st.toggle("🕘 Sürüm geçmişi", key=f"hist_{r.id}"):
+                db = SessionLocal()
+                try:
+                    revs = list_report_revisions(db, report_id=r.id, d=r.date)
+                    if not revs:
+                        st.caption("Bu rapor için önceki sürüm yok.")
+                    else:
+                        raw = sum(x.raw_size for x in revs)
+                        stored = sum(x.stored_size for x in revs)
+                        st.caption(
+                            f"{len(revs)} sürüm · saklanan {stored:,} bayt / tam kopya {raw:,} bayt"
+                            + (f" (%{100 * stored / raw:.0f})" if raw else "")
+                        )
+                        rev_no = st.selectbox(
+                            "Sürüm",
+                            options=[x.rev_no for x in revs],
+                            format_func=lambda n: next(
+                                f"#{x.rev_no} · {fmt_hm_tr(x.created_at)} · 🏷️ {x.project or '-'}"
+                                for x in revs if x.rev_no == n
+                            ),
+                            key=f"hist_sel_{r.id}",
+                        )
+                        old = get_report_revision_content(db, report_id=r.id, rev_no=rev_no, d=r.date)
+                        st.markdown(old if old is not None else "_Sürüm okunamadı._")
+                finally:
+                    db.close()
+
             # Sadece bugünün raporu düzenlenebilir
             if r.date == today:
                 st.info("Bu raporu düzenlerseniz mevcut kayıt korunur; **yeni bir 'değişmiş' kayıt** oluşturulur.")
@@ -79,6 +109,7 @@ def page():
                             create_report_revision(
                                 db,
                                 user_id=uid,
+                                department_id=r.department_id,
                                 d=today,
                                 content=new_content.strip(),
                                 project=(new_project or None),
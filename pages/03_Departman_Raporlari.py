@@ -4,15 +4,16 @@ import streamlit as st
 from datetime import date
 from typing import List, Optional
 
-from app.core.rbac import require_min_role, ROLE_USER, ROLE_ADMIN, ROLE_LEAD, ROLE_DEPT_LEAD
+from app.core.acl import Acl, current_acl
+from app.core.rbac import require_min_role, ROLE_USER
 from app.db.database import SessionLocal
 from app.db.repository import (
-    list_departments,
+    list_departments_rows,
     list_user_ids_in_department,
-    list_reports_for_department,
-    list_comments_tree_by_report_ids,
-    missing_reports_for_department_and_date,
-    list_users_simple,
+    list_reports_for_department_rows,
+    list_comments_tree_rows,
+    missing_reports_for_department_and_date_rows,
+    list_users_rows,
     add_comment,
 )
 from app.utils.dates import today_tr, fmt_hm_tr, parse_iso_dt
@@ -21,28 +22,25 @@ from app.ui.nav import build_sidebar
 st.set_page_config(page_title="Departman Raporları", page_icon="🏢", initial_sidebar_state="expanded")
 build_sidebar()
 
-# Flash anahtarı (yorum sonrası başarı mesajı)
-COMMENT_FLASH_KEY = "comment_saved_flash"
+# report_id -> fragment'ın yorum ekledikten sonra okuduğu güncel yorum ağacı
+THREAD_FRESH_KEY = "dept_report_threads"
+FLASH_KEY = "dept_thread_flash"  # report_id -> (ikon, mesaj); geri çağrılar öğe çizemez, fragment gösterir
 
 @require_min_role(ROLE_USER)
 def page():
     st.title("🏢 Departman Raporları")
 
-    # Flash mesajı (varsa göster ve temizle)
-    if st.session_state.get(COMMENT_FLASH_KEY):
-        st.success(st.session_state[COMMENT_FLASH_KEY])
-        del st.session_state[COMMENT_FLASH_KEY]
-
-    # Tüm departmanlar
+    # Görülebilen departmanlar (ACL; filtre SQL'de)
     db = SessionLocal()
     try:
-        deps = list_departments(db)
-        users_all = list_users_simple(db)  # isim haritası için
+        acl = current_acl(db)
+        deps = list_departments_rows(db, visible_department_ids=acl.department_ids) if acl else []
+        users_all = list_users_rows(db) if deps else []  # isim haritası için
     finally:
         db.close()
 
     if not deps:
-        st.info("Sistemde departman bulunmuyor.")
+        st.info("Görüntüleyebileceğiniz departman bulunmuyor.")
         return
 
     dep_id = st.selectbox(
@@ -57,7 +55,9 @@ def page():
     # Departmandaki kullanıcılar (çoktan-çoka)
     db = SessionLocal()
     try:
-        user_ids: List[int] = list_user_ids_in_department(db, department_id=dep_id)
+        user_ids: List[int] = list_user_ids_in_department(
+            db, department_id=dep_id, visible_department_ids=acl.department_ids
+        )
     finally:
         db.close()
 
@@ -66,21 +66,22 @@ def page():
         return
 
     # İsim haritası
-    name_map = {u.id: (u.full_name or u.username) for u in users_all}
-
-    auth = st.session_state.get("auth") or {}
-    current_uid: Optional[int] = auth.get("user_id")
-    current_role = auth.get("role", "user")
+    name_map = {u.id: u.display_name for u in users_all}
 
     # ---------- Raporlar
     st.subheader("Raporlar")
     db = SessionLocal()
     try:
-        reports = list_reports_for_department(db, department_id=dep_id, d=d)
-        tree_map = list_comments_tree_by_report_ids(db, report_ids=[r.id for r in reports])
+        reports = list_reports_for_department_rows(
+            db, department_id=dep_id, d=d, visible_department_ids=acl.department_ids
+        )
+        tree_map = list_comments_tree_rows(db, report_ids=[r.id for r in reports], start=d)
     finally:
         db.close()
 
+    # Yorum fragment'larının tazeledikleri ağaçlar; tam çalıştırmada tree_map zaten taze
+    st.session_state[THREAD_FRESH_KEY] = {}
+
     if not reports:
         st.info("Seçilen günde rapor bulunmuyor.")
     else:
@@ -89,103 +90,16 @@ def page():
             with st.expander(f"👤 {owner} · 📅 {r.date} · 🏷️ {r.project or '-'}", expanded=False):
                 # Rapor içeriği
                 st.markdown(r.content)
-
-                # Yorumlar (herkes görebilir)
-                cmts = tree_map.get(r.id, [])
-                if cmts:
-                    st.markdown("**Yorumlar**")
-                    for c, depth in cmts:
-                        who = name_map.get(c.author_user_id, f"#{c.author_user_id}")
-                        ts = fmt_hm_tr(parse_iso_dt(c.created_at.isoformat()))
-                        prefix = ">" * depth  # basit iç içe görünüm
-                        st.markdown(f"{prefix} **_{who}_ — {ts}**  \n{prefix} {c.content}")
-
-                        # ---- Yanıt hakkı: SADECE rapor sahibi; admin/lead/dept_lead yanıtlayamaz; kişi kendi yorumuna da yanıt yazamaz
-                        can_reply = (
-                            current_uid == r.user_id
-                            and current_role not in (ROLE_ADMIN, ROLE_LEAD, ROLE_DEPT_LEAD)
-                            and c.author_user_id != current_uid
-                        )
-                        if can_reply:
-                            with st.form(f"reply_{r.id}_{c.id}"):
-                                reply_txt = st.text_area(
-                                    "Yanıt",
-                                    key=f"reply_txt_{r.id}_{c.id}",
-                                    height=90,
-                                    label_visibility="collapsed",
-                                    placeholder="Bu yoruma yanıt yazın…",
-                                )
-                                ok = st.form_submit_button("↪️ Yanıtla")
-                            if ok:
-                                still_ok = (
-                                    current_uid == r.user_id
-                                    and current_role not in (ROLE_ADMIN, ROLE_LEAD, ROLE_DEPT_LEAD)
-                                    and c.author_user_id != current_uid
-                                    and c.report_id == r.id
-                                )
-                                if not still_ok:
-                                    st.error("Bu yoruma yanıt verme yetkiniz yok.")
-                                elif not (reply_txt or "").strip():
-                                    st.error("Yanıt boş olamaz.")
-                                else:
-                                    db = SessionLocal()
-                                    try:
-                                        add_comment(
-                                            db,
-                                            report_id=r.id,
-                                            author_user_id=current_uid,
-                                            content=reply_txt.strip(),
-                                            parent_comment_id=c.id,
-                                        )
-                                    finally:
-                                        db.close()
-                                    # Flash bırak ve yenile
-                                    st.session_state[COMMENT_FLASH_KEY] = "💬 Yorum eklendi."
-                                    st.rerun()
-                else:
-                    st.caption("Henüz yorum yok.")
-
-                st.divider()
-
-                # ---- Üst seviye yorum: admin + lead + dept_lead
-                can_top_comment = current_role in (ROLE_ADMIN, ROLE_LEAD, ROLE_DEPT_LEAD)
-                if can_top_comment:
-                    st.markdown("**Yeni yorum ekle (üst seviye)**")
-                    with st.form(f"topc_{r.id}"):
-                        txt = st.text_area(
-                            "Yorum",
-                            key=f"txt_{r.id}",
-                            height=120,
-                            placeholder="Üst seviye yorumunuzu yazın…",
-                        )
-                        ok = st.form_submit_button("Ekle")
-                    if ok:
-                        if not current_uid:
-                            st.error("Oturum bilgisi bulunamadı.")
-                        elif not (txt or "").strip():
-                            st.error("Yorum boş olamaz.")
-                        else:
-                            db = SessionLocal()
-                            try:
-                                add_comment(
-                                    db,
-                                    report_id=r.id,
-                                    author_user_id=current_uid,
-                                    content=txt.strip(),
-                                    parent_comment_id=None,  # sadece üst seviye
-                                )
-                            finally:
-                                db.close()
-                            # Flash bırak ve yenile
-                            st.session_state[COMMENT_FLASH_KEY] = "💬 Yorum eklendi."
-                            st.rerun()
+                comment_thread(r, tree_map.get(r.id, []), name_map, acl)
 
     # ---------- Eksik raporlar (seçilen gün)
     st.divider()
     st.subheader("Eksik Raporlar (Seçilen Gün)")
     db = SessionLocal()
     try:
-        missing_users = missing_reports_for_department_and_date(db, department_id=dep_id, d=d)
+        missing_users = missing_reports_for_department_and_date_rows(
+            db, department_id=dep_id, d=d, visible_department_ids=acl.department_ids
+        )
     finally:
         db.close()
 
@@ -195,5 +109,120 @@ def page():
         for u in missing_users:
             st.warning(f"• {name_map.get(u.id, u.username)}")
 
+# Yorum gönderimleri form geri çağrılarıdır: yazma + bu raporun ağacını yeniden okuma
+# fragment gövdesinden önce çalışır, fragment da güncel ağacı çizer.
+def _add_and_refresh(report_id: int, report_date: date, author_user_id: int, content: str,
+                     parent_comment_id: Optional[int]) -> None:
+    db = SessionLocal()
+    try:
+        add_comment(
+            db,
+            report_id=report_id,
+            author_user_id=author_user_id,
+            content=content,
+            parent_comment_id=parent_comment_id,
+        )
+        tree = list_comments_tree_rows(db, report_ids=[report_id], start=report_date).get(report_id, [])
+    finally:
+        db.close()
+    st.session_state.setdefault(THREAD_FRESH_KEY, {})[report_id] = tree
+    _flash(report_id, "Yorum eklendi.", icon="💬")
+
+
+def _flash(report_id: int, msg: str, icon: str = "⚠️") -> None:
+    st.session_state.setdefault(FLASH_KEY, {})[report_id] = (icon, msg)
+
+
+def _fresh_acl() -> Optional[Acl]:
+    # Yazmadan önce güncel ACL (rol/üyelik bu arada değişmiş olabilir)
+    db = SessionLocal()
+    try:
+        return current_acl(db)
+    finally:
+        db.close()
+
+
+def _on_reply(r, c, key: str) -> None:
+    reply_txt = st.session_state.get(key) or ""
+    acl = _fresh_acl()
+    still_ok = (
+        acl is not None
+        and acl.can_read_department(r.department_id)
+        and acl.can_reply(r.user_id, c.author_user_id)
+        and c.report_id == r.id
+    )
+    if not still_ok:
+        _flash(r.id, "Bu yoruma yanıt verme yetkiniz yok.")
+    elif not reply_txt.strip():
+        _flash(r.id, "Yanıt boş olamaz.")
+    else:
+        _add_and_refresh(r.id, r.date, acl.user_id, reply_txt.strip(), c.id)
+
+
+def _on_top_comment(r, key: str) -> None:
+    txt = st.session_state.get(key) or ""
+    acl = _fresh_acl()
+    if acl is None:
+        _flash(r.id, "Oturum bilgisi bulunamadı.")
+    elif not acl.can_comment(r.department_id):
+        _flash(r.id, "Bu rapora yorum yapma yetkiniz yok.")
+    elif not txt.strip():
+        _flash(r.id, "Yorum boş olamaz.")
+    else:
+        _add_and_refresh(r.id, r.date, acl.user_id, txt.strip(), None)  # sadece üst seviye
+
+
+@st.fragment
+def comment_thread(r, cmts, name_map, acl: Acl):
+    """
+    Tek raporun yorumları + yorum/yanıt formları. Gönderim yalnızca bu fragment'ı yeniden
+    çalıştırır; departman, kullanıcı ve rapor sorguları tekrarlanmaz.
+    """
+    flash = st.session_state.get(FLASH_KEY, {}).pop(r.id, None)
+    if flash:
+        st.toast(flash[1], icon=flash[0])
+    cmts = st.session_state.get(THREAD_FRESH_KEY, {}).get(r.id, cmts)
+
+    # Yorumlar (herkes görebilir)
+    if cmts:
+        st.markdown("**Yorumlar**")
+        for c, depth in cmts:
+            who = name_map.get(c.author_user_id, f"#{c.author_user_id}")
+            ts = fmt_hm_tr(parse_iso_dt(c.created_at.isoformat()))
+            prefix = ">" * depth  # basit iç içe görünüm
+            st.markdown(f"{prefix} **_{who}_ — {ts}**  \n{prefix} {c.content}")
+
+            # ---- Yanıt hakkı: SADECE rapor sahibi; admin/lead/dept_lead yanıtlayamaz; kişi kendi yorumuna da yanıt yazamaz
+            if acl.can_reply(r.user_id, c.author_user_id):
+                key = f"reply_txt_{r.id}_{c.id}"
+                with st.form(f"reply_{r.id}_{c.id}", clear_on_submit=True):
+                    st.text_area(
+                        "Yanıt",
+                        key=key,
+                        height=90,
+                        label_visibility="collapsed",
+                        placeholder="Bu yoruma yanıt yazın…",
+                    )
+                    st.form_submit_button(
+                        "↪️ Yanıtla", on_click=_on_reply, args=(r, c, key)
+                    )
+    else:
+        st.caption("Henüz yorum yok.")
+
+    st.divider()
+
+    # ---- Üst seviye yorum: admin + lead + dept_lead (ACL kapsamındaki departmanlarda)
+    if acl.can_comment(r.department_id):
+        st.markdown("**Yeni yorum ekle (üst seviye)**")
+        key = f"txt_{r.id}"
+        with st.form(f"topc_{r.id}", clear_on_submit=True):
+            st.text_area(
+                "Yorum",
+                key=key,
+                height=120,
+                placeholder="Üst seviye yorumunuzu yazın…",
+            )
+            st.form_submit_button("Ekle", on_click=_on_top_comment, args=(r, key))
+
 if __name__ == "__main__":
     page()
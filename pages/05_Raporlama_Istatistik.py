@@ -3,7 +3,10 @@ import streamlit as st
 from datetime import timedelta
 from app.core.rbac import require_min_role, ROLE_LEAD, is_admin
 from app.db.database import SessionLocal
-from app.db.repository import list_departments, list_teams, list_users_by_team, list_reports_for_users
+from app.db.repository import (
+    list_departments_rows, list_teams_rows, list_users_by_team_rows, list_reports_for_users_rows,
+    list_reports_under_user, list_user_ids_under, list_users_rows,
+)
 from app.services.stats_service import compute_counts
 from app.services.export_service import export_reports_dataframe
 from app.utils.dates import today_tr
@@ -22,21 +25,38 @@ def page():
     with c2:
         end_d = st.date_input("Bitiş", value=today)
 
+    if not is_admin():
+        # Lider/departman lideri: hiyerarşide altındaki herkes (org_closure → reports tek JOIN)
+        uid = st.session_state["auth"]["user_id"]
+        db = SessionLocal()
+        try:
+            under = set(list_user_ids_under(db, user_id=uid))
+            members = [u for u in list_users_rows(db) if u.id in under]
+            reports = list_reports_under_user(db, user_id=uid, start=start_d, end=end_d)
+        finally:
+            db.close()
+        st.caption("Kapsam: hiyerarşide altınızdaki herkes")
+        report_summary(members, reports)
+        return
+
     scope = st.radio("Kapsam", ["Takım", "Departman"], horizontal=True)
     db = SessionLocal()
     try:
         if scope == "Departman":
-            deps = list_departments(db)
+            deps = list_departments_rows(db)
             dep_id = st.selectbox("Departman", options=[d.id for d in deps], format_func=lambda i: next(d.name for d in deps if d.id==i))
-            teams = [t for t in list_teams(db) if t.department_id == dep_id]
+            teams = [t for t in list_teams_rows(db) if t.department_id == dep_id]
         else:
-            teams = list_teams(db)
+            teams = list_teams_rows(db)
         team_id = st.selectbox("Takım", options=[t.id for t in teams], format_func=lambda i: next(t.name for t in teams if t.id==i))
-        members = list_users_by_team(db, team_id=team_id)
+        members = list_users_by_team_rows(db, team_id=team_id)
         user_ids = [u.id for u in members]
-        reports = list_reports_for_users(db, user_ids=user_ids, start=start_d, end=end_d, q=None)
+        reports = list_reports_for_users_rows(db, user_ids=user_ids, start=start_d, end=end_d, q=None)
     finally: db.close()
+    report_summary(members, reports)
+
 
+def report_summary(members, reports):
     total_users, total_reports = compute_counts(members, reports)
     st.metric("Üye Sayısı", total_users); st.metric("Rapor Sayısı", total_reports)
 
@@ -6,11 +6,11 @@ from typing import List, Optional
 from app.core.rbac import require_min_role, ROLE_ADMIN
 from app.db.database import SessionLocal
 from app.db.repository import (
-    list_departments,
+    list_departments_rows,
     list_user_ids_in_department,
-    list_reports_for_department,
-    list_users_simple,
-    list_comments_tree_by_report_ids,
+    list_reports_for_department_rows,
+    list_users_rows,
+    list_comments_tree_rows,
     add_comment,
 )
 from app.utils.dates import today_tr, fmt_hm_tr, parse_iso_dt
@@ -19,6 +19,10 @@ from app.ui.nav import build_sidebar
 st.set_page_config(page_title="Rapor Yorumları", page_icon="🗨️", initial_sidebar_state="expanded")
 build_sidebar()
 
+# report_id -> fragment'ın yorum ekledikten sonra okuduğu güncel yorum ağacı
+THREAD_FRESH_KEY = "admin_report_threads"
+FLASH_KEY = "admin_thread_flash"  # report_id -> (ikon, mesaj); geri çağrılar öğe çizemez, fragment gösterir
+
 @require_min_role(ROLE_ADMIN)
 def page():
     st.title("🗨️ Rapor Yorumları (Admin)")
@@ -26,8 +30,8 @@ def page():
     # Ortak veriler
     db = SessionLocal()
     try:
-        deps = list_departments(db)
-        users_all = list_users_simple(db)  # isim haritası için
+        deps = list_departments_rows(db)
+        users_all = list_users_rows(db)  # isim haritası için
     finally:
         db.close()
 
@@ -53,13 +57,13 @@ def page():
         st.info("Bu departmanda kullanıcı yok.")
         return
 
-    name_map = {u.id: (u.full_name or u.username) for u in users_all}
+    name_map = {u.id: u.display_name for u in users_all}
 
     # Raporları getir (departman + gün)
     db = SessionLocal()
     try:
-        reports = list_reports_for_department(db, department_id=dep_id, d=d)
-        tree_map = list_comments_tree_by_report_ids(db, report_ids=[r.id for r in reports])
+        reports = list_reports_for_department_rows(db, department_id=dep_id, d=d)
+        tree_map = list_comments_tree_rows(db, report_ids=[r.id for r in reports], start=d)
     finally:
         db.close()
 
@@ -67,46 +71,64 @@ def page():
         st.info("Seçilen günde rapor yok.")
         return
 
+    # Yorum fragment'larının tazeledikleri ağaçlar; tam çalıştırmada tree_map zaten taze
+    st.session_state[THREAD_FRESH_KEY] = {}
+
     for r in reports:
         owner = name_map.get(r.user_id, f"#{r.user_id}")
         with st.expander(f"👤 {owner} · 📅 {r.date} · 🏷️ {r.project or '-'}", expanded=False):
             st.markdown(r.content)
+            comment_thread(r.id, r.date, tree_map.get(r.id, []), name_map)
+
+
+def _on_comment(report_id: int, report_date: date, key: str) -> None:
+    """Form geri çağrısı: yorumu ekler ve yalnızca bu raporun ağacını yeniden okur."""
+    txt = st.session_state.get(key) or ""
+    if not txt.strip():
+        st.session_state.setdefault(FLASH_KEY, {})[report_id] = ("⚠️", "Yorum boş olamaz.")
+        return
+    db = SessionLocal()
+    try:
+        add_comment(
+            db,
+            report_id=report_id,
+            author_user_id=st.session_state["auth"]["user_id"],
+            content=txt.strip(),
+            parent_comment_id=None,  # yanıt yok
+        )
+        tree = list_comments_tree_rows(db, report_ids=[report_id], start=report_date).get(report_id, [])
+    finally:
+        db.close()
+    st.session_state.setdefault(THREAD_FRESH_KEY, {})[report_id] = tree
+    st.session_state.setdefault(FLASH_KEY, {})[report_id] = ("💬", "Yorum eklendi.")
+
+
+@st.fragment
+def comment_thread(report_id: int, report_date: date, cmts, name_map):
+    """Tek raporun yorumları + üst seviye yorum formu; gönderim yalnızca bu fragment'ı yeniden çalıştırır."""
+    flash = st.session_state.get(FLASH_KEY, {}).pop(report_id, None)
+    if flash:
+        st.toast(flash[1], icon=flash[0])
+    cmts = st.session_state.get(THREAD_FRESH_KEY, {}).get(report_id, cmts)
+
+    # Mevcut yorumlar (okuma)
+    st.markdown("**Yorumlar**")
+    if not cmts:
+        st.caption("Henüz yorum yok.")
+    else:
+        for c, depth in cmts:
+            who = name_map.get(c.author_user_id, f"#{c.author_user_id}")
+            ts = fmt_hm_tr(parse_iso_dt(c.created_at.isoformat()))
+            prefix = ">" * depth
+            st.markdown(f"{prefix} **_{who}_ — {ts}**  \n{prefix} {c.content}")
 
-            # Mevcut yorumlar (okuma)
-            cmts = tree_map.get(r.id, [])
-            st.markdown("**Yorumlar**")
-            if not cmts:
-                st.caption("Henüz yorum yok.")
-            else:
-                for c, depth in cmts:
-                    who = name_map.get(c.author_user_id, f"#{c.author_user_id}")
-                    ts = fmt_hm_tr(parse_iso_dt(c.created_at.isoformat()))
-                    prefix = ">" * depth
-                    st.markdown(f"{prefix} **_{who}_ — {ts}**  \n{prefix} {c.content}")
-
-            st.divider()
-            # SADECE ÜST SEVİYE YORUM (admin)
-            st.markdown("**Yeni yorum ekle (üst seviye)**")
-            with st.form(f"cmt_{r.id}"):
-                txt = st.text_area("Yorum", key=f"txt_{r.id}", height=120, placeholder="Yalnızca üst seviye yorum eklenir.")
-                ok = st.form_submit_button("Ekle")
-            if ok:
-                if not (txt or "").strip():
-                    st.error("Yorum boş olamaz.")
-                else:
-                    db = SessionLocal()
-                    try:
-                        add_comment(
-                            db,
-                            report_id=r.id,
-                            author_user_id=st.session_state["auth"]["user_id"],
-                            content=txt.strip(),
-                            parent_comment_id=None,  # yanıt yok
-                        )
-                        st.success("Yorum eklendi.")
-                    finally:
-                        db.close()
-                    st.rerun()
+    st.divider()
+    # SADECE ÜST SEVİYE YORUM (admin)
+    st.markdown("**Yeni yorum ekle (üst seviye)**")
+    key = f"txt_{report_id}"
+    with st.form(f"cmt_{report_id}", clear_on_submit=True):
+        st.text_area("Yorum", key=key, height=120, placeholder="Yalnızca üst seviye yorum eklenir.")
+        st.form_submit_button("Ekle", on_click=_on_comment, args=(report_id, report_date, key))
 
 if __name__ == "__main__":
     page()
@@ -6,7 +6,8 @@ from typing import Optional
 from app.core.rbac import require_min_role, ROLE_USER
 from app.db.database import SessionLocal
 from app.db.repository import (
-    create_todo, list_todos_for_user, update_todo, toggle_todo_done, delete_todo
+    create_todo, list_todos_for_user, update_todo, toggle_todo_done, delete_todo,
+    complete_todos, reopen_todos, delete_todos, set_todos_priority, reschedule_todos,
 )
 from app.ui.nav import build_sidebar
 from app.utils.dates import today_tr
@@ -21,10 +22,21 @@ PRIORITY_MAP = {
 }
 PRIORITY_REV = {v: k for k, v in PRIORITY_MAP.items()}
 
+FRESH_KEY = "todo_fresh_rows"  # todo_id -> tazelenmiş Todo (None: silindi)
+FLASH_KEY = "todo_card_flash"  # todo_id -> (ikon, mesaj); geri çağrılar öğe çizemez, kart gösterir
+BULK_FLASH_KEY = "todo_bulk_flash"  # (başarılı mı, mesaj)
+BULK_IDS_KEY = "todo_bulk_ids"  # çoklu seçim tablosunun satır sırası -> todo id
+
+BULK_ACTIONS = ["Tamamla", "Yeniden aç", "Öncelik değiştir", "Tarih değiştir", "Sil"]
+
 @require_min_role(ROLE_USER)
 def page():
     st.title("✅ Görevlerim (To-Do)")
 
+    if st.session_state.get(BULK_FLASH_KEY):
+        ok, msg = st.session_state.pop(BULK_FLASH_KEY)
+        (st.success if ok else st.warning)(msg)
+
     auth = st.session_state["auth"]
     uid = auth["user_id"]
 
@@ -69,6 +81,7 @@ def page():
         show_done = st.selectbox("Durum", ["Tümü", "Açık", "Tamamlandı"], index=1)
     with c3:
         only_overdue = st.checkbox("Sadece gecikenler", value=False)
+    multi = st.toggle("Çoklu seçim", key="todo_multi", help="Birden çok görevi tek işlemle tamamla, sil veya güncelle.")
 
     show_done_flag = None
     if show_done == "Açık":
@@ -93,6 +106,13 @@ def page():
         st.info("Kriterlere uyan görev bulunamadı.")
         return
 
+    if multi:
+        bulk_panel(todos, uid)
+        return
+
+    # Kart fragment'larının yazma sonrası tazeledikleri satırlar; tam çalıştırmada liste zaten taze
+    st.session_state[FRESH_KEY] = {}
+
     # Açık ve tamamlanmışları iki bölümde gösterelim (kullanıcı seçse bile)
     today = today_tr()
     open_todos = [t for t in todos if not t.is_done]
@@ -101,67 +121,7 @@ def page():
     if open_todos:
         st.markdown("### ⏳ Açık Görevler")
         for t in open_todos:
-            overdue = (t.due_date is not None and t.due_date < today)
-            with st.container(border=True):
-                c1, c2 = st.columns([0.12, 0.88])
-                with c1:
-                    chk = st.checkbox(" ", key=f"done_{t.id}", value=False)
-                with c2:
-                    header = f"**{t.title}**"
-                    if overdue:
-                        header += "  \n:warning: _Gecikmiş_"
-                    if t.due_date:
-                        header += f"  \n🗓️ Son tarih: {t.due_date}"
-                    header += f"  \n🏷️ Öncelik: **{PRIORITY_REV.get(t.priority, 'Normal')}**"
-                    st.markdown(header)
-                    if t.description:
-                        st.caption(t.description)
-
-                    # İşlemler
-                    with st.expander("Düzenle / Sil", expanded=False):
-                        with st.form(f"edit_{t.id}"):
-                            e_title = st.text_input("Başlık", value=t.title, max_chars=200)
-                            e_desc = st.text_area("Açıklama", value=t.description or "", height=100)
-                            e_due = st.date_input("Bitiş Tarihi (opsiyonel)", value=t.due_date)
-                            e_prio = st.selectbox(
-                                "Öncelik", list(PRIORITY_MAP.keys()),
-                                index={1:0,2:1,3:2}.get(t.priority,1)
-                            )
-                            colb1, colb2, colb3 = st.columns([1,1,2])
-                            save = colb1.form_submit_button("Kaydet")
-                            delbtn = colb2.form_submit_button("Sil")
-                        if save:
-                            db = SessionLocal()
-                            try:
-                                update_todo(
-                                    db,
-                                    todo_id=t.id, user_id=uid,
-                                    title=e_title, description=e_desc,
-                                    due_date=e_due, priority=PRIORITY_MAP[e_prio]
-                                )
-                                st.success("Güncellendi.")
-                            finally:
-                                db.close()
-                            st.rerun()
-                        if delbtn:
-                            db = SessionLocal()
-                            try:
-                                if delete_todo(db, todo_id=t.id, user_id=uid):
-                                    st.success("Silindi.")
-                                else:
-                                    st.error("Silme yetkisi yok veya kayıt bulunamadı.")
-                            finally:
-                                db.close()
-                            st.rerun()
-
-                # Checkbox action (tamamla)
-                if chk:
-                    db = SessionLocal()
-                    try:
-                        toggle_todo_done(db, todo_id=t.id, user_id=uid, done=True)
-                    finally:
-                        db.close()
-                    st.rerun()
+            todo_card(t, uid, today)
     else:
         st.caption("Açık görev bulunmuyor.")
 
@@ -169,26 +129,181 @@ def page():
 
     with st.expander(f"✅ Tamamlananlar ({len(done_todos)})", expanded=False):
         for t in done_todos:
-            with st.container(border=True):
-                c1, c2 = st.columns([0.12, 0.88])
-                with c1:
-                    chk = st.checkbox(" ", key=f"undone_{t.id}", value=True)
-                with c2:
-                    header = f"**{t.title}**"
-                    if t.due_date:
-                        header += f"  \n🗓️ Son tarih: {t.due_date}"
-                    header += f"  \n🏷️ Öncelik: **{PRIORITY_REV.get(t.priority, 'Normal')}**"
-                    st.markdown(header)
-                    if t.description:
-                        st.caption(t.description)
-                # Checkbox action (geri al)
-                if not chk:
-                    db = SessionLocal()
-                    try:
-                        toggle_todo_done(db, todo_id=t.id, user_id=uid, done=False)
-                    finally:
-                        db.close()
-                    st.rerun()
+            todo_card(t, uid, today)
+
+
+# Kart işlemleri widget geri çağrılarıdır: yazma + satırı tazeleme fragment gövdesinden önce
+# çalışır, kart da güncel satırı çizer (ek st.rerun gerekmez).
+def _store(todo_id: int, fresh) -> None:
+    st.session_state.setdefault(FRESH_KEY, {})[todo_id] = fresh
+
+
+def _flash(todo_id: int, msg: str, icon: str = "✅") -> None:
+    st.session_state.setdefault(FLASH_KEY, {})[todo_id] = (icon, msg)
+
+
+def _on_toggle(todo_id: int, uid: int, key: str) -> None:
+    db = SessionLocal()
+    try:
+        updated = toggle_todo_done(db, todo_id=todo_id, user_id=uid, done=bool(st.session_state[key]))
+    finally:
+        db.close()
+    if updated is None:
+        _flash(todo_id, "Bu görevi değiştirme yetkiniz yok veya kayıt bulunamadı.", icon="⚠️")
+    else:
+        _store(todo_id, updated)
+
+
+def _on_save(todo_id: int, uid: int) -> None:
+    ss = st.session_state
+    db = SessionLocal()
+    try:
+        updated = update_todo(
+            db,
+            todo_id=todo_id, user_id=uid,
+            title=ss[f"e_title_{todo_id}"], description=ss[f"e_desc_{todo_id}"],
+            due_date=ss[f"e_due_{todo_id}"], priority=PRIORITY_MAP[ss[f"e_prio_{todo_id}"]],
+        )
+    finally:
+        db.close()
+    if updated is None:
+        _flash(todo_id, "Güncelleme yetkisi yok veya kayıt bulunamadı.", icon="⚠️")
+    else:
+        _store(todo_id, updated)
+        _flash(todo_id, "Güncellendi.")
+
+
+def _on_delete(todo_id: int, uid: int) -> None:
+    db = SessionLocal()
+    try:
+        ok = delete_todo(db, todo_id=todo_id, user_id=uid)
+    finally:
+        db.close()
+    if ok:
+        _store(todo_id, None)
+        _flash(todo_id, "Silindi.")
+    else:
+        _flash(todo_id, "Silme yetkisi yok veya kayıt bulunamadı.", icon="⚠️")
+
+
+@st.fragment
+def todo_card(t, uid: int, today: date):
+    """
+    Tek görev kartı. İşaretleme/düzenleme/silme yalnızca bu fragment'ı yeniden çalıştırır;
+    kart kendi satırını repository'nin döndürdüğü tazelenmiş nesneden çizer. Kart durum
+    değiştirse de bölümü (açık/tamamlanan) bir sonraki tam çalıştırmaya kadar değişmez.
+    """
+    flash = st.session_state.get(FLASH_KEY, {}).pop(t.id, None)
+    if flash:
+        st.toast(flash[1], icon=flash[0])
+    fresh = st.session_state.get(FRESH_KEY, {})
+    if t.id in fresh:
+        t = fresh[t.id]
+        if t is None:
+            return  # silindi
+    overdue = (not t.is_done and t.due_date is not None and t.due_date < today)
+    with st.container(border=True):
+        c1, c2 = st.columns([0.12, 0.88])
+        with c1:
+            # Anahtar durumu içerir: durum değişince widget yeni varsayılanla oluşur
+            key = f"done_{t.id}_{int(t.is_done)}"
+            st.checkbox(" ", key=key, value=t.is_done, on_change=_on_toggle, args=(t.id, uid, key))
+        with c2:
+            header = f"**{t.title}**"
+            if overdue:
+                header += "  \n:warning: _Gecikmiş_"
+            if t.due_date:
+                header += f"  \n🗓️ Son tarih: {t.due_date}"
+            header += f"  \n🏷️ Öncelik: **{PRIORITY_REV.get(t.priority, 'Normal')}**"
+            st.markdown(header)
+            if t.description:
+                st.caption(t.description)
+
+            # İşlemler (yalnızca açık görevler)
+            if not t.is_done:
+                with st.expander("Düzenle / Sil", expanded=False):
+                    with st.form(f"edit_{t.id}"):
+                        st.text_input("Başlık", value=t.title, max_chars=200, key=f"e_title_{t.id}")
+                        st.text_area("Açıklama", value=t.description or "", height=100, key=f"e_desc_{t.id}")
+                        st.date_input("Bitiş Tarihi (opsiyonel)", value=t.due_date, key=f"e_due_{t.id}")
+                        st.selectbox(
+                            "Öncelik", list(PRIORITY_MAP.keys()),
+                            index={1:0,2:1,3:2}.get(t.priority,1), key=f"e_prio_{t.id}",
+                        )
+                        colb1, colb2, colb3 = st.columns([1,1,2])
+                        colb1.form_submit_button("Kaydet", on_click=_on_save, args=(t.id, uid))
+                        colb2.form_submit_button("Sil", on_click=_on_delete, args=(t.id, uid))
+
+def _on_bulk(uid: int) -> None:
+    """
+    Form geri çağrısı: seçilen görevlere tek UPDATE/DELETE uygular. Sayfa betiğinden önce
+    çalıştığı için ardından gelen tam çalıştırma listeyi zaten güncel okur.
+    """
+    ss = st.session_state
+    ids = list(ss.get(BULK_IDS_KEY) or [])
+    if ss.get("bulk_scope") != "Listelenen tümü":
+        edited = (ss.get("bulk_table") or {}).get("edited_rows", {})
+        ids = [ids[int(i)] for i, row in edited.items() if row.get("Seç") and int(i) < len(ids)]
+    if not ids:
+        ss[BULK_FLASH_KEY] = (False, "Seçili görev yok.")
+        return
+    action = ss.get("bulk_action")
+    if action == "Sil" and not ss.get("bulk_confirm"):
+        ss[BULK_FLASH_KEY] = (False, "Silmek için onay kutusunu işaretleyin.")
+        return
+    db = SessionLocal()
+    try:
+        if action == "Tamamla":
+            n = complete_todos(db, user_id=uid, todo_ids=ids)
+        elif action == "Yeniden aç":
+            n = reopen_todos(db, user_id=uid, todo_ids=ids)
+        elif action == "Öncelik değiştir":
+            n = set_todos_priority(db, user_id=uid, todo_ids=ids, priority=PRIORITY_MAP[ss["bulk_prio"]])
+        elif action == "Tarih değiştir":
+            n = reschedule_todos(db, user_id=uid, todo_ids=ids, due_date=ss.get("bulk_due"))
+        else:
+            n = delete_todos(db, user_id=uid, todo_ids=ids)
+    finally:
+        db.close()
+    ss[BULK_FLASH_KEY] = (True, f"{action}: {n} görev.")
+    ss.pop("bulk_table", None)  # seçim ve onay sıfırlansın
+    ss["bulk_confirm"] = False
+
+
+def bulk_panel(todos, uid: int):
+    """Çoklu seçim: tablo + tek işlem; gönderim tek ifade ve tek yeniden çalıştırmadır."""
+    st.session_state[BULK_IDS_KEY] = [t.id for t in todos]
+    rows = [
+        {
+            "Seç": False,
+            "Başlık": t.title,
+            "Durum": "Tamamlandı" if t.is_done else "Açık",
+            "Son tarih": t.due_date,
+            "Öncelik": PRIORITY_REV.get(t.priority, "Normal"),
+        }
+        for t in todos
+    ]
+    with st.form("bulk_todos"):
+        st.data_editor(
+            rows,
+            key="bulk_table",
+            hide_index=True,
+            disabled=["Başlık", "Durum", "Son tarih", "Öncelik"],
+            column_config={"Seç": st.column_config.CheckboxColumn("Seç", width="small")},
+        )
+        c1, c2 = st.columns([1, 1])
+        with c1:
+            st.radio("Kapsam", ["Seçilenler", "Listelenen tümü"], key="bulk_scope", horizontal=True,
+                     help=f"Listelenen tümü: filtreye uyan {len(todos)} görev")
+            st.selectbox("İşlem", BULK_ACTIONS, key="bulk_action")
+        with c2:
+            st.selectbox("Yeni öncelik", list(PRIORITY_MAP.keys()), index=1, key="bulk_prio",
+                         help="Yalnızca 'Öncelik değiştir' için")
+            st.date_input("Yeni bitiş tarihi", value=None, key="bulk_due",
+                          help="Yalnızca 'Tarih değiştir' için; boş bırakılırsa tarih kaldırılır")
+            st.checkbox("Silmeyi onaylıyorum", key="bulk_confirm")
+        st.form_submit_button("Uygula", on_click=_on_bulk, args=(uid,), type="primary")
+
 
 if __name__ == "__main__":
     page()
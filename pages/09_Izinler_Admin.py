@@ -6,22 +6,27 @@ from typing import List
 from app.core.rbac import require_min_role, ROLE_ADMIN
 from app.db.database import SessionLocal
 from app.db.repository import (
-    list_departments, list_users_simple, list_leaves_admin, delete_leave
+    list_departments_rows, list_leave_user_options, list_leaves_admin_rows, list_users_rows, delete_leave,
+    list_holidays, upsert_holiday, delete_holiday,
 )
+from app.services.workday_service import TR_FIXED_HOLIDAYS, leave_business_days, yearly_business_days
 from app.ui.nav import build_sidebar
 from app.utils.dates import today_tr
 
 st.set_page_config(page_title="İzinler (Admin)", page_icon="🗓️", initial_sidebar_state="expanded")
 build_sidebar()
 
+PAGE_SIZE = 50
+PAGE_KEY = "leave_admin_page"
+FILTER_KEY = "leave_admin_filter"
+
 @require_min_role(ROLE_ADMIN)
 def page():
     st.title("🗓️ İzinler (Admin)")
 
     db = SessionLocal()
     try:
-        deps = list_departments(db)
-        users = list_users_simple(db)
+        deps = list_departments_rows(db)
     finally:
         db.close()
 
@@ -30,9 +35,13 @@ def page():
                               format_func=lambda k: next(lbl for kk,lbl in dep_options if kk==k))
     dep_id = None if dep_choice == "ALL" else int(dep_choice)
 
-    # Kullanıcı filtresi (seçilen departmana göre)
-    filtered_users = [u for u in users if (dep_id is None or (u.department and u.department.id == dep_id))]
-    user_options = [("ALL", "Tümü")] + [(str(u.id), (u.full_name or u.username)) for u in filtered_users]
+    # Kullanıcı filtresi (seçilen departmana göre, SQL'de süzülür)
+    db = SessionLocal()
+    try:
+        filtered_users = list_leave_user_options(db, department_id=dep_id)
+    finally:
+        db.close()
+    user_options = [("ALL", "Tümü")] + [(str(u.id), u.display_name) for u in filtered_users]
     user_choice = st.selectbox("Kullanıcı", options=[k for k,_ in user_options],
                                format_func=lambda k: next(lbl for kk,lbl in user_options if kk==k))
     user_id = None if user_choice == "ALL" else int(user_choice)
@@ -46,27 +55,55 @@ def page():
     with c2:
         end = st.date_input("Bitiş", value=today)
 
-    # Liste
+    # Tatil takvimi ve yıllık rapor (açıldığında sorgulanır)
+    c1, c2 = st.columns(2)
+    with c1:
+        show_holidays = st.toggle("🎌 Tatil takvimi", key="hol_toggle")
+    with c2:
+        show_annual = st.toggle("📊 Yıllık izin raporu", key="annual_toggle")
+    if show_holidays:
+        holiday_admin(today)
+    if show_annual:
+        annual_report(today)
+
+    # Filtre değişince ilk sayfaya dön
+    filt = (dep_id, user_id, start, end)
+    if st.session_state.get(FILTER_KEY) != filt:
+        st.session_state[FILTER_KEY] = filt
+        st.session_state[PAGE_KEY] = 1
+    page_no = int(st.session_state.get(PAGE_KEY, 1))
+
+    # Liste (tek sayfa; sahip ve departman adları aynı sorguda)
     db = SessionLocal()
     try:
-        leaves = list_leaves_admin(db, start=start, end=end, department_id=dep_id, user_id=user_id)
+        leaves, total = list_leaves_admin_rows(
+            db, start=start, end=end, department_id=dep_id, user_id=user_id,
+            limit=PAGE_SIZE, offset=(page_no - 1) * PAGE_SIZE,
+        )
+        pages = max(1, (total + PAGE_SIZE - 1) // PAGE_SIZE)
+        if not leaves and page_no > pages:
+            # Kayıt silinince/son sayfanın ötesinde kalındıysa son sayfaya dön
+            page_no = st.session_state[PAGE_KEY] = pages
+            leaves, total = list_leaves_admin_rows(
+                db, start=start, end=end, department_id=dep_id, user_id=user_id,
+                limit=PAGE_SIZE, offset=(page_no - 1) * PAGE_SIZE,
+            )
+        bdays = leave_business_days(db, leaves)
     finally:
         db.close()
+    st.number_input("Sayfa", min_value=1, max_value=pages, step=1, key=PAGE_KEY)
 
     if not leaves:
         st.info("Kayıt bulunamadı.")
         return
 
     st.subheader("Kayıtlar")
+    st.caption(f"Toplam {total} kayıt · sayfa {page_no}/{pages}")
     for lv in leaves:
-        u = lv.user
-        owner = (u.full_name or u.username) if u else f"#{lv.user_id}"
-        dept_name = (u.department.name if (u and u.department) else "-")
-        days = (lv.end_date - lv.start_date).days + 1
         with st.container(border=True):
             st.write(
-                f"👤 **{owner}**  ·  🏢 {dept_name}  \n"
-                f"📅 **{lv.start_date} → {lv.end_date}**  _(Toplam {days} gün)_  \n"
+                f"👤 **{lv.owner}**  ·  🏢 {lv.department_names or '-'}  \n"
+                f"📅 **{lv.start_date} → {lv.end_date}**  _(Toplam {lv.days} gün · {bdays.get(lv.id, 0):g} iş günü)_  \n"
                 f"📝 **Mazeret:** {lv.reason or '-'}"
             )
             col1, col2 = st.columns([1,5])
@@ -82,5 +119,79 @@ def page():
                         db.close()
                     st.rerun()
 
+def holiday_admin(today: date):
+    st.subheader("🎌 Tatil Takvimi")
+    year = st.number_input("Yıl", min_value=2000, max_value=2100, value=today.year, step=1, key="hol_year")
+    db = SessionLocal()
+    try:
+        hols = list_holidays(db, year=int(year))
+    finally:
+        db.close()
+
+    if hols:
+        for h in hols:
+            c1, c2 = st.columns([5, 1])
+            c1.write(f"📅 {h.day} · {h.name}" + (" _(yarım gün)_" if h.half_day else ""))
+            if c2.button("Sil", key=f"hol_del_{h.id}"):
+                db = SessionLocal()
+                try:
+                    delete_holiday(db, holiday_id=h.id)
+                finally:
+                    db.close()
+                st.rerun()
+    else:
+        st.caption("Bu yıl için tatil tanımlı değil.")
+
+    with st.form("hol_add", clear_on_submit=True):
+        c1, c2, c3 = st.columns([1, 2, 1])
+        with c1:
+            h_day = st.date_input("Gün", value=today)
+        with c2:
+            h_name = st.text_input("Ad", placeholder="örn. Ramazan Bayramı 1. gün")
+        with c3:
+            h_half = st.checkbox("Yarım gün")
+        add = st.form_submit_button("Ekle / Güncelle")
+    if add:
+        db = SessionLocal()
+        try:
+            upsert_holiday(db, day=h_day, name=h_name, half_day=h_half)
+        finally:
+            db.close()
+        st.rerun()
+
+    if st.button(f"{int(year)} sabit resmi tatillerini ekle", key="hol_fixed"):
+        db = SessionLocal()
+        try:
+            for m, d_, name, half in TR_FIXED_HOLIDAYS:
+                upsert_holiday(db, day=date(int(year), m, d_), name=name, half_day=half)
+        finally:
+            db.close()
+        st.rerun()
+    st.divider()
+
+
+def annual_report(today: date):
+    st.subheader("📊 Yıllık İzin Raporu (iş günü)")
+    year = st.number_input("Yıl", min_value=2000, max_value=2100, value=today.year, step=1, key="annual_year")
+    db = SessionLocal()
+    try:
+        totals = yearly_business_days(db, year=int(year))
+        names = {u.id: u.display_name for u in list_users_rows(db)} if totals else {}
+    finally:
+        db.close()
+    if not totals:
+        st.caption("Bu yıl için izin kaydı yok.")
+        st.divider()
+        return
+    rows = sorted(
+        ({"Kullanıcı": names.get(uid, f"#{uid}"), "İş günü": total} for uid, total in totals.items()),
+        key=lambda r: (-r["İş günü"], r["Kullanıcı"]),
+    )
+    st.dataframe(rows, hide_index=True)
+    csv = "Kullanıcı,İş günü\n" + "".join(f"\"{r['Kullanıcı']}\",{r['İş günü']:g}\n" for r in rows)
+    st.download_button("CSV İndir", data=csv.encode("utf-8"), file_name=f"izin_{int(year)}.csv", mime="text/csv")
+    st.divider()
+
+
 if __name__ == "__main__":
     page()
@@ -0,0 +1,101 @@
+# pages/10_Ekip_Musaitlik.py
+from __future__ import annotations
+import streamlit as st
+import pandas as pd
+from datetime import date, timedelta
+
+from app.core.acl import current_acl
+from app.core.rbac import require_min_role, ROLE_LEAD
+from app.db.database import SessionLocal
+from app.db.repository import list_departments_rows, list_teams_rows, list_users_rows, who_is_off
+from app.services.availability_service import team_calendar, weekly_grid
+from app.utils.dates import today_tr
+from app.ui.nav import build_sidebar
+
+st.set_page_config(page_title="Ekip Müsaitlik", page_icon="📆", initial_sidebar_state="expanded")
+build_sidebar()
+
+WEEKDAYS = ["Pzt", "Sal", "Çar", "Per", "Cum", "Cmt", "Paz"]
+MAX_DAYS = 366
+
+@require_min_role(ROLE_LEAD)
+def page():
+    st.title("📆 Ekip Müsaitlik")
+
+    today = today_tr()
+    db = SessionLocal()
+    try:
+        # Kişi bazlı izin bilgisi: yalnızca yönetilen takım/departmanlar (admin: hepsi)
+        acl = current_acl(db)
+        if acl is None:
+            deps, teams = [], []
+        else:
+            deps = list_departments_rows(db, visible_department_ids=acl.managed_department_ids)
+            teams = list_teams_rows(db, visible_team_ids=acl.managed_team_ids)
+    finally:
+        db.close()
+
+    if not deps and not teams:
+        st.info("Yönettiğiniz bir takım veya departman bulunmuyor.")
+        return
+    scopes = (["Takım"] if teams else []) + (["Departman"] if deps else [])
+    scope = st.radio("Kapsam", scopes, horizontal=True)
+    team_id = dep_id = None
+    if scope == "Takım":
+        team_id = st.selectbox("Takım", options=[t.id for t in teams],
+                               format_func=lambda i: next(t.name for t in teams if t.id == i))
+    else:
+        dep_id = st.selectbox("Departman", options=[d.id for d in deps],
+                              format_func=lambda i: next(d.name for d in deps if d.id == i))
+
+    c1, c2 = st.columns(2)
+    with c1:
+        start: date = st.date_input("Başlangıç", value=today)
+    with c2:
+        end: date = st.date_input("Bitiş", value=today + timedelta(days=90))
+    if end < start:
+        st.error("Bitiş tarihi başlangıçtan önce olamaz.")
+        return
+    if (end - start).days + 1 > MAX_DAYS:
+        end = start + timedelta(days=MAX_DAYS - 1)
+        st.caption(f"Aralık {MAX_DAYS} günle sınırlandı: {start} → {end}")
+
+    db = SessionLocal()
+    try:
+        av = team_calendar(db, start=start, end=end, team_id=team_id, department_id=dep_id)
+    finally:
+        db.close()
+
+    if not av.total:
+        st.info("Seçilen kapsamda kullanıcı yok.")
+        return
+
+    m1, m2, m3 = st.columns(3)
+    m1.metric("Kişi", av.total)
+    m2.metric("En düşük mevcut", int(av.present.min()))
+    m3.metric("Ortalama mevcut", f"{av.present.mean():.1f}")
+
+    st.subheader("Günlük mevcut kişi")
+    st.bar_chart(pd.DataFrame({"Mevcut": av.present, "İzinli": av.off}, index=pd.to_datetime(av.days)))
+
+    st.subheader("Takvim")
+    week_starts, grid = weekly_grid(av)
+    cal = pd.DataFrame(grid, index=[str(w) for w in week_starts], columns=WEEKDAYS).replace(-1, pd.NA)
+    st.dataframe(cal)
+
+    # Seçilen gün kimler izinde
+    st.subheader("Gün detayı")
+    d: date = st.date_input("Gün", value=start, min_value=start, max_value=end, key="avail_day")
+    db = SessionLocal()
+    try:
+        off_ids = who_is_off(db, d=d, user_ids=list(av.member_ids))
+        names = {u.id: u.display_name for u in list_users_rows(db)} if off_ids else {}
+    finally:
+        db.close()
+    if not off_ids:
+        st.success(f"{d}: herkes mevcut.")
+    else:
+        st.warning(f"{d}: {len(off_ids)} kişi izinde — " + ", ".join(names.get(i, f"#{i}") for i in off_ids))
+
+if __name__ == "__main__":
+    page()
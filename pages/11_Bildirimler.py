@@ -0,0 +1,88 @@
+# pages/11_Bildirimler.py
+from __future__ import annotations
+import streamlit as st
+from typing import Optional
+
+from app.core.rbac import require_min_role, ROLE_USER
+from app.db.database import SessionLocal
+from app.db.repository import list_notifications_page, mark_notifications_read
+from app.utils.dates import fmt_hm_tr, parse_iso_dt
+from app.ui.nav import build_sidebar
+
+st.set_page_config(page_title="Bildirimler", page_icon="🔔", initial_sidebar_state="expanded")
+build_sidebar()
+
+PAGE_SIZE = 20
+CURSOR_KEY = "notif_cursors"  # önceki sayfaların başlangıç id'leri (keyset sayfalama yığını)
+KIND_ICONS = {"comment": "💬", "missing_digest": "📋"}
+
+# Okundu işaretleme geri çağrılardır: yazma sayfa gövdesinden (ve kenar çubuğu rozetinden) önce çalışır.
+def _mark_read(uid: int, ids: Optional[list]) -> None:
+    db = SessionLocal()
+    try:
+        mark_notifications_read(db, user_id=uid, notification_ids=ids)
+    finally:
+        db.close()
+
+
+def _reset_cursor() -> None:
+    st.session_state[CURSOR_KEY] = []
+
+
+def _next_page(before_id: int) -> None:
+    st.session_state.setdefault(CURSOR_KEY, []).append(before_id)
+
+
+def _prev_page() -> None:
+    stack = st.session_state.get(CURSOR_KEY) or []
+    if stack:
+        stack.pop()
+
+
+@require_min_role(ROLE_USER)
+def page():
+    st.title("🔔 Bildirimler")
+    uid = st.session_state["auth"]["user_id"]
+
+    c1, c2 = st.columns([3, 2])
+    with c1:
+        unread_only = st.toggle("Yalnızca okunmamışlar", key="notif_unread_only", on_change=_reset_cursor)
+    with c2:
+        st.button("Tümünü okundu işaretle", on_click=_mark_read, args=(uid, None), key="notif_all_read")
+
+    stack = st.session_state.setdefault(CURSOR_KEY, [])
+    before_id = stack[-1] if stack else None
+    db = SessionLocal()
+    try:
+        # Bir fazlası okunur: sonraki sayfa olup olmadığı ek sorgu olmadan anlaşılır
+        rows = list_notifications_page(
+            db, user_id=uid, before_id=before_id, limit=PAGE_SIZE + 1, unread_only=unread_only
+        )
+    finally:
+        db.close()
+    has_next = len(rows) > PAGE_SIZE
+    rows = rows[:PAGE_SIZE]
+
+    if not rows:
+        st.info("Bildirim yok." if not stack else "Bu sayfada bildirim yok.")
+    for n in rows:
+        with st.container(border=True):
+            icon = KIND_ICONS.get(n.kind, "🔔")
+            ts = fmt_hm_tr(parse_iso_dt(n.created_at.isoformat()))
+            st.markdown(f"{icon} **{n.title}**" + ("" if n.read_at else "  🆕"))
+            st.caption(f"{n.created_at.date()} {ts}")
+            st.text(n.body)
+            if not n.read_at:
+                st.button("Okundu", key=f"notif_read_{n.id}", on_click=_mark_read, args=(uid, [n.id]))
+
+    c1, c2, c3 = st.columns([1, 2, 1])
+    with c1:
+        st.button("← Önceki", disabled=not stack, on_click=_prev_page, key="notif_prev")
+    with c2:
+        st.caption(f"Sayfa {len(stack) + 1}")
+    with c3:
+        st.button("Sonraki →", disabled=not has_next, on_click=_next_page,
+                  args=(rows[-1].id if rows else 0,), key="notif_next")
+
+if __name__ == "__main__":
+    page()
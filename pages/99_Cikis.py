@@ -5,4 +5,5 @@ st.title("🚪 Çıkış")
 if "auth" in st.session_state:
     st.info(f"{st.session_state['auth']['username']} çıkış yaptı.")
     del st.session_state["auth"]
+    st.session_state.pop("acl", None)  # app.core.acl.SESSION_KEY
 st.link_button("Giriş ekranına dön", "./")
@@ -1,50 +1,101 @@
 # run_with_pyngrok.py
 from __future__ import annotations
-import os, sys, time, socket, signal, subprocess
-from contextlib import closing
+import asyncio, os, sys, time, signal, subprocess, threading
 from dotenv import load_dotenv
 
+from app.core.proxy import Backend, StickyProxy, wait_port
+
 load_dotenv()
 
 PORT = int(os.getenv("PORT", "8501"))
 NGROK_TOKEN = os.getenv("NGROK_AUTHTOKEN")
 NGROK_REGION = os.getenv("NGROK_REGION", "eu")  # eu, us, ap, au, sa, jp, in
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0") or 0)  # 0: /metrics kapalı
+# WORKERS > 1: PORT+1..PORT+N üzerinde N Streamlit süreci, PORT'ta yapışkan oturumlu vekil.
+# Her işçinin metrikleri METRICS_PORT+i (i = 0..N-1) portundadır.
+WORKERS = max(1, int(os.getenv("WORKERS", "1") or 1))
+PROXY_HEALTH_SECONDS = float(os.getenv("PROXY_HEALTH_SECONDS", "5"))
 
-def wait_port(host: str, port: int, timeout: float = 30.0) -> bool:
-    t0 = time.time()
-    while time.time() - t0 < timeout:
-        with closing(socket.socket(socket.AF_INET, socket.SOCK_STREAM)) as s:
-            s.settimeout(1.0)
-            try:
-                if s.connect_ex((host, port)) == 0:
-                    return True
-            except Exception:
-                pass
-        time.sleep(0.5)
-    return False
-
-def main():
-    # 1) Streamlit’i başlat
+def start_streamlit(port: int, metrics_port: int = 0, address: str | None = None) -> subprocess.Popen:
     cmd = [
         sys.executable, "-m", "streamlit", "run", "streamlit_app.py",
-        "--server.port", str(PORT),
+        "--server.port", str(port),
         "--server.headless", "true",
         "--browser.gatherUsageStats", "false",
     ]
-    streamlit_proc = subprocess.Popen(cmd)
-    print(f"[run] Streamlit başlatıldı (port {PORT}), PID={streamlit_proc.pid}. Bekleniyor...")
+    if address:
+        cmd += ["--server.address", address]
+    env = dict(os.environ)
+    env["METRICS_PORT"] = str(metrics_port)  # uygulama ilk sayfa yüklemesinde /metrics'i açar
+    if WORKERS > 1:
+        env.setdefault("CACHE_BACKEND", "sqlite")  # işçiler dizin/özet önbelleğini paylaşır
+    return subprocess.Popen(cmd, env=env)
+
+def stop(proc: subprocess.Popen) -> None:
+    try:
+        if proc.poll() is None:
+            # Windows uyumlu sonlandır
+            if os.name == "nt":
+                proc.send_signal(signal.CTRL_BREAK_EVENT)
+            proc.terminate()
+    except Exception:
+        pass
+
+def start_workers() -> tuple:
+    """Tek işçi: Streamlit doğrudan PORT'ta. Çok işçi: işçiler yalnızca 127.0.0.1'de, önlerinde vekil."""
+    if WORKERS == 1:
+        proc = start_streamlit(PORT, METRICS_PORT)
+        print(f"[run] Streamlit başlatıldı (port {PORT}), PID={proc.pid}. Bekleniyor...")
+        if METRICS_PORT:
+            print(f"[run] Metrikler: http://127.0.0.1:{METRICS_PORT}/metrics")
+        return [Backend(0, "127.0.0.1", PORT, proc=proc)], None
 
-    if not wait_port("127.0.0.1", PORT, timeout=45.0):
+    backends = []
+    for i in range(WORKERS):
+        port, mport = PORT + 1 + i, (METRICS_PORT + i if METRICS_PORT else 0)
+        b = Backend(i, "127.0.0.1", port,
+                    start=lambda port=port, mport=mport: start_streamlit(port, mport, "127.0.0.1"))
+        b.proc = b.start()
+        print(f"[run] İşçi {i} başlatıldı (port {port}), PID={b.proc.pid}")
+        if mport:
+            print(f"[run] Metrikler: http://127.0.0.1:{mport}/metrics")
+        backends.append(b)
+    proxy = StickyProxy(backends, health_interval=PROXY_HEALTH_SECONDS)
+    return backends, proxy
+
+def main():
+    # 1) Streamlit işçilerini (ve çok işçide vekili) başlat
+    backends, proxy = start_workers()
+
+    def shutdown() -> None:
+        if proxy is not None:
+            proxy.stop()  # önce: sağlık kontrolü kapanan işçileri yeniden başlatmasın
+        for b in backends:
+            if b.proc is not None:
+                stop(b.proc)
+
+    if not all(wait_port(b.host, b.port, timeout=45.0) for b in backends):
         print("[err] Streamlit porte bağlanılamadı. Loglara bakın.")
-        streamlit_proc.terminate()
+        shutdown()
         sys.exit(1)
+    if proxy is not None:
+        # Vekil kendi olay döngüsünde; sağlık kontrolü çöken işçiyi yeniden başlatır
+        proxy_thread = threading.Thread(
+            target=lambda: asyncio.run(proxy.serve("0.0.0.0", PORT)), name="proxy", daemon=True
+        )
+        proxy_thread.start()
+        if not wait_port("127.0.0.1", PORT, timeout=10.0):
+            print(f"[err] Vekil {PORT} portunu açamadı.")
+            shutdown()
+            sys.exit(1)
+        print(f"[run] Vekil hazır (port {PORT}) → {WORKERS} işçi ({PORT + 1}-{PORT + WORKERS})")
 
     # 2) pyngrok tünelini aç
     try:
         from pyngrok import ngrok, conf
     except Exception as e:
         print("[err] pyngrok bulunamadı. `pip install pyngrok`")
-        streamlit_proc.terminate()
+        shutdown()
         sys.exit(1)
 
     if NGROK_TOKEN:
@@ -68,7 +119,11 @@ def main():
 
     # 3) Ctrl+C bekleyip temiz kapat
     try:
-        streamlit_proc.wait()
+        if proxy is None:
+            backends[0].proc.wait()
+        else:
+            while proxy_thread.is_alive():
+                time.sleep(1.0)
     except KeyboardInterrupt:
         pass
     finally:
@@ -77,14 +132,7 @@ def main():
             ngrok.kill()
         except Exception:
             pass
-        try:
-            if streamlit_proc.poll() is None:
-                # Windows uyumlu sonlandır
-                if os.name == "nt":
-                    streamlit_proc.send_signal(signal.CTRL_BREAK_EVENT)
-                streamlit_proc.terminate()
-        except Exception:
-            pass
+        shutdown()
         print("[run] Kapatıldı.")
 
 if __name__ == "__main__":
@@ -6,7 +6,7 @@ from app.db.database import SessionLocal
 from app.db.repository import authenticate_user, get_user_by_username, change_password
 from app.core.rbac import role_weight, ROLE_USER, ROLE_ADMIN
 from app.utils.dates import today_tr
-from app.ui.nav import build_sidebar
+from app.ui.nav import build_sidebar, finish_query_profile
 from app.db.migrations import safe_run_migrations  # ← Tek seferlik migration
 
 st.set_page_config(
@@ -87,24 +87,27 @@ def home():
 
 
 def main():
-    # Yan menü (rol bazlı görünürlük, nav.py içinde)
-    build_sidebar()
+    try:
+        # Yan menü (rol bazlı görünürlük, nav.py içinde)
+        build_sidebar()
 
-    if "auth" not in st.session_state:
-        login_form()
-    else:
-        # Kullanıcının hâlâ var olduğunu/rolünü doğrula
-        db = SessionLocal()
-        try:
-            u = get_user_by_username(db, st.session_state["auth"]["username"])
-            if not u:
-                st.error("Kullanıcı bulunamadı.")
-                st.stop()
-            st.session_state["auth"]["role"] = u.role
-            st.session_state["auth"]["full_name"] = u.full_name or u.username
-        finally:
-            db.close()
-        home()
+        if "auth" not in st.session_state:
+            login_form()
+        else:
+            # Kullanıcının hâlâ var olduğunu/rolünü doğrula
+            db = SessionLocal()
+            try:
+                u = get_user_by_username(db, st.session_state["auth"]["username"])
+                if not u:
+                    st.error("Kullanıcı bulunamadı.")
+                    st.stop()
+                st.session_state["auth"]["role"] = u.role
+                st.session_state["auth"]["full_name"] = u.full_name or u.username
+            finally:
+                db.close()
+            home()
+    finally:
+        finish_query_profile()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,238 @@
+# tools/bench.py
+"""
+Repository benchmark paketi.
+
+    python -m tools.bench                                  # varsayılan ölçek noktaları
+    python -m tools.bench --scales small,medium --repeat 50
+    python -m tools.bench --compare eski.json yeni.json    # iki koşuyu karşılaştır
+
+Her ölçek noktası için tools.datagen ile ayrı bir veritabanı üretilir (veya önbellekteki
+dosya kullanılır), sıcak repository fonksiyonları zamanlanır ve sonuçlar JSON'a yazılır.
+Yazan durumlar (WRITE_CASES) önbellekteki dosyanın geçici bir kopyasında çalışır; böylece
+koşular aynı veri üzerinde ölçülür.
+"""
+from __future__ import annotations
+import argparse, json, os, platform, random, shutil, sqlite3, statistics, subprocess, tempfile, time
+from contextlib import closing
+from dataclasses import asdict
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List
+
+import sqlalchemy
+from sqlalchemy.orm import sessionmaker
+
+from app.db import repository as repo
+from tools.datagen import Scale, generate, make_engine
+
+SCALES: Dict[str, Scale] = {
+    "small": Scale(departments=3, teams_per_department=2, users_per_team=5, years=1),
+    "medium": Scale(departments=5, teams_per_department=3, users_per_team=8, years=2),
+    "large": Scale(departments=8, teams_per_department=4, users_per_team=12, years=3),
+}
+END = date(2026, 6, 30)  # tools.datagen varsayılan bitiş tarihi
+WRITE_CASES = ("upsert_report",)
+
+
+def _git_rev() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return "-"
+
+
+def _stats(samples: List[float]) -> dict:
+    s = sorted(samples)
+    p95 = s[min(len(s) - 1, int(round(0.95 * (len(s) - 1))))]
+    return {
+        "n": len(s),
+        "median_ms": round(statistics.median(s) * 1000, 3),
+        "mean_ms": round(statistics.fmean(s) * 1000, 3),
+        "p95_ms": round(p95 * 1000, 3),
+        "min_ms": round(s[0] * 1000, 3),
+    }
+
+
+def _cases(Session, rnd: random.Random, WriteSession=None) -> Dict[str, Callable[[], object]]:
+    """
+    Her çağrıda rastgele (ama seed'li) argümanlarla bir repository fonksiyonu çalıştırır.
+    WRITE_CASES yalnızca WriteSession (geçici kopya) verildiğinde eklenir.
+    """
+    db0 = Session()
+    try:
+        dept_ids = [d.id for d in repo.list_departments(db0)]
+        user_ids = [u.id for u in repo.list_users_simple(db0)]
+    finally:
+        db0.close()
+
+    def rand_day() -> date:
+        d = END - timedelta(days=rnd.randint(0, 60))
+        while d.weekday() >= 5:
+            d -= timedelta(days=1)
+        return d
+
+    def with_db(fn, S=Session):
+        def run():
+            db = S()
+            try:
+                return fn(db)
+            finally:
+                db.close()
+        return run
+
+    def comments_tree(db):
+        reports = repo.list_reports_for_department(db, department_id=rnd.choice(dept_ids), d=rand_day())
+        return repo.list_comments_tree_by_report_ids(db, report_ids=[r.id for r in reports])
+
+    def comments_tree_rows(db):
+        reports = repo.list_reports_for_department_rows(db, department_id=rnd.choice(dept_ids), d=rand_day())
+        return repo.list_comments_tree_rows(db, report_ids=[r.id for r in reports])
+
+    def upsert(db):
+        uid = rnd.choice(user_ids)
+        deps = repo.get_user_department_ids(db, user_id=uid)
+        return repo.upsert_report(
+            db, user_id=uid, department_id=deps[0], d=rand_day(),
+            content=f"- Benchmark güncellemesi {rnd.random():.6f}", project="Bench", tags_json=None,
+        )
+
+    cases = {
+        "list_reports_for_department": with_db(
+            lambda db: repo.list_reports_for_department(db, department_id=rnd.choice(dept_ids), d=rand_day())),
+        "list_comments_tree_by_report_ids": with_db(comments_tree),
+        "missing_reports_for_department_and_date": with_db(
+            lambda db: repo.missing_reports_for_department_and_date(db, department_id=rnd.choice(dept_ids), d=rand_day())),
+        "list_todos_for_user": with_db(
+            lambda db: repo.list_todos_for_user(db, user_id=rnd.choice(user_ids), show_done=False)),
+        "list_leaves_admin": with_db(
+            lambda db: repo.list_leaves_admin(db, start=END - timedelta(days=30), end=END,
+                                              department_id=rnd.choice(dept_ids))),
+        "list_user_reports": with_db(
+            lambda db: repo.list_user_reports(db, user_id=rnd.choice(user_ids), start=END - timedelta(days=30), end=END)),
+        # Satır tipli (read model) karşılıklar: ORM sürümleriyle aynı argüman dağılımı
+        "list_reports_for_department_rows": with_db(
+            lambda db: repo.list_reports_for_department_rows(db, department_id=rnd.choice(dept_ids), d=rand_day())),
+        "list_comments_tree_rows": with_db(comments_tree_rows),
+        "missing_reports_for_department_and_date_rows": with_db(
+            lambda db: repo.missing_reports_for_department_and_date_rows(
+                db, department_id=rnd.choice(dept_ids), d=rand_day())),
+        "list_user_reports_rows": with_db(
+            lambda db: repo.list_user_reports_rows(
+                db, user_id=rnd.choice(user_ids), start=END - timedelta(days=30), end=END)),
+    }
+    if WriteSession is not None:
+        cases["upsert_report"] = with_db(upsert, WriteSession)
+    return cases
+
+
+def bench_scale(name: str, scale: Scale, *, workdir: str, repeat: int, warmup: int, only: List[str],
+                fresh: bool = False) -> dict:
+    path = os.path.join(workdir, f"bench_{name}_{scale.seed}.sqlite3")
+    if fresh and os.path.exists(path):
+        os.remove(path)
+    fresh = not os.path.exists(path)
+    engine = make_engine(path)
+    counts = None
+    if fresh:
+        t0 = time.perf_counter()
+        counts = generate(engine, scale, end=END)
+        print(f"[bench] {name}: veri üretildi ({time.perf_counter() - t0:.1f} sn) {counts}")
+    else:
+        with engine.connect() as conn:
+            counts = {t: conn.exec_driver_sql(f"SELECT COUNT(*) FROM {t}").scalar()
+                      for t in ("departments", "teams", "users", "reports", "comments", "todos", "leaves")}
+
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    scratch_dir = scratch_engine = WriteSession = None
+    if any(not only or c in only for c in WRITE_CASES):
+        # Yazmalar önbellekteki üretilmiş dosyayı değiştirmesin: geçici kopya (backup API, WAL dahil)
+        scratch_dir = tempfile.mkdtemp(prefix="bench_")
+        scratch_path = os.path.join(scratch_dir, os.path.basename(path))
+        with closing(sqlite3.connect(path)) as src, closing(sqlite3.connect(scratch_path)) as dst:
+            src.backup(dst)
+        scratch_engine = make_engine(scratch_path)
+        WriteSession = sessionmaker(bind=scratch_engine, autoflush=False, autocommit=False, future=True)
+    rnd = random.Random(scale.seed)
+    results = {}
+    for fn_name, run in _cases(Session, rnd, WriteSession).items():
+        if only and fn_name not in only:
+            continue
+        for _ in range(warmup):
+            run()
+        samples = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            run()
+            samples.append(time.perf_counter() - t0)
+        results[fn_name] = _stats(samples)
+        print(f"  {name:7s} {fn_name:42s} med {results[fn_name]['median_ms']:8.3f} ms  p95 {results[fn_name]['p95_ms']:8.3f} ms")
+    engine.dispose()
+    if scratch_engine is not None:
+        scratch_engine.dispose()
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+    return {"scale": asdict(scale), "counts": counts, "results": results}
+
+
+def compare(a_path: str, b_path: str) -> None:
+    with open(a_path, encoding="utf-8") as f:
+        a = json.load(f)
+    with open(b_path, encoding="utf-8") as f:
+        b = json.load(f)
+    print(f"{'ölçek':8s} {'fonksiyon':42s} {'önce':>10s} {'sonra':>10s} {'fark':>8s}")
+    for sname, sb in b["scales"].items():
+        sa = a["scales"].get(sname)
+        if not sa:
+            continue
+        for fn, rb in sb["results"].items():
+            ra = sa["results"].get(fn)
+            if not ra:
+                continue
+            before, after = ra["median_ms"], rb["median_ms"]
+            delta = (after - before) / before * 100 if before else 0.0
+            print(f"{sname:8s} {fn:42s} {before:10.3f} {after:10.3f} {delta:+7.1f}%")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Repository benchmark paketi.")
+    ap.add_argument("--scales", default="small,medium,large", help=f"Virgülle: {', '.join(SCALES)}")
+    ap.add_argument("--repeat", type=int, default=30)
+    ap.add_argument("--warmup", type=int, default=3)
+    ap.add_argument("--only", default="", help="Yalnızca bu fonksiyonlar (virgülle)")
+    ap.add_argument("--workdir", default="data/bench", help="Üretilen veritabanlarının önbellek dizini")
+    ap.add_argument("--fresh", action="store_true", help="Önbellekteki veritabanlarını yeniden üret")
+    ap.add_argument("--out", default=None, help="Sonuç JSON yolu (varsayılan: <workdir>/results-<zaman>.json)")
+    ap.add_argument("--compare", nargs=2, metavar=("ONCE", "SONRA"))
+    args = ap.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    os.makedirs(args.workdir, exist_ok=True)
+    only = [x.strip() for x in args.only.split(",") if x.strip()]
+    out = {
+        "meta": {
+            "git": _git_rev(),
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "sqlite": __import__("sqlite3").sqlite_version,
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+        },
+        "scales": {},
+    }
+    for name in [s.strip() for s in args.scales.split(",") if s.strip()]:
+        if name not in SCALES:
+            raise SystemExit(f"Bilinmeyen ölçek: {name}")
+        out["scales"][name] = bench_scale(
+            name, SCALES[name], workdir=args.workdir, repeat=args.repeat, warmup=args.warmup, only=only,
+            fresh=args.fresh,
+        )
+
+    path = args.out or os.path.join(args.workdir, f"results-{datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(out, f, ensure_ascii=False, indent=2)
+    print(f"[bench] Sonuçlar: {path}")
+
+if __name__ == "__main__":
+    main()
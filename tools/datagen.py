@@ -0,0 +1,259 @@
+# tools/datagen.py
+"""
+Deterministik sentetik veri üretici (benchmark / yük testi / indeks analizi için).
+
+    python -m tools.datagen --out data/bench/sample.sqlite3 --departments 5 --teams 3 --users 8 --years 2
+
+Aynı parametreler + seed her zaman aynı veriyi üretir.
+"""
+from __future__ import annotations
+import argparse, os, random
+from dataclasses import dataclass, asdict
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.engine import Engine
+
+from app.core.security import hash_password
+from app.db.database import Base, install_sqlite_functions
+from app.db import org_closure
+from app.db.migrations import safe_run_migrations
+from app.db.models import (
+    Department, Team, User, UserDepartment, Report, Comment, Todo, Leave,
+)
+
+DEFAULT_PASSWORD = "bench123"
+
+_FIRST = [
+    "Ahmet", "Mehmet", "Ayşe", "Fatma", "Emre", "Elif", "Burak", "Zeynep", "Can", "Deniz",
+    "Ece", "Gökhan", "Hakan", "İrem", "Kerem", "Merve", "Oğuz", "Selin", "Serkan", "Şule",
+    "Tuğba", "Umut", "Yasemin", "Onur", "Çağla", "Barış", "Gizem", "Volkan", "Özge", "Kaan",
+]
+_LAST = [
+    "Yılmaz", "Kaya", "Demir", "Şahin", "Çelik", "Yıldız", "Yıldırım", "Öztürk", "Aydın", "Özdemir",
+    "Arslan", "Doğan", "Kılıç", "Aslan", "Çetin", "Kara", "Koç", "Kurt", "Özkan", "Şimşek",
+]
+_DEPTS = [
+    "Yazılım", "Satış", "Pazarlama", "İnsan Kaynakları", "Finans", "Destek", "Ürün", "Operasyon",
+    "Hukuk", "Satın Alma", "Kalite", "Ar-Ge",
+]
+_TEAMS = ["Çekirdek", "Platform", "Mobil", "Veri", "Entegrasyon", "Müşteri", "Altyapı", "Analitik"]
+_PROJECTS = ["Portal", "Mobil Uygulama", "CRM", "Fatura", "Raporlama", "Kampanya", "ERP Geçişi", None, None]
+_DONE = [
+    "{p} modülündeki hata kayıtlarını inceledim ve düzelttim.",
+    "Müşteri toplantısına katıldım, gereksinimleri not aldım.",
+    "Sprint planlamasına katıldım; görevleri tahminledim.",
+    "{p} için birim testleri yazdım.",
+    "Kod incelemesi yaptım, geri bildirimleri ilettim.",
+    "Haftalık satış raporunu hazırladım.",
+    "Tedarikçi ile fiyat görüşmesi yaptım.",
+    "Dokümantasyonu güncelledim.",
+    "Canlı ortamdaki performans sorununu analiz ettim.",
+    "Yeni çalışan oryantasyonuna destek verdim.",
+]
+_PLAN = [
+    "Yarın {p} entegrasyonuna devam edeceğim.",
+    "Yarın açık kalan talepleri kapatmayı planlıyorum.",
+    "Yarın demo hazırlığı yapacağım.",
+    "Yarın test ortamında doğrulama yapacağım.",
+]
+_BLOCK = [
+    "Engel yok.", "Test ortamı erişimi bekleniyor.", "Onay süreci gecikiyor.", "Veri eksik, ilgili ekipten bekleniyor.",
+]
+_COMMENTS = [
+    "Eline sağlık, güzel ilerleme.", "Bu konuyu yarın konuşalım.", "Test sonuçlarını da paylaşır mısın?",
+    "Müşteri dönüşünü bekleyelim.", "Öncelik bu olsun lütfen.", "Teşekkürler, not aldım.",
+]
+_REPLIES = ["Tamam, paylaşıyorum.", "Anlaşıldı.", "Yarın güncelleyeceğim.", "Teşekkürler!"]
+_TODOS = [
+    "Sunumu hazırla", "Faturayı kontrol et", "Toplantı notlarını gönder", "Hata kaydını kapat",
+    "Raporu gözden geçir", "Müşteriyi ara", "Test senaryosu yaz", "Sözleşmeyi incele",
+]
+_LEAVE_REASONS = ["Yıllık izin", "Sağlık", "Aile ziyareti", "Resmi işler", None]
+
+
+@dataclass
+class Scale:
+    departments: int = 5
+    teams_per_department: int = 3
+    users_per_team: int = 8
+    years: int = 2
+    seed: int = 42
+
+
+def make_engine(path: str) -> Engine:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False}, future=True)
+    install_sqlite_functions(engine)  # arşiv okuyan repository fonksiyonları için
+    return engine
+
+
+def _report_text(rnd: random.Random, project: Optional[str]) -> str:
+    p = project or "genel"
+    lines = [f"- {rnd.choice(_DONE).format(p=p)}" for _ in range(rnd.randint(1, 4))]
+    lines.append(f"- {rnd.choice(_PLAN).format(p=p)}")
+    lines.append(f"- {rnd.choice(_BLOCK)}")
+    return "\n".join(lines)
+
+
+def _chunks(rows: List[dict], n: int = 5000):
+    for i in range(0, len(rows), n):
+        yield rows[i:i + n]
+
+
+def generate(engine: Engine, scale: Scale, *, end: Optional[date] = None) -> Dict[str, int]:
+    """
+    Şemayı kurar (create_all + migration'lar) ve veriyi toplu INSERT'lerle yazar.
+    Hedef veritabanı boş olmalıdır. Dönüş: tablo başına satır sayıları.
+    """
+    rnd = random.Random(scale.seed)
+    end = end or date(2026, 6, 30)  # sabit bitiş: çıktı tarihe bağlı olmasın
+    start = end - timedelta(days=365 * scale.years)
+    now = datetime(end.year, end.month, end.day, 18, 0)
+
+    Base.metadata.create_all(bind=engine)
+    safe_run_migrations(engine)
+
+    pw = hash_password(DEFAULT_PASSWORD)  # tek hash, tüm kullanıcılar (pbkdf2 pahalı)
+    departments, teams, users, user_depts = [], [], [], []
+    reports, comments, todos, leaves = [], [], [], []
+
+    uid = 0
+    tid = 0
+    members: Dict[int, List[int]] = {}  # dept_id -> user_ids
+    leads: Dict[int, List[int]] = {}    # dept_id -> yorum yapabilen lider id'leri
+    primary: Dict[int, int] = {}        # user_id -> birincil departman
+
+    for di in range(1, scale.departments + 1):
+        dname = _DEPTS[(di - 1) % len(_DEPTS)] + ("" if di <= len(_DEPTS) else f" {di}")
+        departments.append({"id": di, "name": dname, "created_at": now})
+        for ti in range(scale.teams_per_department):
+            tid += 1
+            team_users = []
+            for k in range(scale.users_per_team):
+                uid += 1
+                full = f"{rnd.choice(_FIRST)} {rnd.choice(_LAST)}"
+                role = "user"
+                if k == 0:
+                    role = "lead"
+                if k == 1 and ti == 0:
+                    role = "dept_lead"
+                users.append({
+                    "id": uid, "username": f"u{uid:05d}", "password_hash": pw, "full_name": full,
+                    "role": role, "department_id": None, "team_id": tid, "created_at": now,
+                })
+                team_users.append(uid)
+                primary[uid] = di
+                members.setdefault(di, []).append(uid)
+                user_depts.append({"user_id": uid, "department_id": di, "created_at": now})
+                if role in ("lead", "dept_lead"):
+                    leads.setdefault(di, []).append(uid)
+            teams.append({
+                "id": tid, "name": f"{_TEAMS[ti % len(_TEAMS)]} {di}-{ti + 1}", "department_id": di,
+                "lead_user_id": team_users[0], "created_at": now,
+            })
+
+    # Kullanıcıların ~%10'u ikinci bir departmana da kayıtlı
+    if scale.departments > 1:
+        for u in users:
+            if rnd.random() < 0.10:
+                other = rnd.choice([d for d in range(1, scale.departments + 1) if d != primary[u["id"]]])
+                user_depts.append({"user_id": u["id"], "department_id": other, "created_at": now})
+                members.setdefault(other, []).append(u["id"])
+
+    # Raporlar + yorumlar (hafta içi, ~%90 doluluk)
+    rid = 0
+    cid = 0
+    day = start
+    while day <= end:
+        if day.weekday() < 5:
+            for dept_id, uids in members.items():
+                for u in uids:
+                    if rnd.random() > 0.9:
+                        continue
+                    rid += 1
+                    project = rnd.choice(_PROJECTS)
+                    ts = datetime(day.year, day.month, day.day, rnd.randint(9, 18), rnd.randint(0, 59))
+                    reports.append({
+                        "id": rid, "user_id": u, "department_id": dept_id, "date": day,
+                        "content": _report_text(rnd, project), "project": project, "tags_json": None,
+                        "created_at": ts, "updated_at": ts,
+                    })
+                    if rnd.random() < 0.2 and leads.get(dept_id):
+                        for _ in range(rnd.randint(1, 3)):
+                            cid += 1
+                            top = cid
+                            comments.append({
+                                "id": cid, "report_id": rid, "author_user_id": rnd.choice(leads[dept_id]),
+                                "parent_comment_id": None, "content": rnd.choice(_COMMENTS),
+                                "created_at": ts + timedelta(hours=1, minutes=cid % 60),
+                            })
+                            if rnd.random() < 0.5:
+                                cid += 1
+                                comments.append({
+                                    "id": cid, "report_id": rid, "author_user_id": u,
+                                    "parent_comment_id": top, "content": rnd.choice(_REPLIES),
+                                    "created_at": ts + timedelta(hours=2, minutes=cid % 60),
+                                })
+        day += timedelta(days=1)
+
+    # Görevler ve izinler
+    for u in users:
+        for _ in range(15 * scale.years):
+            created = start + timedelta(days=rnd.randint(0, (end - start).days))
+            done = rnd.random() < 0.7
+            cts = datetime(created.year, created.month, created.day, 10, 0)
+            todos.append({
+                "user_id": u["id"], "title": rnd.choice(_TODOS),
+                "description": rnd.choice([None, "Detaylar e-postada.", "Ekip ile birlikte."]),
+                "due_date": (created + timedelta(days=rnd.randint(1, 30))) if rnd.random() < 0.7 else None,
+                "priority": rnd.choice([1, 2, 2, 3]), "is_done": done,
+                "created_at": cts, "updated_at": cts, "completed_at": cts + timedelta(days=1) if done else None,
+            })
+        for _ in range(5 * scale.years):
+            s = start + timedelta(days=rnd.randint(0, (end - start).days))
+            e = s + timedelta(days=rnd.choice([0, 0, 1, 2, 4, 9]))
+            lts = datetime(s.year, s.month, s.day, 9, 0)
+            leaves.append({
+                "user_id": u["id"], "start_date": s, "end_date": e, "reason": rnd.choice(_LEAVE_REASONS),
+                "created_at": lts, "updated_at": lts,
+            })
+
+    with engine.begin() as conn:
+        for model, rows in (
+            (Department, departments), (User, users), (Team, teams), (UserDepartment, user_depts),
+            (Report, reports), (Comment, comments), (Todo, todos), (Leave, leaves),
+        ):
+            for chunk in _chunks(rows):
+                conn.execute(insert(model.__table__), chunk)
+        org_closure.sync(conn)  # toplu INSERT'ler repository'yi atladığı için kapanış burada kurulur
+        conn.exec_driver_sql("ANALYZE")
+
+    return {
+        "departments": len(departments), "teams": len(teams), "users": len(users),
+        "user_departments": len(user_depts), "reports": len(reports), "comments": len(comments),
+        "todos": len(todos), "leaves": len(leaves),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Deterministik sentetik veri üretir.")
+    ap.add_argument("--out", required=True, help="Oluşturulacak SQLite dosyası (mevcutsa silinir).")
+    ap.add_argument("--departments", type=int, default=Scale.departments)
+    ap.add_argument("--teams", type=int, default=Scale.teams_per_department, help="Departman başına takım")
+    ap.add_argument("--users", type=int, default=Scale.users_per_team, help="Takım başına kullanıcı")
+    ap.add_argument("--years", type=int, default=Scale.years)
+    ap.add_argument("--seed", type=int, default=Scale.seed)
+    args = ap.parse_args()
+
+    if os.path.exists(args.out):
+        os.remove(args.out)
+    scale = Scale(args.departments, args.teams, args.users, args.years, args.seed)
+    counts = generate(make_engine(args.out), scale)
+    print(f"[datagen] {args.out} {asdict(scale)}")
+    for k, v in counts.items():
+        print(f"  {k:18s} {v:>9,}")
+
+if __name__ == "__main__":
+    main()
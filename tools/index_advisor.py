@@ -0,0 +1,189 @@
+# tools/index_advisor.py
+"""
+İndeks danışmanı: repository sorgularının planlarını ve sürelerini indeks değişikliğinden
+önce/sonra karşılaştırır.
+
+    python -m tools.index_advisor                      # medium ölçek
+    python -m tools.index_advisor --scale large --repeat 50 --json data/index_advisor/sonuc.json
+
+Adımlar: üretilmiş veri setinde (tools.datagen) eski tek kolonlu indeksler kurulur ("önce"),
+her repository fonksiyonunun çalıştırdığı SQL ifadeleri yakalanıp EXPLAIN QUERY PLAN ile
+incelenir ve zamanlanır; ardından migration'daki bileşik indeksler uygulanır ("sonra")
+ve aynı ölçüm tekrarlanır. Tam tablo taraması (SCAN) ve geçici B-ağacı (sıralama) işaretlenir.
+"""
+from __future__ import annotations
+import argparse, json, os, random, statistics, time
+from datetime import timedelta
+from typing import Callable, Dict, List, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from app.db import repository as repo
+from app.db.migrations import COMPOSITE_INDEXES, LEGACY_INDEXES, _apply_composite_indexes
+from app.db.profiler import statement_shape
+from app.db.slowlog import query_plan
+from tools.bench import END, SCALES, _cases
+from tools.datagen import generate, make_engine
+
+
+def _extra_cases(Session, rnd: random.Random) -> Dict[str, Callable[[], object]]:
+    """bench'te olmayan ama filtre/sıralama deseni farklı olan çağrılar."""
+    db0 = Session()
+    try:
+        user_ids = [u.id for u in repo.list_users_simple(db0)]
+    finally:
+        db0.close()
+
+    def with_db(fn):
+        def run():
+            db = Session()
+            try:
+                return fn(db)
+            finally:
+                db.close()
+        return run
+
+    return {
+        "list_todos_for_user(overdue)": with_db(
+            lambda db: repo.list_todos_for_user(db, user_id=rnd.choice(user_ids), show_done=False, only_overdue=True)),
+        "list_todos_for_user(all)": with_db(
+            lambda db: repo.list_todos_for_user(db, user_id=rnd.choice(user_ids))),
+        "list_leaves_for_user": with_db(
+            lambda db: repo.list_leaves_for_user(db, user_id=rnd.choice(user_ids),
+                                                 start=END - timedelta(days=90), end=END)),
+        "list_leaves_admin(all)": with_db(
+            lambda db: repo.list_leaves_admin(db, start=END - timedelta(days=30), end=END)),
+        "list_user_reports(ilike)": with_db(
+            lambda db: repo.list_user_reports(db, user_id=rnd.choice(user_ids), start=END - timedelta(days=365),
+                                              end=END, q="test")),
+    }
+
+
+def _set_before(engine) -> None:
+    """Eski şema durumu: yalnızca tek kolonlu indeksler."""
+    with engine.begin() as conn:
+        for name in COMPOSITE_INDEXES:
+            conn.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
+        for sql in LEGACY_INDEXES.values():
+            conn.exec_driver_sql(sql)
+        conn.exec_driver_sql("ANALYZE")
+
+
+def _set_after(engine) -> None:
+    with engine.begin() as conn:
+        _apply_composite_indexes(conn)
+
+
+def _measure(engine, *, seed: int, repeat: int) -> Dict[str, dict]:
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    captured: List[Tuple[str, object]] = []
+    capturing = [False]
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        if capturing[0]:
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", _capture)
+    try:
+        rnd = random.Random(seed)
+        cases = {**_cases(Session, rnd), **_extra_cases(Session, rnd)}
+        out: Dict[str, dict] = {}
+        for name, run in cases.items():
+            captured.clear()
+            capturing[0] = True
+            run()
+            capturing[0] = False
+            plans = {}
+            with engine.connect() as conn:
+                dbapi = conn.connection.dbapi_connection
+                for stmt, params in captured:
+                    head = stmt.lstrip()[:6].upper()
+                    if head not in ("SELECT", "UPDATE", "DELETE", "WITH"):
+                        continue
+                    shape = statement_shape(stmt)
+                    if shape not in plans:
+                        plans[shape] = query_plan(dbapi, stmt, params)
+            samples = []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                run()
+                samples.append(time.perf_counter() - t0)
+            out[name] = {"median_ms": round(statistics.median(samples) * 1000, 3), "plans": plans}
+        return out
+    finally:
+        event.remove(engine, "before_cursor_execute", _capture)
+
+
+def _flags(info: dict) -> str:
+    f = [f"SCAN {t}" for t in info["scans"]]
+    if info["temp_btree"]:
+        f.append("TEMP B-TREE")
+    return ", ".join(f) or "-"
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Repository sorguları için indeks danışmanı (önce/sonra).")
+    ap.add_argument("--scale", default="medium", choices=list(SCALES))
+    ap.add_argument("--repeat", type=int, default=30)
+    ap.add_argument("--workdir", default="data/index_advisor")
+    ap.add_argument("--fresh", action="store_true", help="Veri setini yeniden üret")
+    ap.add_argument("--json", default=None, help="Planları ve süreleri JSON olarak yaz")
+    ap.add_argument("-v", "--verbose", action="store_true", help="Tüm plan satırlarını yazdır")
+    args = ap.parse_args()
+
+    scale = SCALES[args.scale]
+    os.makedirs(args.workdir, exist_ok=True)
+    path = os.path.join(args.workdir, f"advisor_{args.scale}_{scale.seed}.sqlite3")
+    if args.fresh and os.path.exists(path):
+        os.remove(path)
+    needs_data = not os.path.exists(path)
+    engine = make_engine(path)
+    if needs_data:
+        print(f"[advisor] Veri üretiliyor: {path} {generate(engine, scale, end=END)}")
+
+    _set_before(engine)
+    before = _measure(engine, seed=scale.seed, repeat=args.repeat)
+    _set_after(engine)
+    after = _measure(engine, seed=scale.seed, repeat=args.repeat)
+    engine.dispose()
+
+    print(f"\n{'fonksiyon':42s} {'önce':>10s} {'sonra':>10s} {'fark':>8s}")
+    for name, b in before.items():
+        a = after[name]
+        delta = (a["median_ms"] - b["median_ms"]) / b["median_ms"] * 100 if b["median_ms"] else 0.0
+        print(f"{name:42s} {b['median_ms']:10.3f} {a['median_ms']:10.3f} {delta:+7.1f}%")
+
+    print("\nPlan değişiklikleri (önce -> sonra):")
+    used = set()
+    for name, b in before.items():
+        for shape, pb in b["plans"].items():
+            pa = after[name]["plans"].get(shape)
+            if pa is None:
+                continue
+            for line in pa["plan"]:
+                for idx in COMPOSITE_INDEXES:
+                    if f"INDEX {idx} " in line + " ":
+                        used.add(idx)
+            if pb["plan"] != pa["plan"] or args.verbose:
+                print(f"  {name}: {shape[:110]}")
+                print(f"      önce : {' | '.join(pb['plan'])}  [{_flags(pb)}]")
+                print(f"      sonra: {' | '.join(pa['plan'])}  [{_flags(pa)}]")
+
+    remaining = sorted({f"{name}: {_flags(p)}" for name, r in after.items() for p in r["plans"].values()
+                        if p["scans"]})
+    if remaining:
+        print("\nHâlâ tam tablo taraması yapan sorgular (ör. baştan '%' ile ilike aramaları indekslenemez):")
+        for x in remaining:
+            print(f"  {x}")
+    unused = [i for i in COMPOSITE_INDEXES if i not in used]
+    if unused:
+        print(f"\nBu ölçümde plana girmeyen indeksler: {', '.join(unused)}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"scale": args.scale, "before": before, "after": after}, f, ensure_ascii=False, indent=2)
+        print(f"[advisor] Sonuçlar: {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+# tools/loadtest.py
+"""
+Eşzamanlı oturum yük testi (streamlit.testing.v1.AppTest ile, tamamen çevrimdışı).
+
+    python -m tools.loadtest --sessions 8 --iterations 3
+    python -m tools.loadtest --sessions 40 --workers 8 --db data/loadtest/load.sqlite3
+
+Her sanal kullanıcı gerçekçi bir akış izler: giriş -> 01_Rapor_Yaz (rapor kaydet) ->
+03_Departman_Raporlari (departman gez) -> 07_Gorevlerim_Todo (görev işaretle).
+Sayfa başına gecikme yüzdelikleri ve yazma ifadelerinin (kilit beklemesi dahil) süreleri raporlanır.
+
+Varsayılan mod `process`: her süreç aynı anda tek oturum çalıştırır (gerçek sunucuda
+oturumlar ayrı ScriptRunner iş parçacıklarıdır; AppTest ise aynı süreçte paralel
+iş parçacıklarında oturumlar arası öğe kimliği karışması yaşayabiliyor). `thread` modu
+tek süreçte GIL çekişmesini görmek için vardır; hatalar bu sebeple çıkabilir.
+
+Not: Uygulama modülleri DB_URL'i import anında okur; bu yüzden app.* importları
+DB_URL ayarlandıktan sonra fonksiyon içlerinde yapılır.
+"""
+from __future__ import annotations
+import argparse, json, os, random, threading, time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASSWORD = "bench123"  # tools.datagen.DEFAULT_PASSWORD
+
+_write_lock = threading.Lock()
+_write_samples: List[float] = []
+_lock_errors = 0
+
+
+def _install_write_probe():
+    """Yazma ifadelerinin süresini ölçer; SQLite'ta kilit beklemesi bu süreye dahildir."""
+    from sqlalchemy import event
+    from app.db.database import engine
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info["lt_t0"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        t0 = conn.info.pop("lt_t0", None)
+        if t0 is None:
+            return
+        if statement.lstrip()[:6].upper() in ("INSERT", "UPDATE", "DELETE"):
+            with _write_lock:
+                _write_samples.append(time.perf_counter() - t0)
+
+    @event.listens_for(engine, "handle_error")
+    def _err(ctx):
+        global _lock_errors
+        if "database is locked" in str(ctx.original_exception):
+            with _write_lock:
+                _lock_errors += 1
+
+
+def _page(name: str) -> str:
+    return os.path.join(ROOT, name)
+
+
+def _timed_run(at, samples: Dict[str, List[float]], label: str):
+    t0 = time.perf_counter()
+    at.run()
+    samples.setdefault(label, []).append(time.perf_counter() - t0)
+    if at.exception:
+        raise RuntimeError(f"{label}: {at.exception[0].message}")
+
+
+def _flow(username: str, seed: int, timeout: float) -> dict:
+    """Tek bir sanal kullanıcının akışı. Dönüş: {"samples": {sayfa: [sn]}, "errors": [...]}."""
+    from streamlit.testing.v1 import AppTest
+
+    rnd = random.Random(seed)
+    samples: Dict[str, List[float]] = {}
+    errors: List[str] = []
+    try:
+        # 1) Giriş
+        at = AppTest.from_file(_page("streamlit_app.py"), default_timeout=timeout)
+        _timed_run(at, samples, "streamlit_app (ilk yükleme)")
+        at.text_input[0].input(username)
+        at.text_input[1].input(PASSWORD)
+        at.button[0].click()
+        _timed_run(at, samples, "streamlit_app (giriş)")
+        auth = at.session_state["auth"] if "auth" in at.session_state else None
+        if not auth:
+            raise RuntimeError(f"giriş başarısız: {username}")
+
+        # 2) Rapor yaz
+        at = AppTest.from_file(_page("pages/01_Rapor_Yaz.py"), default_timeout=timeout)
+        at.session_state["auth"] = dict(auth)
+        _timed_run(at, samples, "01_Rapor_Yaz")
+        if at.text_area:
+            at.text_area[0].input(f"- Yük testi raporu {rnd.random():.6f}\n- Yarın devam.")
+            at.button[0].click()
+            _timed_run(at, samples, "01_Rapor_Yaz (kaydet)")
+
+        # 3) Departman raporları
+        at = AppTest.from_file(_page("pages/03_Departman_Raporlari.py"), default_timeout=timeout)
+        at.session_state["auth"] = dict(auth)
+        _timed_run(at, samples, "03_Departman_Raporlari")
+        if at.selectbox:
+            sel = at.selectbox[0]
+            if len(sel.options) > 1:
+                sel.select_index(rnd.randrange(len(sel.options)))
+                _timed_run(at, samples, "03_Departman_Raporlari (gezinme)")
+
+        # 4) Görev işaretle
+        at = AppTest.from_file(_page("pages/07_Gorevlerim_Todo.py"), default_timeout=timeout)
+        at.session_state["auth"] = dict(auth)
+        _timed_run(at, samples, "07_Gorevlerim_Todo")
+        boxes = [c for c in at.checkbox if (c.key or "").startswith("done_")]
+        if boxes:
+            rnd.choice(boxes).check()
+            _timed_run(at, samples, "07_Gorevlerim_Todo (işaretle)")
+    except Exception as e:
+        errors.append(f"{username}: {e}")
+    return {"samples": samples, "errors": errors}
+
+
+def _worker(db_url: str, users: List[str], iterations: int, seed: int, timeout: float, threads: int) -> dict:
+    """Süreç modunda her işçi: kendi motorunu kurar, akışları iş parçacıklarıyla çalıştırır."""
+    os.environ["DB_URL"] = db_url
+    _install_write_probe()
+    merged: Dict[str, List[float]] = {}
+    errors: List[str] = []
+    jobs = [(u, seed + i * 7919 + k) for k in range(iterations) for i, u in enumerate(users)]
+    with ThreadPoolExecutor(max_workers=max(1, threads)) as ex:
+        for res in ex.map(lambda j: _flow(j[0], j[1], timeout), jobs):
+            for k, v in res["samples"].items():
+                merged.setdefault(k, []).extend(v)
+            errors.extend(res["errors"])
+    with _write_lock:
+        return {"samples": merged, "errors": errors, "writes": list(_write_samples), "lock_errors": _lock_errors}
+
+
+def _pct(values: List[float], p: float) -> float:
+    s = sorted(values)
+    if not s:
+        return 0.0
+    k = (len(s) - 1) * p
+    lo = int(k)
+    hi = min(lo + 1, len(s) - 1)
+    return s[lo] + (s[hi] - s[lo]) * (k - lo)
+
+
+def _summary(values: List[float]) -> dict:
+    return {
+        "n": len(values),
+        "p50_ms": round(_pct(values, 0.50) * 1000, 1),
+        "p90_ms": round(_pct(values, 0.90) * 1000, 1),
+        "p95_ms": round(_pct(values, 0.95) * 1000, 1),
+        "p99_ms": round(_pct(values, 0.99) * 1000, 1),
+        "max_ms": round(max(values) * 1000, 1) if values else 0.0,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="AppTest tabanlı eşzamanlı oturum yük testi.")
+    ap.add_argument("--db", default="data/loadtest/load.sqlite3", help="Kullanılacak/üretilecek SQLite dosyası")
+    ap.add_argument("--regenerate", action="store_true", help="Veri setini yeniden üret")
+    ap.add_argument("--departments", type=int, default=4)
+    ap.add_argument("--teams", type=int, default=3)
+    ap.add_argument("--users", type=int, default=8)
+    ap.add_argument("--years", type=int, default=1)
+    ap.add_argument("--sessions", type=int, default=20, help="Eşzamanlı sanal kullanıcı sayısı")
+    ap.add_argument("--iterations", type=int, default=2, help="Her kullanıcının akışı kaç kez tekrarlayacağı")
+    ap.add_argument("--mode", choices=["thread", "process"], default="process")
+    ap.add_argument("--workers", type=int, default=None,
+                    help="Süreç modunda süreç (= eşzamanlı oturum) sayısı; varsayılan --sessions")
+    ap.add_argument("--timeout", type=float, default=60.0, help="Tek bir sayfa çalıştırması için zaman aşımı (sn)")
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--out", default=None, help="Sonuç JSON yolu")
+    args = ap.parse_args()
+
+    db_path = os.path.abspath(args.db)
+    db_url = f"sqlite:///{db_path}"
+    os.environ["DB_URL"] = db_url  # app.* importlarından ÖNCE
+
+    from app.utils.dates import today_tr
+    from tools.datagen import Scale, generate, make_engine
+
+    if args.regenerate and os.path.exists(db_path):
+        os.remove(db_path)
+    if not os.path.exists(db_path):
+        counts = generate(make_engine(db_path), Scale(args.departments, args.teams, args.users, args.years, args.seed),
+                          end=today_tr())
+        print(f"[load] Veri seti üretildi: {db_path} {counts}")
+
+    # Uygulama açılış adımları (tablo/admin/migration) bir kez; oturumlar sıcak sunucuyu ölçsün
+    from app.db.seed import create_tables, ensure_admin
+    from app.db.migrations import safe_run_migrations
+    create_tables(); ensure_admin(); safe_run_migrations()
+
+    import sqlite3
+    con = sqlite3.connect(db_path)
+    usernames = [r[0] for r in con.execute(
+        "SELECT username FROM users WHERE username LIKE 'u%' ORDER BY id LIMIT ?", (args.sessions,)
+    ).fetchall()]
+    con.close()
+    if not usernames:
+        raise SystemExit("Veri setinde kullanıcı yok.")
+
+    print(f"[load] {len(usernames)} oturum x {args.iterations} tekrar, mod={args.mode}")
+    t0 = time.perf_counter()
+    results = []
+    if args.mode == "thread":
+        results.append(_worker(db_url, usernames, args.iterations, args.seed, args.timeout, len(usernames)))
+    else:
+        n = max(1, min(args.workers or len(usernames), len(usernames)))
+        parts = [usernames[i::n] for i in range(n)]
+        with ProcessPoolExecutor(max_workers=n) as ex:
+            futs = [ex.submit(_worker, db_url, p, args.iterations, args.seed + i, args.timeout, 1)
+                    for i, p in enumerate(parts) if p]
+            results = [f.result() for f in futs]
+    wall = time.perf_counter() - t0
+
+    pages: Dict[str, List[float]] = {}
+    writes: List[float] = []
+    errors: List[str] = []
+    lock_errors = 0
+    for r in results:
+        for k, v in r["samples"].items():
+            pages.setdefault(k, []).extend(v)
+        writes.extend(r["writes"])
+        errors.extend(r["errors"])
+        lock_errors += r["lock_errors"]
+
+    flows = len(usernames) * args.iterations
+    report = {
+        "meta": {
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "db": db_path, "mode": args.mode, "sessions": len(usernames),
+            "iterations": args.iterations, "wall_s": round(wall, 2),
+            "flows_per_s": round(flows / wall, 3) if wall else 0.0,
+        },
+        "pages": {k: _summary(v) for k, v in sorted(pages.items())},
+        "db_writes": {**_summary(writes), "lock_errors": lock_errors},
+        "errors": errors[:50],
+    }
+
+    print(f"{'sayfa':40s} {'n':>5s} {'p50':>9s} {'p95':>9s} {'p99':>9s} {'max':>9s}")
+    for k, s in report["pages"].items():
+        print(f"{k:40s} {s['n']:5d} {s['p50_ms']:9.1f} {s['p95_ms']:9.1f} {s['p99_ms']:9.1f} {s['max_ms']:9.1f}")
+    w = report["db_writes"]
+    print(f"{'DB yazma (kilit beklemesi dahil)':40s} {w['n']:5d} {w['p50_ms']:9.1f} {w['p95_ms']:9.1f} "
+          f"{w['p99_ms']:9.1f} {w['max_ms']:9.1f}  kilit hatası={lock_errors}")
+    print(f"[load] {flows} akış / {wall:.1f} sn = {report['meta']['flows_per_s']} akış/sn, hata={len(errors)}")
+    for e in errors[:5]:
+        print(f"[err] {e}")
+
+    out = args.out or os.path.join(os.path.dirname(db_path), f"loadtest-{datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"[load] Sonuçlar: {out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# tools/orphan_check.py
+"""
+Silinmiş kullanıcılardan kalan satırların kontrolü.
+
+    python -m tools.orphan_check                 # DB_URL'deki veritabanı
+    python -m tools.orphan_check --selftest      # geçici veritabanında silme + id yeniden kullanımı senaryosu
+
+SQLite'ta foreign_keys kapalı olduğundan ondelete=CASCADE çalışmaz; kullanıcıya ait satırları
+repository.delete_user açıkça siler. Kullanıcısı olmayan satır bulunursa çıkış kodu 1 olur
+(CI'da kullanılabilir). Yeni kullanıcı en büyük id'yi yeniden alabildiği için bu satırlar
+sessizce yeni kullanıcıya geçer.
+"""
+from __future__ import annotations
+import argparse, os, sys, tempfile
+from typing import Dict, Tuple
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+# Kullanıcıya ait (kullanıcıyla birlikte silinmesi gereken) tablolar
+USER_OWNED = ("user_departments", "reports", "todos", "leaves", "notifications", "notification_counters")
+
+
+def find_orphans(engine: Engine) -> Dict[str, int]:
+    out: Dict[str, int] = {}
+    with engine.connect() as conn:
+        for table in USER_OWNED:
+            n = conn.execute(text(
+                f"SELECT COUNT(*) FROM {table} WHERE user_id NOT IN (SELECT id FROM users)"
+            )).scalar_one()
+            if n:
+                out[table] = n
+    return out
+
+
+def selftest() -> Tuple[int, Dict[str, int]]:
+    """Bildirimi olan en büyük id'li kullanıcı silinir, yeni kullanıcı aynı id'yi alır: devralma olmamalı."""
+    from app.db.database import Base
+    from app.db import models  # noqa: F401  (tabloları Base'e kaydeder)
+    from app.db import repository as repo
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'orphan.sqlite3')}", future=True)
+        Base.metadata.create_all(engine)
+        Session = sessionmaker(bind=engine, autoflush=False, future=True)
+        db = Session()
+        try:
+            repo.create_user(db, username="a", password="parola123", full_name="A")
+            old = repo.create_user(db, username="b", password="parola123", full_name="B")
+            repo.notify(db, user_id=old.id, kind="comment", title="Yorum", body="-")
+            db.commit()
+            repo.delete_user(db, user_id=old.id)
+            new = repo.create_user(db, username="c", password="parola123", full_name="C")
+            inherited = 0
+            if new.id == old.id:
+                inherited = repo.get_unread_count(db, user_id=new.id)
+                inherited += len(repo.list_notifications_page(db, user_id=new.id, limit=10))
+            repo.delete_user(db, user_id=new.id)
+        finally:
+            db.close()
+        try:
+            return inherited, find_orphans(engine)
+        finally:
+            engine.dispose()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Silinmiş kullanıcılardan kalan satırları bulur.")
+    ap.add_argument("--selftest", action="store_true", help="Geçici veritabanında silme senaryosunu çalıştır.")
+    args = ap.parse_args()
+
+    inherited = 0
+    if args.selftest:
+        inherited, orphans = selftest()
+    else:
+        from app.db.database import engine
+        orphans = find_orphans(engine)
+    if inherited:
+        print(f"[err] Aynı id'yi alan yeni kullanıcı eski bildirimleri/sayacı devraldı ({inherited})")
+    for table, n in orphans.items():
+        print(f"[err] {table}: kullanıcısı olmayan {n} satır")
+    if inherited or orphans:
+        sys.exit(1)
+    print("[orphan] Sahipsiz satır yok.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+# tools/query_budget.py
+"""
+Sayfa başına SQL ifade bütçesi kontrolü (AppTest ile, çevrimdışı).
+
+    python -m tools.query_budget                 # iki veri boyutunda tüm sayfalar
+    python -m tools.query_budget --only 03_Departman_Raporlari.py -v
+
+Her sayfa tools.datagen ile üretilmiş bir veritabanında AppTest ile iki kez çalıştırılır
+(ilk yükleme + tekrar çalıştırma) ve her çalıştırmadaki SQL ifadeleri sayılır. Bir sayfa
+BUDGETS'taki sınırı aşarsa veya `constant` işaretli bir sayfanın sorgu sayısı veri boyutuyla
+değişirse çıkış kodu 1 olur (CI'da kullanılabilir).
+
+Not: Uygulama modülleri DB_URL'i import anında okur; her veri seti ayrı bir "spawn"
+sürecinde ölçülür.
+"""
+from __future__ import annotations
+import argparse, json, multiprocessing, os, sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@dataclass(frozen=True)
+class Budget:
+    role: str            # sayfayı açan kullanıcı: "admin" | "dept_lead"
+    max_queries: int     # tek bir çalıştırmadaki en fazla SQL ifadesi
+    constant: bool = False  # sorgu sayısı veri boyutundan bağımsız olmalı
+
+
+# Sınırlar ölçülen değerlerin bir üstündedir; bir sayfa sorgu eklerse bütçe bilinçli güncellenmeli.
+BUDGETS: Dict[str, Budget] = {
+    "01_Rapor_Yaz.py": Budget("dept_lead", 5),
+    "02_Gecmisim.py": Budget("dept_lead", 4),
+    "03_Departman_Raporlari.py": Budget("dept_lead", 12, constant=True),
+    "04_Yonetim.py": Budget("admin", 10),
+    "05_Raporlama_Istatistik.py": Budget("dept_lead", 7),
+    "06_Rapor_Yorumlari.py": Budget("admin", 8, constant=True),
+    "07_Gorevlerim_Todo.py": Budget("dept_lead", 3, constant=True),
+    "08_Izin_Talep.py": Budget("dept_lead", 3),
+    "09_Izinler_Admin.py": Budget("admin", 9, constant=True),
+    "10_Ekip_Musaitlik.py": Budget("dept_lead", 14),
+    "11_Bildirimler.py": Budget("dept_lead", 3, constant=True),
+}
+
+# İki veri boyutu: takım başına kullanıcı (ekrandaki rapor/yorum sayısı) değişir
+SIZES = {
+    "small": dict(departments=2, teams_per_department=2, users_per_team=3, years=1),
+    "large": dict(departments=2, teams_per_department=3, users_per_team=10, years=1),
+}
+
+
+def _measure(db_url: str, pages: List[str], timeout: float) -> Dict[str, dict]:
+    """Alt süreçte çalışır: her sayfayı iki kez çalıştırıp ifade sayılarını döner."""
+    os.environ["DB_URL"] = db_url
+    from streamlit.testing.v1 import AppTest
+    from app.db import profiler
+    from app.db.database import SessionLocal
+    from app.db.models import User
+    from app.db.seed import create_tables, ensure_admin
+    from app.db.migrations import safe_run_migrations
+    from sqlalchemy import select
+
+    create_tables(); ensure_admin(); safe_run_migrations()
+
+    statements: List[str] = []
+    profiler.add_query_hook(lambda stmt, params, dur, conn: statements.append(stmt))
+
+    db = SessionLocal()
+    try:
+        auth = {}
+        for role in {BUDGETS[p].role for p in pages}:
+            u = db.execute(select(User).where(User.role == role).order_by(User.id).limit(1)).scalar_one()
+            auth[role] = {"user_id": u.id, "username": u.username, "role": u.role,
+                          "full_name": u.full_name or u.username}
+    finally:
+        db.close()
+
+    out: Dict[str, dict] = {}
+    for page in pages:
+        at = AppTest.from_file(os.path.join(ROOT, "pages", page), default_timeout=timeout)
+        at.session_state["auth"] = dict(auth[BUDGETS[page].role])
+        runs, shapes = [], {}
+        error = None
+        for _ in range(2):
+            statements.clear()
+            at.run()
+            if at.exception:
+                error = at.exception[0].message
+                break
+            runs.append(len(statements))
+            for s in statements:
+                k = profiler.statement_shape(s)
+                shapes[k] = shapes.get(k, 0) + 1
+        # Çalıştırma başına birden fazla geçen şekiller (olası N+1)
+        repeated = sorted(((v, k) for k, v in shapes.items() if v > len(runs)), reverse=True)[:5]
+        out[page] = {"runs": runs, "error": error, "repeated": repeated}
+    return out
+
+
+def _ensure_db(workdir: str, name: str, fresh: bool) -> str:
+    from app.utils.dates import today_tr
+    from tools.datagen import Scale, generate, make_engine
+
+    path = os.path.abspath(os.path.join(workdir, f"budget_{name}.sqlite3"))
+    if fresh and os.path.exists(path):
+        os.remove(path)
+    if not os.path.exists(path):
+        # Sayfalar "bugün"ü gösterdiği için veri bugüne kadar üretilir
+        generate(make_engine(path), Scale(**SIZES[name]), end=today_tr())
+    return path
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Sayfa başına SQL ifade bütçesi kontrolü.")
+    ap.add_argument("--only", default="", help="Yalnızca bu sayfalar (virgülle, ör. 03_Departman_Raporlari.py)")
+    ap.add_argument("--workdir", default="data/query_budget")
+    ap.add_argument("--fresh", action="store_true", help="Veri setlerini yeniden üret")
+    ap.add_argument("--timeout", type=float, default=60.0)
+    ap.add_argument("--json", default=None, help="Ölçümleri JSON olarak yaz")
+    ap.add_argument("-v", "--verbose", action="store_true", help="Tekrarlayan ifade şekillerini göster")
+    args = ap.parse_args()
+
+    only = [x.strip() for x in args.only.split(",") if x.strip()]
+    pages = [p for p in BUDGETS if not only or p in only]
+    os.makedirs(args.workdir, exist_ok=True)
+
+    ctx = multiprocessing.get_context("spawn")
+    results: Dict[str, Dict[str, dict]] = {}
+    for name in SIZES:
+        db_path = _ensure_db(args.workdir, name, args.fresh)
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as ex:
+            results[name] = ex.submit(_measure, f"sqlite:///{db_path}", pages, args.timeout).result()
+
+    failures: List[str] = []
+    print(f"{'sayfa':30s} {'bütçe':>6s} " + " ".join(f"{n:>12s}" for n in SIZES) + "  durum")
+    for page in pages:
+        b = BUDGETS[page]
+        cells, peak, status = [], {}, "ok"
+        for name in SIZES:
+            r = results[name][page]
+            if r["error"]:
+                failures.append(f"{page} [{name}]: hata: {r['error']}")
+                cells.append(f"{'hata':>12s}")
+                status = "HATA"
+                continue
+            peak[name] = max(r["runs"])
+            cells.append(f"{'/'.join(map(str, r['runs'])):>12s}")
+            if peak[name] > b.max_queries:
+                failures.append(f"{page} [{name}]: {peak[name]} ifade > bütçe {b.max_queries}")
+                status = "AŞIM"
+        if b.constant and len(set(peak.values())) > 1:
+            failures.append(f"{page}: sorgu sayısı veri boyutuyla değişiyor {peak}")
+            status = "SABİT DEĞİL"
+        print(f"{page:30s} {b.max_queries:6d} " + " ".join(cells) + f"  {status}")
+        if args.verbose:
+            for name in SIZES:
+                for n, shape in results[name][page]["repeated"]:
+                    print(f"    [{name}] x{n}  {shape[:140]}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"budgets": {p: BUDGETS[p].__dict__ for p in pages}, "results": results},
+                      f, ensure_ascii=False, indent=2)
+
+    for msg in failures:
+        print(f"[budget] {msg}")
+    if failures:
+        sys.exit(1)
+    print("[budget] Tüm sayfalar bütçe içinde.")
+
+if __name__ == "__main__":
+    main()